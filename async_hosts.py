@@ -0,0 +1,218 @@
+import asyncio
+import time
+from collections import defaultdict, deque, namedtuple
+from qunetsim.objects import Qubit
+from qunetsim.objects.storage.classical_storage import ClassicalStorage
+from transport import ACK_POLL_INTERVAL, is_acked
+
+# Classical message addressed to one conversation (e.g. one QKD session) between two hosts
+Tagged = namedtuple('Tagged', ['tag', 'content'])
+
+
+class FutureSlot(object):
+    """
+    Stands in for the queue.Queue that qunetsim storages and ACK waiters put a
+    result into. The result is handed to an asyncio future on its event loop instead,
+    so a waiting coroutine needs no thread of its own. put runs on the host's thread
+    (for storages with the storage lock held) and records the item at once, so a
+    waiter that withdraws under the same lock can tell whether it was handed over.
+    """
+
+    def __init__(self, loop, future):
+        self.loop = loop
+        self.future = future
+        self.filled = False
+        self.item = None
+
+    def put(self, item):
+        self.filled = True
+        self.item = item
+        try:
+            self.loop.call_soon_threadsafe(self._set, item)
+        except RuntimeError:
+            pass  # The loop has been closed; the waiter is gone
+
+    def _set(self, item):
+        if not self.future.done():
+            self.future.set_result(item)
+
+
+# Function to register a pending request with a qunetsim storage unless `lookup` already finds the item;
+# returns (item, request id)
+def _request(storage, lock, lookup, args):
+    lock.acquire_write()
+    try:
+        item = lookup()
+        if item is not None:
+            return item, None
+        req_id = storage._request_id  # _add_request returns the id after the next one
+        storage._add_request(args)
+        return None, req_id
+    finally:
+        lock.release_write()
+
+
+# Function to withdraw a request whose waiter gave up; returns the item if the storage handed it over first
+def _withdraw(storage, lock, req_id, slot):
+    lock.acquire_write()
+    try:
+        if req_id in storage._pending_request_dict:
+            storage._remove_request(req_id)
+        return slot.item if slot.filled else None
+    finally:
+        lock.release_write()
+
+
+class AsyncHost(object):
+    """
+    Coroutine API over a started qunetsim Host.
+
+    send_qubit / get_qubit / send_classical / get_classical mirror the Host methods,
+    but waiting for a qubit, a message or an ACK suspends the coroutine instead of
+    blocking a thread: the request is registered with the host's storage and
+    completes an asyncio future when the host's packet thread delivers. Any number
+    of protocol roles can therefore run concurrently on one event loop. Classical
+    messages can carry a tag so that many sessions share one pair of hosts.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.host_id = host.host_id
+        self._mailbox = defaultdict(deque)
+        self._fetching = {}
+
+    async def send_qubit(self, receiver_id, q, await_ack=False, no_ack=False):
+        q_id = self.host.send_qubit(receiver_id, q, no_ack=no_ack)
+        if await_ack and not no_ack:
+            return q_id, await self._await_ack(receiver_id, self.host.get_sequence_number(receiver_id))
+        return q_id
+
+    async def _await_ack(self, receiver_id, seq_num):
+        """True once the ACK for seq_num has arrived, False after the host's max_ack_wait.
+
+        The host compares the waiter's start time with time.time(), so it is taken
+        from the same clock as in Host.await_ack.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        slot = FutureSlot(loop, future)
+        timeout = self.host.max_ack_wait
+        start = time.time()
+        waiter = (slot, receiver_id, seq_num, timeout, start)
+        self.host._ack_receiver_queue.append(waiter)
+        try:
+            # The host can skip a waiter while removing others, so the ACK record is re-checked too
+            while not is_acked(self.host, receiver_id, seq_num):
+                if timeout is not None and time.time() - start > timeout:
+                    return False
+                done, _ = await asyncio.wait({future}, timeout=ACK_POLL_INTERVAL)
+                if done:
+                    return future.result()
+            return True
+        finally:
+            # The host only drops the waiters it answers
+            if not slot.filled:
+                try:
+                    self.host._ack_receiver_queue.remove(waiter)
+                except ValueError:
+                    pass
+
+    async def get_qubit(self, sender_id, q_id=None, wait=None):
+        """Next data qubit from sender_id (or the one with q_id); None if none arrives within wait seconds."""
+        storage = self.host._qubit_storage
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        slot = FutureSlot(loop, future)
+        qubit, req_id = _request(storage, storage.lock,
+                                 lambda: storage._get_qubit_from_host(sender_id, q_id, Qubit.DATA_QUBIT),
+                                 [slot, sender_id, q_id, Qubit.DATA_QUBIT])
+        if qubit is not None:
+            return qubit
+        try:
+            return await asyncio.wait_for(future, wait)
+        except asyncio.TimeoutError:
+            # A qubit stored after the timeout but before the withdrawal is still returned
+            return _withdraw(storage, storage.lock, req_id, slot)
+        except asyncio.CancelledError:
+            # E.g. run_roles tearing down the loop: no request may outlive it
+            _withdraw(storage, storage.lock, req_id, slot)
+            raise
+
+    async def send_classical(self, receiver_id, content, tag=None, await_ack=False, no_ack=False):
+        message = content if tag is None else Tagged(tag, content)
+        self.host.send_classical(receiver_id, message, no_ack=no_ack)
+        if await_ack and not no_ack:
+            return await self._await_ack(receiver_id, self.host.get_sequence_number(receiver_id))
+
+    async def get_classical(self, sender_id, tag=None, wait=None):
+        """Content of the next message from sender_id with this tag; None if none arrives within wait seconds."""
+        async def receive():
+            while not self._mailbox[sender_id, tag]:
+                await self._fetch(sender_id)
+            return self._mailbox[sender_id, tag].popleft()
+
+        try:
+            return await asyncio.wait_for(receive(), wait)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _fetch(self, sender_id):
+        # One outstanding storage request per sender; every waiting coroutine shares it
+        if sender_id not in self._fetching:
+            self._fetching[sender_id] = asyncio.ensure_future(self._next_message(sender_id))
+        await asyncio.shield(self._fetching[sender_id])
+
+    async def _next_message(self, sender_id):
+        storage = self.host._classical_messages
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        slot = FutureSlot(loop, future)
+        message, req_id = _request(storage, storage._lock, lambda: storage._get_next_from_sender(sender_id),
+                                   [slot, sender_id, ClassicalStorage.GET_NEXT])
+        try:
+            if message is None:
+                message = await future
+        except asyncio.CancelledError:
+            # Withdraw the request, keeping a message the storage already handed over
+            message = _withdraw(storage, storage._lock, req_id, slot)
+            if message is not None:
+                self._deliver(sender_id, message)
+            raise
+        finally:
+            del self._fetching[sender_id]
+        self._deliver(sender_id, message)
+
+    # Function to file a message in the mailbox of its tag
+    def _deliver(self, sender_id, message):
+        content = message.content
+        if isinstance(content, Tagged):
+            self._mailbox[sender_id, content.tag].append(content.content)
+        else:
+            self._mailbox[sender_id, None].append(content)
+
+
+async def transfer_qubits(sender, receiver, qubits, tag=None, wait=None):
+    """Send qubits from one AsyncHost to another and return them as received, in sending order.
+
+    The sender follows the qubits with a tagged message listing their ids, and the
+    receiver awaits each id, so several transfers can share a pair of hosts.
+    A qubit that does not arrive within wait seconds comes back as None.
+    """
+    async def send():
+        q_ids = [await sender.send_qubit(receiver.host_id, q, no_ack=True) for q in qubits]
+        await sender.send_classical(receiver.host_id, q_ids, tag=tag, no_ack=True)
+
+    async def receive():
+        q_ids = await receiver.get_classical(sender.host_id, tag, wait)
+        return [await receiver.get_qubit(sender.host_id, q_id, wait) for q_id in q_ids or []]
+
+    _, received = await asyncio.gather(send(), receive())
+    return received
+
+
+# Function to run protocol-role coroutines concurrently on one event loop and return their results in order;
+# asyncio.run cancels whatever is still waiting when it closes the loop, which withdraws its storage requests
+def run_roles(*roles):
+    async def main():
+        return await asyncio.gather(*roles)
+    return asyncio.run(main())
@@ -1,14 +1,14 @@
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
-
-# Helper function to create a random bit (0 or 1)
-def random_bit():
-    return random.randint(0, 1)
+from random_streams import as_stream, spawn_seeds
+import sifting
+from monte_carlo import print_statistics, simulate_batch
+from stabilizer import StabilizerBackend
+import sys
 
 # Function to prepare qubits for Alice based on random bits
-def prepare_qubits_b92(alice, length):
-    alice_bits = [random_bit() for _ in range(length)]  # Alice's random bits
+def prepare_qubits_b92(alice, length, rng=None):
+    alice_bits = as_stream(rng).bits(length).tolist()  # Alice's random bits
     qubits = []
 
     for bit in alice_bits:
@@ -22,9 +22,9 @@ def prepare_qubits_b92(alice, length):
     return alice_bits, qubits
 
 # Function for Bob to receive and measure qubits
-def measure_qubits_b92(bob, qubits, length):
+def measure_qubits_b92(bob, qubits, length, rng=None):
     bob_results = []
-    bob_bases = [random_bit() for _ in range(length)]  # Bob's random bases
+    bob_bases = as_stream(rng).bits(length).tolist()  # Bob's random bases
 
     for i in range(length):
         q = qubits[i]
@@ -37,31 +37,35 @@ def measure_qubits_b92(bob, qubits, length):
 
 # Sift key by retaining bits that correspond to Bob detecting a qubit
 def sift_key_b92(alice_bits, bob_results):
-    sifted_key = []
-    for alice_bit, bob_result in zip(alice_bits, bob_results):
-        if alice_bit != bob_result:
-            sifted_key.append(alice_bit)
-    return sifted_key
+    return sifting.sift_b92(alice_bits, bob_results).tolist()
+
+# B92 Protocol implementation (batched=True draws all test cases as one array and only prints the statistics);
+# B92 only uses Clifford gates, so backend can be a stabilizer.StabilizerBackend
+def b92_protocol(length=20, test_cases=5, seed=None, batched=False, backend=None):
+    if batched:
+        stats = simulate_batch('b92', test_cases, length, seed)
+        print_statistics(stats)
+        return stats
 
-# B92 Protocol implementation
-def b92_protocol(length=20, test_cases=5):
     network = Network.get_instance()
-    network.start()
+    network.start(backend=backend)
 
-    alice = Host('Alice')
-    bob = Host('Bob')
+    alice = Host('Alice', backend=backend)
+    bob = Host('Bob', backend=backend)
     network.add_host(alice)
     network.add_host(bob)
 
-    for test in range(test_cases):
+    # One child seed per test case, split again into Alice's and Bob's streams
+    for test, test_seed in enumerate(spawn_seeds(seed, test_cases)):
         print(f"\nTest Case {test + 1}:")
+        alice_seed, bob_seed = test_seed.spawn(2)
 
         # Alice prepares qubits
-        alice_bits, qubits = prepare_qubits_b92(alice, length)
+        alice_bits, qubits = prepare_qubits_b92(alice, length, alice_seed)
         print(f"Alice's original bits: {alice_bits}")
 
         # Bob receives and measures qubits
-        bob_bases, bob_results = measure_qubits_b92(bob, qubits, length)
+        bob_bases, bob_results = measure_qubits_b92(bob, qubits, length, bob_seed)
         print(f"Bob's bases: {bob_bases} (0 = Standard basis, 1 = Diagonal basis)")
         print(f"Bob's results: {bob_results}")
 
@@ -71,6 +75,6 @@ def b92_protocol(length=20, test_cases=5):
 
     network.stop()
 
-# Execute the B92 protocol
+# Execute the B92 protocol: python b92.py [--stabilizer]
 if __name__ == '__main__':
-    b92_protocol(length=16, test_cases=5)
+    b92_protocol(length=16, test_cases=5, backend=StabilizerBackend() if '--stabilizer' in sys.argv[1:] else None)
@@ -1,10 +1,14 @@
-import random
-from qunetsim.components import Host, Network
+from random_streams import as_stream, protocol_streams, spawn_seeds
 from qunetsim.objects import Qubit
-import time
-
-def alice_protocol(host_A, bits, bases):
-    # Prepare qubits based on bits and bases
+from transport import DEFAULT_WAIT, DEFAULT_WINDOW, get_qubits, send_qubits
+from network_context import NetworkContext
+from async_hosts import AsyncHost, run_roles
+from interception import intercept_resend
+from stabilizer import StabilizerBackend
+import sys
+
+# Function to prepare qubits based on bits and bases
+def prepare_qubits(host_A, bits, bases):
     qubits = []
     for i in range(len(bits)):
         qubit = Qubit(host_A)
@@ -13,21 +17,24 @@ def alice_protocol(host_A, bits, bases):
         if bases[i] == 1:
             qubit.H()  # Apply Hadamard gate for diagonal basis
         qubits.append(qubit)
+    return qubits
+
+def alice_protocol(host_A, bits, bases, window=DEFAULT_WINDOW):
+    qubits = prepare_qubits(host_A, bits, bases)
 
-    # Send qubits to Bob
-    for qubit in qubits:
-        host_A.send_qubit('B', qubit, await_ack=True)
+    # Send qubits to Bob, up to `window` of them awaiting an ACK at a time
+    q_ids, _ = send_qubits(host_A, 'B', qubits, window)
+    return q_ids
 
-def bob_protocol(host_B, n_bits):
+def bob_protocol(host_B, n_bits, rng=None, q_ids=None):
     # Bob chooses random bases to measure
-    bob_bases = [random.randint(0, 1) for _ in range(n_bits)]
+    bob_bases = as_stream(rng).bits(n_bits).tolist()
     received_bits = []
     
-    # Bob receives and measures qubits
-    for _ in range(n_bits):
-        qubit = host_B.get_data_qubit('A')
+    # Bob receives and measures qubits (in Alice's sending order when her qubit ids are known)
+    for i, qubit in enumerate(get_qubits(host_B, 'A', n_bits, q_ids, wait=DEFAULT_WAIT)):
         if qubit is not None:
-            if bob_bases[_] == 1:
+            if bob_bases[i] == 1:
                 qubit.H()  # Apply Hadamard gate for diagonal basis
             received_bits.append(qubit.measure())
         else:
@@ -40,35 +47,94 @@ def classical_basis_comparison(alice_bases, bob_bases):
     matching_indices = [i for i in range(len(alice_bases)) if alice_bases[i] == bob_bases[i]]
     return matching_indices
 
-def bb84_protocol():
+# Alice's side of one BB84 session on an AsyncHost: send the qubits and their ids (to Bob, or to
+# whoever sits on the quantum channel), then swap bases with Bob
+async def alice_role(host, session, bits, bases, qubit_peer='B'):
+    q_ids = [await host.send_qubit(qubit_peer, q, no_ack=True) for q in prepare_qubits(host.host, bits, bases)]
+    await host.send_classical(qubit_peer, q_ids, tag=(session, 'qubits'), no_ack=True)
+    bob_bases = await host.get_classical('B', (session, 'bases'))
+    await host.send_classical('B', bases, tag=(session, 'bases'), no_ack=True)
+    return [bits[i] for i in classical_basis_comparison(bases, bob_bases)]
+
+# Bob's side: measure the qubits from the quantum channel in random bases, then swap bases with Alice
+async def bob_role(host, session, n_bits, rng=None, qubit_peer='A'):
+    bob_bases = as_stream(rng).bits(n_bits).tolist()
+    q_ids = await host.get_classical(qubit_peer, (session, 'qubits'))
+    measurements = []
+    for q_id, basis in zip(q_ids, bob_bases):
+        qubit = await host.get_qubit(qubit_peer, q_id)
+        if basis == 1:
+            qubit.H()  # Apply Hadamard gate for diagonal basis
+        measurements.append(qubit.measure())
+    await host.send_classical('A', bob_bases, tag=(session, 'bases'), no_ack=True)
+    alice_bases = await host.get_classical('A', (session, 'bases'))
+    return [measurements[i] for i in classical_basis_comparison(alice_bases, bob_bases)]
+
+# Eve's side: take Alice's qubits off the quantum channel, intercept-resend them with the given
+# probability and pass them on to Bob under her own qubit ids; returns how many she measured
+async def eve_role(host, session, n_bits, rng=None, probability=1.0):
+    q_ids = await host.get_classical('A', (session, 'qubits'))
+    qubits = [await host.get_qubit('A', q_id) for q_id in q_ids]
+    _, _, intercepted, forwarded = intercept_resend(host.host, qubits, rng, probability)
+    forwarded_ids = [await host.send_qubit('B', q, no_ack=True) for q in forwarded]
+    await host.send_classical('B', forwarded_ids, tag=(session, 'qubits'), no_ack=True)
+    return intercepted.popcount()
+
+def bb84_sessions(sessions=100, n_bits=20, seed=None, delay=None, eve_probability=None, backend=None):
+    """Run many BB84 sessions between A and B at once, all roles as coroutines on one event loop.
+
+    The sessions share the hosts and tell their messages apart by tag. delay
+    overrides the network's per-packet delay (qunetsim's default is 0.1 s). With
+    eve_probability set, host E sits on the quantum channel and runs eve_role in
+    every session, while the bases still go directly between A and B. backend
+    (e.g. a stabilizer.StabilizerBackend) replaces qunetsim's default simulator.
+    Returns the (Alice, Bob) key pair of every session.
+    """
+    host_ids = ('A', 'B') if eve_probability is None else ('A', 'E', 'B')
+    with NetworkContext(host_ids, backend=backend) as context:
+        if delay is not None:
+            context.network.delay = delay
+        alice = AsyncHost(context['A'])
+        bob = AsyncHost(context['B'])
+        eve = AsyncHost(context['E']) if eve_probability is not None else None
+        roles = []
+        for session, session_seed in enumerate(spawn_seeds(seed, sessions)):
+            streams = protocol_streams(session_seed)
+            bits = streams['alice'].bits(n_bits).tolist()
+            bases = streams['alice'].bits(n_bits).tolist()
+            if eve is None:
+                roles += [alice_role(alice, session, bits, bases), bob_role(bob, session, n_bits, streams['bob'])]
+            else:
+                roles += [alice_role(alice, session, bits, bases, 'E'),
+                          bob_role(bob, session, n_bits, streams['bob'], 'E'),
+                          eve_role(eve, session, n_bits, streams['eve'], eve_probability)]
+        results = run_roles(*roles)
+
+    step = 2 if eve is None else 3
+    pairs = list(zip(results[::step], results[1::step]))
+    errors = sum(a != b for alice_key, bob_key in pairs for a, b in zip(alice_key, bob_key))
+    sifted = sum(len(alice_key) for alice_key, _ in pairs)
+    print(f"{sum(a == b for a, b in pairs)}/{sessions} sessions agree on their keys, QBER {errors / max(sifted, 1):.4f}")
+    return pairs
+
+# BB84 between A and B over a direct in-process link, or link='network' for the full qunetsim stack;
+# BB84 only uses Clifford gates, so backend can be a stabilizer.StabilizerBackend
+def bb84_protocol(seed=None, link='direct', backend=None):
     n_bits = 20  # Number of bits Alice sends to Bob
-    network = Network.get_instance()
-    network.start()
-
-    # Create Alice and Bob
-    host_A = Host('A')
-    host_B = Host('B')
-
-    # Add the connection between Alice and Bob
-    host_A.add_connection('B')
-    host_B.add_connection('A')
-    network.add_host(host_A)
-    network.add_host(host_B)
-
-    host_A.start()
-    host_B.start()
-
-    time.sleep(1)  # Allow network to stabilize
+    streams = protocol_streams(seed)
+    context = NetworkContext(('A', 'B'), link=link, backend=backend).start()  # Ready as soon as it returns
+    host_A = context['A']
+    host_B = context['B']
 
     # Alice's random bits and bases
-    alice_bits = [random.randint(0, 1) for _ in range(n_bits)]
-    alice_bases = [random.randint(0, 1) for _ in range(n_bits)]
+    alice_bits = streams['alice'].bits(n_bits).tolist()
+    alice_bases = streams['alice'].bits(n_bits).tolist()
 
     # Start Alice's protocol
-    alice_protocol(host_A, alice_bits, alice_bases)
+    q_ids = alice_protocol(host_A, alice_bits, alice_bases)
 
     # Bob receives the qubits and measures them
-    bob_bases, bob_measurements = bob_protocol(host_B, n_bits)
+    bob_bases, bob_measurements = bob_protocol(host_B, n_bits, streams['bob'], q_ids)
 
     # Compare the bases
     matching_indices = classical_basis_comparison(alice_bases, bob_bases)
@@ -86,10 +152,9 @@ def bb84_protocol():
     print(f"Alice's key:        {alice_key}")
     print(f"Bob's key:          {bob_key}")
 
-    # Stop the network
-    time.sleep(2)
-    network.stop(True)
+    # Stop the network once everything sent has been acknowledged
+    context.stop()
 
-# Main program execution
+# Main program execution: python bb84.py [--stabilizer]
 if __name__ == '__main__':
-    bb84_protocol()
+    bb84_protocol(backend=StabilizerBackend() if '--stabilizer' in sys.argv[1:] else None)
@@ -1,15 +1,15 @@
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
-
-# Helper function to create a random bit (0 or 1)
-def random_bit():
-    return random.randint(0, 1)
+from bitvector import BitVector
+from random_streams import as_stream, protocol_streams
+import sifting
+from monte_carlo import print_statistics, simulate_batch
 
 # Function to prepare qubits for Alice based on random bits and bases
-def prepare_qubits(alice, length):
-    alice_bits = [random_bit() for _ in range(length)]  # Alice's random bits
-    alice_bases = [random_bit() for _ in range(length)]  # Alice's random bases (0 = rectilinear, 1 = diagonal)
+def prepare_qubits(alice, length, rng=None):
+    rng = as_stream(rng)
+    alice_bits = BitVector.random(length, rng)  # Alice's random bits
+    alice_bases = BitVector.random(length, rng)  # Alice's random bases (0 = rectilinear, 1 = diagonal)
     qubits = []
     
     for i in range(length):
@@ -23,8 +23,8 @@ def prepare_qubits(alice, length):
     return alice_bits, alice_bases, qubits
 
 # Function for Bob to receive and measure qubits
-def measure_qubits(bob, qubits, length):
-    bob_bases = [random_bit() for _ in range(length)]  # Bob's random bases
+def measure_qubits(bob, qubits, length, rng=None):
+    bob_bases = BitVector.random(length, rng)  # Bob's random bases
     bob_results = []
     
     for i in range(length):
@@ -33,24 +33,22 @@ def measure_qubits(bob, qubits, length):
             q.H()  # Apply Hadamard gate if Bob uses diagonal basis
         bob_results.append(q.measure())
     
-    return bob_bases, bob_results
+    return bob_bases, BitVector.from_bits(bob_results)
 
 # Function to sift the key by matching bases
 def sift_key(alice_bases, bob_bases, alice_bits, bob_bits):
-    sifted_key_alice = []
-    sifted_key_bob = []
-    matching_indices = []
-    
-    for i in range(len(alice_bases)):
-        if alice_bases[i] == bob_bases[i]:  # Bases match
-            sifted_key_alice.append(alice_bits[i])
-            sifted_key_bob.append(bob_bits[i])
-            matching_indices.append(i)
-    
-    return matching_indices, sifted_key_alice, sifted_key_bob
+    matching, sifted_key_alice, sifted_key_bob = sifting.sift(alice_bases, bob_bases, alice_bits, bob_bits)
+    return matching.indices().tolist(), sifted_key_alice, sifted_key_bob
 
 # BB84 Protocol implementation with detailed matching analysis
-def bb84_protocol(length=20, test_cases=5):
+# (batched=True draws all test cases as one array and only prints the statistics)
+def bb84_protocol(length=20, test_cases=5, seed=None, batched=False):
+    if batched:
+        stats = simulate_batch('bb84', test_cases, length, seed)
+        print_statistics(stats)
+        return stats
+
+    streams = protocol_streams(seed)
     network = Network.get_instance()
     network.start()
 
@@ -65,7 +63,7 @@ def bb84_protocol(length=20, test_cases=5):
         print(f"\nTest Case {test + 1}:")
         
         # Alice prepares qubits
-        alice_bits, alice_bases, qubits = prepare_qubits(alice, length)
+        alice_bits, alice_bases, qubits = prepare_qubits(alice, length, streams['alice'])
         print(f"Alice's original bits: {alice_bits}")
         print(f"Alice's bases: {alice_bases} (0 = Rectilinear, 1 = Diagonal)")
 
@@ -74,7 +72,7 @@ def bb84_protocol(length=20, test_cases=5):
             alice.send_qubit('Bob', q)
 
         # Bob receives and measures qubits
-        bob_bases, bob_bits = measure_qubits(bob, qubits, length)
+        bob_bases, bob_bits = measure_qubits(bob, qubits, length, streams['bob'])
         print(f"Bob's bases: {bob_bases} (0 = Rectilinear, 1 = Diagonal)")
         print(f"Bob's measured bits: {bob_bits}")
 
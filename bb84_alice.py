@@ -1,16 +1,17 @@
 import socket
-import random
+from random_streams import protocol_streams
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
 
-def bb84_alice(length=20):
+def bb84_alice(length=20, seed=None):
+    stream = protocol_streams(seed)['alice']
     network = Network.get_instance()
     network.start()
     alice = Host('Alice')
     network.add_host(alice)
 
-    alice_bits = [random.randint(0, 1) for _ in range(length)]
-    alice_bases = [random.randint(0, 1) for _ in range(length)]
+    alice_bits = stream.bits(length).tolist()
+    alice_bases = stream.bits(length).tolist()
     qubits = []
 
     for i in range(length):
@@ -33,7 +34,7 @@ def bb84_alice(length=20):
     common_indices = [i for i in range(length) if alice_bases[i] == bob_bases[i]]
     
     revealed_count = len(sifted_bits) // 4
-    revealed_indices = random.sample(common_indices, revealed_count)
+    revealed_indices = stream.rng.choice(common_indices, revealed_count, replace=False).tolist()
     revealed_bits = [sifted_bits[i] for i in revealed_indices]
 
     sock.sendall(','.join(map(str, revealed_indices)).encode('utf-8'))
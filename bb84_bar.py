@@ -1,10 +1,10 @@
-import random
 import numpy as np
-import matplotlib.pyplot as plt
 import psutil
-import time
 from qunetsim.components import Network, Host
 from qunetsim.objects import Qubit
+from network_context import wait_drained, wait_ready
+from results_sink import save_results
+from random_streams import protocol_streams
 
 def measure_resource_usage():
     return {
@@ -14,19 +14,20 @@ def measure_resource_usage():
         'network': psutil.net_io_counters().bytes_sent + psutil.net_io_counters().bytes_recv
     }
 
-def bb84(sender, receiver, num_bits):
+def bb84(sender, receiver, num_bits, rng=None):
+    streams = protocol_streams(rng)
     key = []
     for _ in range(num_bits):
         qubit = Qubit(sender)
-        basis = random.choice(['Z', 'X'])
-        bit = random.choice([0, 1])
+        basis = streams['alice'].choice(['Z', 'X'])
+        bit = streams['alice'].bit()
         if bit == 1:
             qubit.X()
         if basis == 'X':
             qubit.H()
         sender.send_qubit(receiver.host_id, qubit, await_ack=True)
         recv_qubit = receiver.get_qubit(sender.host_id, wait=10)
-        recv_basis = random.choice(['Z', 'X'])
+        recv_basis = streams['bob'].choice(['Z', 'X'])
         if recv_basis == 'X':
             recv_qubit.H()
         measured_bit = recv_qubit.measure()
@@ -34,7 +35,7 @@ def bb84(sender, receiver, num_bits):
             key.append(measured_bit)
     return key
 
-def simulate_bb84():
+def simulate_bb84(results_path=None, show_plot=True, seed=None):
     network = Network.get_instance()
     network.start()
     sender = Host('A')
@@ -49,11 +50,11 @@ def simulate_bb84():
     resource_usage = { 'CPU': 0, 'Memory': 0, 'Disk': 0, 'Network': 0 }
     
     usage_before = measure_resource_usage()
-    time.sleep(1)
+    wait_ready(network, [sender, receiver])
     
-    bb84(sender, receiver, num_bits)
+    bb84(sender, receiver, num_bits, seed)
     
-    time.sleep(1)
+    wait_drained([sender, receiver])
     usage_after = measure_resource_usage()
     
     resource_usage['CPU'] = abs(usage_after['cpu'] - usage_before['cpu'])
@@ -66,12 +67,18 @@ def simulate_bb84():
     categories = list(resource_usage.keys())
     values = list(resource_usage.values())
     
-    plt.figure(figsize=(8, 5))
-    plt.bar(categories, values, color=['blue', 'orange', 'green', 'red'])
-    plt.xlabel('Resource Type')
-    plt.ylabel('Usage (%) or MB')
-    plt.title('Resource Usage for BB84 Protocol')
-    plt.show()
+    if results_path is not None:
+        save_results(results_path, categories=categories, values=values)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(8, 5))
+        plt.bar(categories, values, color=['blue', 'orange', 'green', 'red'])
+        plt.xlabel('Resource Type')
+        plt.ylabel('Usage (%) or MB')
+        plt.title('Resource Usage for BB84 Protocol')
+        plt.show()
     
 if __name__ == '__main__':
     simulate_bb84()
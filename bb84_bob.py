@@ -1,16 +1,17 @@
 import socket
-import random
+from random_streams import protocol_streams
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
 
-def bb84_bob(length=20):
+def bb84_bob(length=20, seed=None):
+    stream = protocol_streams(seed)['bob']
     network = Network.get_instance()
     network.start()
     bob = Host('Bob')
     network.add_host(bob)
 
     qubits = [bob.get_qubit('Alice') for _ in range(length)]  
-    bob_bases = [random.randint(0, 1) for _ in range(length)]
+    bob_bases = stream.bits(length).tolist()
     bob_bits = []
 
     for i in range(length):
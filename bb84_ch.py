@@ -1,15 +1,16 @@
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
-
-# Helper function to create a random bit (0 or 1)
-def random_bit():
-    return random.randint(0, 1)
+from bitvector import BitVector
+from random_streams import as_stream, protocol_streams
+import sifting
+from privacy_amplification import privacy_amplification
+from parameter_estimation import QBEREstimator, best_sample_size
 
 # Function to prepare qubits for Alice based on random bits and bases
-def prepare_qubits(alice, length):
-    alice_bits = [random_bit() for _ in range(length)]  # Alice's random bits
-    alice_bases = [random_bit() for _ in range(length)]  # Alice's random bases (0 = rectilinear, 1 = diagonal)
+def prepare_qubits(alice, length, rng=None):
+    rng = as_stream(rng)
+    alice_bits = BitVector.random(length, rng)  # Alice's random bits
+    alice_bases = BitVector.random(length, rng)  # Alice's random bases (0 = rectilinear, 1 = diagonal)
     qubits = []
     
     for i in range(length):
@@ -34,8 +35,8 @@ def prepare_qubits(alice, length):
     return alice_bits, alice_bases, qubits
 
 # Function for Bob to receive and measure qubits
-def measure_qubits(bob, qubits, length):
-    bob_bases = [random_bit() for _ in range(length)]  # Bob's random bases
+def measure_qubits(bob, qubits, length, rng=None):
+    bob_bases = BitVector.random(length, rng)  # Bob's random bases
     bob_results = []
     
     for i in range(length):
@@ -47,33 +48,24 @@ def measure_qubits(bob, qubits, length):
             
         bob_results.append(q.measure())
     
-    return bob_bases, bob_results
+    return bob_bases, BitVector.from_bits(bob_results)
 
 # Function to sift the key by matching bases
 def sift_key(alice_bases, bob_bases, alice_bits, bob_bits):
-    sifted_key_alice = []
-    sifted_key_bob = []
-    matching_indices = []
-    
-    for i in range(len(alice_bases)):
-        if alice_bases[i] == bob_bases[i]:  # Bases match
-            sifted_key_alice.append(alice_bits[i])
-            sifted_key_bob.append(bob_bits[i])
-            matching_indices.append(i)
-    
-    return matching_indices, sifted_key_alice, sifted_key_bob
+    matching, sifted_key_alice, sifted_key_bob = sifting.sift(alice_bases, bob_bases, alice_bits, bob_bits)
+    return matching.indices().tolist(), sifted_key_alice, sifted_key_bob
 
 # Function to publicly reveal some bits and bases for verification
-def reveal_bases_and_bits(matching_indices, sifted_key_alice, sifted_key_bob, reveal_count):
-    revealed_indices = random.sample(range(len(sifted_key_alice)), reveal_count)
-    revealed_bases = [matching_indices[i] for i in revealed_indices]
-    revealed_bits_alice = [sifted_key_alice[i] for i in revealed_indices]
-    revealed_bits_bob = [sifted_key_bob[i] for i in revealed_indices]
+def reveal_bases_and_bits(matching_indices, sifted_key_alice, sifted_key_bob, reveal_count, rng=None):
+    revealed = sifting.sample_mask(len(sifted_key_alice), reveal_count, rng)  # 1 at revealed sifted positions
+    revealed_bases = [matching_indices[i] for i in revealed.indices()]
+    revealed_bits_alice, revealed_bits_bob = sifting.reveal(sifted_key_alice, sifted_key_bob, revealed)
     
-    return revealed_bases, revealed_bits_alice, revealed_bits_bob
+    return revealed_bases, revealed_bits_alice, revealed_bits_bob, revealed
 
 # BB84 Protocol implementation using QunetSim
-def bb84_protocol(length=20):
+def bb84_protocol(length=20, expected_qber=0.02, seed=None):
+    streams = protocol_streams(seed)
     # Initialize network and hosts
     network = Network.get_instance()
     network.start()
@@ -83,7 +75,7 @@ def bb84_protocol(length=20):
     network.add_host(bob)
 
     # Alice prepares qubits
-    alice_bits, alice_bases, qubits = prepare_qubits(alice, length)
+    alice_bits, alice_bases, qubits = prepare_qubits(alice, length, streams['alice'])
     print(f"Alice's bits: {alice_bits}")
     print(f"Alice's bases: {alice_bases} (0 = R, 1 = D)")
 
@@ -92,7 +84,7 @@ def bb84_protocol(length=20):
         alice.send_qubit('Bob', q)
 
     # Bob receives and measures qubits
-    bob_bases, bob_bits = measure_qubits(bob, qubits, length)
+    bob_bases, bob_bits = measure_qubits(bob, qubits, length, streams['bob'])
     print(f"Bob's bases: {bob_bases} (0 = R, 1 = D)")
     print(f"Bob's measured bits: {bob_bits}")
 
@@ -101,25 +93,34 @@ def bb84_protocol(length=20):
     print(f"Sifted key (Alice): {sifted_key_alice}")
     print(f"Sifted key (Bob): {sifted_key_bob}")
 
-    # Publicly reveal some bits and bases for verification (25% of the sifted key)
-    revealed_count = len(sifted_key_alice) // 4  # Reveal 25% of the sifted key
-    revealed_bases, revealed_bits_alice, revealed_bits_bob = reveal_bases_and_bits(matching_indices, sifted_key_alice, sifted_key_bob, revealed_count)
+    # Publicly reveal the sample size that maximizes the finite-key length at the expected QBER
+    # (25% of the sifted key when it is too short to yield a secret key at all)
+    revealed_count, _ = best_sample_size(len(sifted_key_alice), expected_qber)
+    if revealed_count == 0:
+        revealed_count = len(sifted_key_alice) // 4
+    revealed_bases, revealed_bits_alice, revealed_bits_bob, revealed = reveal_bases_and_bits(matching_indices, sifted_key_alice, sifted_key_bob, revealed_count, streams['alice'])
     print(f"\nPublicly revealed indices: {revealed_bases}")
     print(f"Revealed bits (Alice): {revealed_bits_alice}")
     print(f"Revealed bits (Bob): {revealed_bits_bob}")
 
-    # Verify revealed bits
-    if revealed_bits_alice == revealed_bits_bob:
-        print("No eavesdropping detected, revealed bits match.")
-    else:
-        print("Potential eavesdropping detected, revealed bits do not match!")
+    # Estimate the QBER with a confidence bound on the revealed sample
+    estimator = QBEREstimator().update(len(revealed_bits_alice), (revealed_bits_alice ^ revealed_bits_bob).popcount(),
+                                       len(sifted_key_alice) - len(revealed_bits_alice))
+    print(f"QBER: {estimator.qber:.4f} (upper bound {estimator.upper_bound():.4f})")
+    print(estimator.report())
 
     # Final secret key (remove revealed indices)
-    final_key_alice = [sifted_key_alice[i] for i in range(len(sifted_key_alice)) if i not in revealed_bases]
-    final_key_bob = [sifted_key_bob[i] for i in range(len(sifted_key_bob)) if i not in revealed_bases]
+    final_key_alice = sifting.final_key(sifted_key_alice, revealed)
+    final_key_bob = sifting.final_key(sifted_key_bob, revealed)
     print(f"\nFinal secret key (Alice): {final_key_alice}")
     print(f"Final secret key (Bob): {final_key_bob}")
 
+    # Privacy amplification to the finite-key length (no error-correction leakage here)
+    secret_key_alice, secret_key_bob, _ = privacy_amplification(final_key_alice, final_key_bob, estimator.qber, 0, streams['alice'],
+                                                                output_length=estimator.secret_length(0))
+    print(f"\nPrivacy-amplified key (Alice, {len(secret_key_alice)} bits): {secret_key_alice}")
+    print(f"Privacy-amplified key (Bob, {len(secret_key_bob)} bits): {secret_key_bob}")
+
     # Stop the network
     network.stop()
 
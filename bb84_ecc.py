@@ -1,16 +1,19 @@
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
-from copy import deepcopy
-
-# Helper function to create a random bit (0 or 1)
-def random_bit():
-    return random.randint(0, 1)
+from bitvector import BitVector
+from random_streams import as_stream, protocol_streams
+import sifting
+from cascade import cascade
+from ldpc import ldpc_reconcile
+from privacy_amplification import privacy_amplification
+from monte_carlo import print_statistics, simulate_batch
+from interception import intercept_resend
 
 # Function to prepare qubits for Alice based on random bits and bases
-def prepare_qubits(alice, length):
-    alice_bits = [random_bit() for _ in range(length)]  # Alice's random bits
-    alice_bases = [random_bit() for _ in range(length)]  # Alice's random bases (0 = rectilinear, 1 = diagonal)
+def prepare_qubits(alice, length, rng=None):
+    rng = as_stream(rng)
+    alice_bits = BitVector.random(length, rng)  # Alice's random bits
+    alice_bases = BitVector.random(length, rng)  # Alice's random bases (0 = rectilinear, 1 = diagonal)
     qubits = []
     
     for i in range(length):
@@ -23,23 +26,16 @@ def prepare_qubits(alice, length):
     
     return alice_bits, alice_bases, qubits
 
-# Function for Eve to intercept and measure qubits
-def eavesdrop(eve, qubits, length):
-    eve_bases = [random_bit() for _ in range(length)]  # Eve's random bases
-    eve_results = []
-    
-    for i in range(length):
-        q = qubits[i]
-        if eve_bases[i] == 1:
-            q.H()  # Apply Hadamard gate if Eve uses diagonal basis
-        eve_results.append(q.measure())
-    
-    return eve_bases, eve_results
+# Function for Eve to intercept, measure and resend qubits; returns her bases and results and the qubits Bob receives
+def eavesdrop(eve, qubits, length, rng=None):
+    eve_bases, eve_results, _, forwarded = intercept_resend(eve, qubits[:length], rng)
+    return eve_bases, eve_results, forwarded
 
 # Function for Bob to receive and measure qubits
-def measure_qubits(bob, qubits, length):
-    bob_bases = [random_bit() for _ in range(length)]  # Bob's random bases
+def measure_qubits(bob, qubits, length, rng=None):
+    bob_bases = BitVector.random(length, rng)  # Bob's random bases
     bob_results = []
+    measured = []  # 0 marks an invalid measurement, sift_key leaves those positions out
 
     for i in range(length):
         try:
@@ -47,48 +43,48 @@ def measure_qubits(bob, qubits, length):
             if bob_bases[i] == 1:
                 q.H()  # Apply Hadamard gate if Bob uses diagonal basis
             bob_results.append(q.measure())
+            measured.append(1)
         except Exception as e:
             print(f"Error measuring qubit {i}: {e}")
-            bob_results.append(None)  # Mark invalid measurement
+            bob_results.append(0)
+            measured.append(0)
 
-    return bob_bases, bob_results
+    return bob_bases, BitVector.from_bits(bob_results), BitVector.from_bits(measured)
 
 # Function to sift the key by matching bases
-def sift_key(alice_bases, bob_bases, alice_bits, bob_bits):
-    sifted_key_alice = []
-    sifted_key_bob = []
-    matching_indices = []
-    
-    for i in range(len(alice_bases)):
-        if alice_bases[i] == bob_bases[i]:  # Bases match
-            sifted_key_alice.append(alice_bits[i])
-            sifted_key_bob.append(bob_bits[i])
-            matching_indices.append(i)
-    
-    return matching_indices, sifted_key_alice, sifted_key_bob
-
-# Function for error correction using repetition coding
-def error_correction(sifted_key_alice, sifted_key_bob, repetition_factor):
-    corrected_key_alice = []
-    corrected_key_bob = []
-
-    for i in range(0, len(sifted_key_alice), repetition_factor):
-        block_a = sifted_key_alice[i:i + repetition_factor]
-        block_b = sifted_key_bob[i:i + repetition_factor]
-
-        # Take the majority bit in each block
-        majority_a = max(set(block_a), key=block_a.count) if block_a else None
-        majority_b = max(set(block_b), key=block_b.count) if block_b else None
-
-        if majority_a is not None:
-            corrected_key_alice.append(majority_a)
-        if majority_b is not None:
-            corrected_key_bob.append(majority_b)
-
-    return corrected_key_alice, corrected_key_bob
+def sift_key(alice_bases, bob_bases, alice_bits, bob_bits, measured=None):
+    matching, sifted_key_alice, sifted_key_bob = sifting.sift(alice_bases, bob_bases, alice_bits, bob_bits, measured)
+    return matching.indices().tolist(), sifted_key_alice, sifted_key_bob
+
+# Function to estimate the QBER on a revealed sample and remove the sample from both keys
+def estimate_qber(sifted_key_alice, sifted_key_bob, sample_fraction, rng=None):
+    revealed = sifting.sample_mask(len(sifted_key_alice), int(len(sifted_key_alice) * sample_fraction), rng)
+    revealed_bits_alice, revealed_bits_bob = sifting.reveal(sifted_key_alice, sifted_key_bob, revealed)
+    errors = (revealed_bits_alice ^ revealed_bits_bob).popcount()
+    qber = errors / len(revealed_bits_alice) if len(revealed_bits_alice) else 0
+    return qber, sifting.final_key(sifted_key_alice, revealed), sifting.final_key(sifted_key_bob, revealed)
+
+# Function for error correction: Bob corrects his key towards Alice's with interactive
+# Cascade or one-way LDPC syndrome decoding, returns both keys and the bits disclosed doing so
+def error_correction(sifted_key_alice, sifted_key_bob, qber, rng=None, method='cascade'):
+    if method == 'cascade':
+        corrected_key_bob, leaked = cascade(sifted_key_alice, sifted_key_bob, qber, rng=rng)
+        return sifted_key_alice, corrected_key_bob, leaked
+    if method == 'ldpc':
+        # Frames that fail to decode are dropped from both keys
+        corrected_key_alice, corrected_key_bob, leaked, _ = ldpc_reconcile(sifted_key_alice, sifted_key_bob, qber, seed=rng)
+        return corrected_key_alice, corrected_key_bob, leaked
+    raise ValueError(f"Unknown reconciliation method: {method}")
 
 # BB84 Protocol implementation
-def bb84_protocol(length=20, test_cases=5, repetition_factor=3):
+def bb84_protocol(length=20, test_cases=5, sample_fraction=0.25, reconciliation='cascade', seed=None, batched=False):
+    # Batched mode: sifting and QBER statistics of all test cases at once, Eve intercepting every qubit
+    if batched:
+        stats = simulate_batch('bb84', test_cases, length, seed, eve_probability=1.0, reveal_fraction=sample_fraction)
+        print_statistics(stats)
+        return stats
+
+    streams = protocol_streams(seed)
     network = Network.get_instance()
     network.start()
 
@@ -105,35 +101,45 @@ def bb84_protocol(length=20, test_cases=5, repetition_factor=3):
         print(f"\nTest Case {test + 1}:")
 
         # Alice prepares qubits
-        alice_bits, alice_bases, qubits = prepare_qubits(alice, length)
+        alice_bits, alice_bases, qubits = prepare_qubits(alice, length, streams['alice'])
         print(f"Alice's original bits: {alice_bits}")
         print(f"Alice's bases: {alice_bases} (0 = Rectilinear, 1 = Diagonal)")
 
-        # Eve intercepts the qubits
-        eve_qubits = [deepcopy(q) for q in qubits]  # Copy to preserve state
-        eve_bases, eve_results = eavesdrop(eve, eve_qubits, length)
+        # Eve intercepts the qubits and resends her own
+        eve_bases, eve_results, qubits = eavesdrop(eve, qubits, length, streams['eve'])
         print(f"Eve's bases: {eve_bases} (0 = Rectilinear, 1 = Diagonal)")
         print(f"Eve's results: {eve_results}")
 
         # Bob receives and measures qubits
-        bob_bases, bob_bits = measure_qubits(bob, qubits, length)
+        bob_bases, bob_bits, measured = measure_qubits(bob, qubits, length, streams['bob'])
         print(f"Bob's bases: {bob_bases} (0 = Rectilinear, 1 = Diagonal)")
         print(f"Bob's measured bits: {bob_bits}")
 
         # Sift the key
-        matching_indices, sifted_key_alice, sifted_key_bob = sift_key(alice_bases, bob_bases, alice_bits, bob_bits)
+        matching_indices, sifted_key_alice, sifted_key_bob = sift_key(alice_bases, bob_bases, alice_bits, bob_bits, measured)
         print(f"Sifted Key (Alice): {sifted_key_alice}")
         print(f"Sifted Key (Bob): {sifted_key_bob}")
 
+        # Parameter estimation on a revealed sample
+        qber, remaining_key_alice, remaining_key_bob = estimate_qber(sifted_key_alice, sifted_key_bob, sample_fraction, streams['alice'])
+        print(f"Estimated QBER: {qber:.4f}")
+
         # Error correction
-        corrected_key_alice, corrected_key_bob = error_correction(sifted_key_alice, sifted_key_bob, repetition_factor)
+        corrected_key_alice, corrected_key_bob, leaked = error_correction(remaining_key_alice, remaining_key_bob, qber, streams['alice'], reconciliation)
         print(f"Corrected Key (Alice): {corrected_key_alice}")
         print(f"Corrected Key (Bob): {corrected_key_bob}")
+        print(f"Keys agree: {corrected_key_alice == corrected_key_bob}, parity bits leaked: {leaked}")
+
+        # Privacy amplification removes what Eve can know from the QBER and the disclosed parities
+        secret_key_alice, secret_key_bob, _ = privacy_amplification(corrected_key_alice, corrected_key_bob, qber, leaked, streams['alice'])
+        print(f"Secret Key (Alice): {secret_key_alice}")
+        print(f"Secret Key (Bob): {secret_key_bob}")
 
-        # Calculate matching percentage
+        # Calculate matching percentage and the secret key rate per transmitted qubit
         matching_percentage = (len(corrected_key_alice) / length) * 100
         matching_percentages.append(matching_percentage)
-        print(f"Matching Percentage: {matching_percentage:.2f}%")
+        key_rate = len(secret_key_alice) / length
+        print(f"Matching Percentage: {matching_percentage:.2f}%, key rate: {key_rate:.3f} bits per qubit")
 
     # Average matching percentage
     average_matching_percentage = sum(matching_percentages) / len(matching_percentages)
@@ -143,4 +149,4 @@ def bb84_protocol(length=20, test_cases=5, repetition_factor=3):
 
 # Execute the BB84 protocol
 if __name__ == '__main__':
-    bb84_protocol(length=16, test_cases=5, repetition_factor=3)
+    bb84_protocol(length=16, test_cases=5, sample_fraction=0.25)
@@ -0,0 +1,114 @@
+from collections import namedtuple
+from bb84_2 import measure_qubits, prepare_qubits
+from bitvector import BitVector
+from network_context import NetworkContext
+from transport import DEFAULT_WAIT, get_qubits
+from random_streams import protocol_streams
+import sifting
+from parameter_estimation import QBEREstimator
+
+# Qubits prepared, sent and measured together; only one chunk of qubits is alive at a time
+DEFAULT_CHUNK_SIZE = 1024
+
+# One finished chunk: sifted keys with the revealed sample removed, plus the running error estimate
+KeyBlock = namedtuple('KeyBlock', ['offset', 'sent', 'key_alice', 'key_bob', 'revealed', 'errors',
+                                   'total_revealed', 'total_errors', 'qber', 'qber_upper'])
+
+
+# Function to prepare Alice's qubits chunk by chunk
+def prepare_chunks(alice, length, chunk_size, rng):
+    for offset in range(0, length, chunk_size):
+        size = min(chunk_size, length - offset)
+        alice_bits, alice_bases, qubits = prepare_qubits(alice, size, rng)
+        yield offset, alice_bits, alice_bases, qubits
+
+
+# Function to send every qubit of a chunk to Bob; only the qubit ids travel on down the pipeline
+def transmit_chunks(alice, receiver_id, chunks):
+    for offset, alice_bits, alice_bases, qubits in chunks:
+        q_ids = [alice.send_qubit(receiver_id, q, no_ack=True) for q in qubits]
+        yield offset, alice_bits, alice_bases, q_ids
+
+
+def measure_chunks(bob, sender_id, chunks, rng):
+    """Collect each chunk from Bob's storage and measure it; the measured qubits are dropped afterwards.
+
+    Qubits that do not arrive within DEFAULT_WAIT are treated as lost photons: Bob
+    announces which positions he detected and both sides drop the others from the
+    chunk's bits and bases before sifting.
+    """
+    for offset, alice_bits, alice_bases, q_ids in chunks:
+        qubits = get_qubits(bob, sender_id, len(q_ids), q_ids, wait=DEFAULT_WAIT)
+        arrived = [q for q in qubits if q is not None]
+        if len(arrived) < len(qubits):
+            detected = BitVector.from_bits([q is not None for q in qubits])
+            alice_bits, alice_bases = alice_bits.select(detected), alice_bases.select(detected)
+        bob_bases, bob_bits = measure_qubits(bob, arrived, len(arrived), rng)
+        yield offset, len(q_ids), alice_bits, alice_bases, bob_bases, bob_bits
+
+
+# Function to sift each chunk as soon as it has been measured
+def sift_chunks(chunks):
+    for offset, sent, alice_bits, alice_bases, bob_bases, bob_bits in chunks:
+        _, sifted_key_alice, sifted_key_bob = sifting.sift(alice_bases, bob_bases, alice_bits, bob_bits)
+        yield offset, sent, sifted_key_alice, sifted_key_bob
+
+
+def estimate_chunks(chunks, sample_fraction, rng):
+    """Reveal sample_fraction of every sifted chunk and keep a running QBER.
+
+    The revealed bits are removed from the keys, so every KeyBlock can go straight
+    to error correction and privacy amplification. qber_upper is the Clopper-Pearson
+    bound over all blocks so far.
+    """
+    estimator = QBEREstimator()
+    for offset, sent, sifted_key_alice, sifted_key_bob in chunks:
+        revealed = sifting.sample_mask(len(sifted_key_alice), int(len(sifted_key_alice) * sample_fraction), rng)
+        revealed_bits_alice, revealed_bits_bob = sifting.reveal(sifted_key_alice, sifted_key_bob, revealed)
+        errors = (revealed_bits_alice ^ revealed_bits_bob).popcount()
+        key_alice = sifting.final_key(sifted_key_alice, revealed)
+        estimator.update(len(revealed_bits_alice), errors, len(key_alice))
+        yield KeyBlock(offset, sent, key_alice, sifting.final_key(sifted_key_bob, revealed),
+                       len(revealed_bits_alice), errors, estimator.samples, estimator.errors,
+                       estimator.qber, estimator.upper_bound())
+
+
+def bb84_stream(alice, bob, length, chunk_size=DEFAULT_CHUNK_SIZE, sample_fraction=0.25, seed=None):
+    """BB84 as a generator pipeline: prepare -> transmit -> measure -> sift -> estimate.
+
+    alice and bob are connected, started hosts (e.g. from a NetworkContext). Bob takes
+    every chunk out of his storage before Alice prepares the next, so only one chunk
+    of qubits is alive at a time. Yields one KeyBlock per chunk as soon as it is done,
+    so memory does not grow with `length` and post-processing can run while qubits are
+    still sent.
+    """
+    streams = protocol_streams(seed)
+    chunks = prepare_chunks(alice, length, chunk_size, streams['alice'])
+    chunks = transmit_chunks(alice, bob.host_id, chunks)
+    chunks = measure_chunks(bob, alice.host_id, chunks, streams['bob'])
+    return estimate_chunks(sift_chunks(chunks), sample_fraction, streams['alice'])
+
+
+# BB84 session over the streaming pipeline, reporting each block as it completes;
+# backend (e.g. a stabilizer.StabilizerBackend) replaces qunetsim's default simulator
+def bb84_protocol(length=10000, chunk_size=DEFAULT_CHUNK_SIZE, sample_fraction=0.25, seed=None, link='direct',
+                  backend=None):
+    context = NetworkContext(('Alice', 'Bob'), link=link, backend=backend).start()
+    alice = context['Alice']
+    bob = context['Bob']
+
+    key_length = 0
+    qber = 0
+    for block in bb84_stream(alice, bob, length, chunk_size, sample_fraction, seed):
+        key_length += len(block.key_alice)
+        qber = block.qber
+        print(f"Qubits {block.offset}-{block.offset + block.sent - 1}: {len(block.key_alice)} key bits, "
+              f"{block.errors}/{block.revealed} revealed errors, running QBER {block.qber:.4f} (<= {block.qber_upper:.4f})")
+
+    context.stop()
+    print(f"\nFinal key length: {key_length} bits from {length} qubits, QBER {qber:.4f}")
+    return key_length, qber
+
+
+if __name__ == '__main__':
+    bb84_protocol()
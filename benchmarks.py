@@ -0,0 +1,199 @@
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+from qunetsim.components import Host, Network
+from qunetsim.objects import Qubit
+import comparison
+import topology
+from gate_engine import EVE_EXPERIMENTS, run_gate_grid
+from gate_fusion import apply_sequence
+from random_streams import protocol_streams, spawn_seeds
+
+DEFAULT_SEED = 2024
+GRID_GATES = ['X', 'Y', 'Z', 'H', 'S', 'T', 'RX', 'RY', 'RZ']
+GRID_NOISE_PROBABILITIES = [0.01, 0.05, 0.1, 0.2, 0.3, 0.5]
+
+# Mesh sizes of the default relay benchmark; the 1,000-node run (topology.RELAY_SIZES) is opt-in
+BENCH_RELAY_SIZES = (2, 10, 100)
+
+
+# Function to time fn() `repeats` times; returns the list of wall-clock seconds and the last result
+def _timed(fn, repeats):
+    seconds = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - start)
+    return seconds, result
+
+
+def _summary(seconds, count, unit):
+    median = statistics.median(seconds)
+    return {'count': count, 'repeats': len(seconds), 'median_seconds': median,
+            'best_seconds': min(seconds), unit: count / median if median else float('inf')}
+
+
+# Function to start the network with two connected hosts A and B
+def _start_hosts(backend=None):
+    network = Network.get_instance()
+    network.start(backend=backend)
+    sender = Host('A', backend=backend)
+    receiver = Host('B', backend=backend)
+    sender.add_connection('B')
+    receiver.add_connection('A')
+    network.add_hosts([sender, receiver])
+    sender.start()
+    receiver.start()
+    return network, sender, receiver
+
+
+def bench_gate_grid(num_trials=10 ** 5, repeats=3, seed=DEFAULT_SEED):
+    """Qubits/sec of the batched gate x noise x Eve grid in gate_engine."""
+    cells = len(GRID_GATES) * len(GRID_NOISE_PROBABILITIES) * 2
+    seconds, _ = _timed(lambda: run_gate_grid(GRID_GATES, GRID_NOISE_PROBABILITIES, [0.0, 0.2],
+                                              num_trials, rng=seed), repeats)
+    return _summary(seconds, cells * num_trials, 'qubits_per_second')
+
+
+def bench_gate_qubits(num_qubits=100, repeats=3, seed=DEFAULT_SEED, backend=None):
+    """Qubits/sec of the per-qubit qunetsim loop of the *_eve.py experiments."""
+    network = Network.get_instance()
+    network.start(backend=backend)
+    host = Host('Local', backend=backend)
+    network.add_host(host)
+    host.start()
+
+    def run():
+        streams = protocol_streams(seed)
+        eve_stream, noise_stream = streams['eve'], streams['noise']
+        errors = 0
+        for experiment in EVE_EXPERIMENTS.values():
+            for _ in range(num_qubits):
+                q = Qubit(host)
+                apply_sequence(q, experiment['prepare'])
+                if eve_stream.random() < 0.2:
+                    q.measure()
+                    q = Qubit(host)
+                    apply_sequence(q, experiment['prepare'] + (eve_stream.choice(experiment['eve_errors']),))
+                if noise_stream.random() < 0.2:
+                    apply_sequence(q, (noise_stream.choice(experiment['noise_errors']),))
+                apply_sequence(q, experiment['undo'])
+                errors += q.measure()
+        return errors
+
+    try:
+        seconds, _ = _timed(run, repeats)
+    finally:
+        network.stop(True)
+    return _summary(seconds, len(EVE_EXPERIMENTS) * num_qubits, 'qubits_per_second')
+
+
+def bench_protocols(num_bits=100, repeats=3, seed=DEFAULT_SEED, backend=None):
+    """Sifted bits/sec of bb84, b92 and e91 from comparison.py between two hosts."""
+    network, sender, receiver = _start_hosts(backend)
+    results = {}
+    try:
+        for name, protocol in (('bb84', comparison.bb84), ('b92', comparison.b92), ('e91', comparison.e91)):
+            sifted = []
+            seeds = iter(spawn_seeds(seed, repeats))
+            seconds, _ = _timed(lambda: sifted.append(len(protocol(sender, receiver, num_bits, next(seeds)))),
+                                repeats)
+            result = _summary(seconds, int(statistics.median(sifted)), 'sifted_bits_per_second')
+            result['bits_sent'] = num_bits
+            results[name] = result
+    finally:
+        network.stop(True)
+    return results
+
+
+def bench_round_trip(num_qubits=100, backend=None):
+    """Latency of send_qubit(await_ack=True) from A to B, i.e. qubit delivery plus the ACK."""
+    network, sender, receiver = _start_hosts(backend)
+    latencies = []
+    try:
+        for _ in range(num_qubits):
+            q = Qubit(sender)
+            start = time.perf_counter()
+            sender.send_qubit('B', q, await_ack=True)
+            latencies.append(time.perf_counter() - start)
+            receiver.get_qubit('A', wait=10).measure()
+    finally:
+        network.stop(True)
+
+    latencies_ms = np.array(latencies) * 1000
+    return {'count': num_qubits, 'median_ms': float(np.median(latencies_ms)),
+            'mean_ms': float(latencies_ms.mean()), 'p95_ms': float(np.percentile(latencies_ms, 95)),
+            'max_ms': float(latencies_ms.max())}
+
+
+def bench_relay(sizes=BENCH_RELAY_SIZES, num_keys=100, seed=DEFAULT_SEED):
+    """Trusted-node key relay over a random metro mesh of each size: latency per key and relayed bits/sec."""
+    return {str(n): topology.measure_relay('random', n, num_keys, seed=seed) for n in sizes}
+
+
+# Function to record where the numbers came from, so JSON files from different versions can be compared
+def environment_info(seed):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'seed': seed,
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform()}
+
+
+def run_benchmarks(path=None, seed=DEFAULT_SEED, num_trials=10 ** 5, num_qubits=100, num_bits=100,
+                   repeats=3, backend=None, relay_sizes=BENCH_RELAY_SIZES):
+    """Run the whole suite with fixed seeds; writes the report to `path` as JSON when given.
+
+    relay_sizes=topology.RELAY_SIZES adds the 1,000-node relay (--relay-sweep on the command line).
+    """
+    report = {
+        'environment': environment_info(seed),
+        'gate_grid': bench_gate_grid(num_trials, repeats, seed),
+        'gate_qubits': bench_gate_qubits(num_qubits, repeats, seed, backend),
+        'protocols': bench_protocols(num_bits, repeats, seed, backend),
+        'round_trip': bench_round_trip(num_qubits, backend),
+        'relay': bench_relay(relay_sizes, seed=seed),
+    }
+    if path is not None:
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def compare_reports(baseline, current, tolerance=0.1):
+    """List the rates that dropped (or latencies that rose) by more than `tolerance` between two reports."""
+    regressions = []
+
+    def walk(old, new, name):
+        for key, value in old.items():
+            if key not in new or key == 'environment':
+                continue
+            if isinstance(value, dict):
+                walk(value, new[key], f'{name}{key}.')
+            elif key.endswith('_per_second') and new[key] < value * (1 - tolerance):
+                regressions.append((name + key, value, new[key]))
+            elif key.endswith('_ms') and new[key] > value * (1 + tolerance):
+                regressions.append((name + key, value, new[key]))
+
+    walk(baseline, current, '')
+    return regressions
+
+
+if __name__ == "__main__":
+    # python benchmarks.py [--relay-sweep] [results.json [baseline.json]]
+    args = [arg for arg in sys.argv[1:] if arg != '--relay-sweep']
+    relay_sizes = topology.RELAY_SIZES if '--relay-sweep' in sys.argv else BENCH_RELAY_SIZES
+    report = run_benchmarks(args[0] if args else None, relay_sizes=relay_sizes)
+    print(json.dumps(report, indent=2))
+    if len(args) > 1:
+        with open(args[1]) as f:
+            for metric, old, new in compare_reports(json.load(f), report):
+                print(f"Regression: {metric} {old:.4g} -> {new:.4g}")
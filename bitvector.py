@@ -0,0 +1,147 @@
+import numpy as np
+from random_streams import as_stream
+
+# Bits unpacked at a time by iteration and masked selection, keeps 10^9-bit vectors in bounded memory
+CHUNK_BITS = 1 << 23
+
+# Popcount of every byte value, used when np.bitwise_count is not available
+_BYTE_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(data):
+        return int(np.bitwise_count(data).sum(dtype=np.int64))
+else:
+    def _popcount(data):
+        return int(_BYTE_POPCOUNT[data].sum(dtype=np.int64))
+
+
+class BitVector(object):
+    """
+    Fixed-length bit string packed 8 bits per byte (numpy.packbits order).
+
+    Used for keys and bases in the BB84 scripts: a 10^9-bit vector takes 125 MB.
+    Indexing, iteration, == against lists and str() behave like the list of ints
+    it replaces; ^, &, |, ~, popcount() and select(mask) work on the packed bytes.
+    Padding bits past `length` in the last byte are always zero.
+    """
+
+    __slots__ = ('data', 'length')
+
+    def __init__(self, data, length):
+        self.data = np.asarray(data, dtype=np.uint8)
+        self.length = length
+        if self.data.size != (length + 7) // 8:
+            raise ValueError(f"{self.data.size} bytes cannot hold exactly {length} bits")
+
+    @classmethod
+    def from_bits(cls, bits):
+        bits = np.asarray(bits, dtype=np.uint8)
+        return cls(np.packbits(bits), bits.size)
+
+    @classmethod
+    def zeros(cls, length):
+        return cls(np.zeros((length + 7) // 8, dtype=np.uint8), length)
+
+    @classmethod
+    def random(cls, length, rng=None):
+        """Uniformly random bits; rng is anything random_streams.as_stream accepts."""
+        data = as_stream(rng).rng.integers(0, 256, (length + 7) // 8, dtype=np.uint8)
+        return cls(data, length)._clear_padding()
+
+    def _clear_padding(self):
+        if self.length % 8:
+            self.data[-1] &= np.uint8((0xFF << (8 - self.length % 8)) & 0xFF)
+        return self
+
+    # Function to unpack bits [start, stop) into a uint8 array of 0/1
+    def unpack(self, start=0, stop=None):
+        stop = self.length if stop is None else stop
+        first = start // 8
+        bits = np.unpackbits(self.data[first:(stop + 7) // 8])
+        return bits[start - first * 8:stop - first * 8]
+
+    def tolist(self):
+        return self.unpack().tolist()
+
+    def indices(self):
+        """Positions of the 1 bits as an int64 array."""
+        return np.concatenate([np.flatnonzero(self.unpack(start, min(start + CHUNK_BITS, self.length))) + start
+                               for start in range(0, self.length, CHUNK_BITS)] or [np.empty(0, dtype=np.int64)])
+
+    def popcount(self):
+        return _popcount(self.data)
+
+    def count(self, value):
+        ones = self.popcount()
+        return ones if value == 1 else self.length - ones if value == 0 else 0
+
+    def select(self, mask):
+        """Bits at the positions where mask is 1, packed into a new BitVector."""
+        if len(mask) != self.length:
+            raise ValueError(f"Mask length {len(mask)} does not match {self.length} bits")
+        packed = []
+        pending = np.empty(0, dtype=np.uint8)
+        total = 0
+        for start in range(0, self.length, CHUNK_BITS):
+            stop = min(start + CHUNK_BITS, self.length)
+            selected = self.unpack(start, stop)[mask.unpack(start, stop).astype(bool)]
+            total += selected.size
+            selected = np.concatenate([pending, selected])
+            full = selected.size - selected.size % 8
+            packed.append(np.packbits(selected[:full]))
+            pending = selected[full:]
+        packed.append(np.packbits(pending))
+        return BitVector(np.concatenate(packed), total)
+
+    def _binary(self, other, op):
+        if not isinstance(other, BitVector):
+            other = BitVector.from_bits(other)
+        if other.length != self.length:
+            raise ValueError(f"Bit vectors differ in length: {self.length} != {other.length}")
+        return BitVector(op(self.data, other.data), self.length)
+
+    def __xor__(self, other):
+        return self._binary(other, np.bitwise_xor)
+
+    def __and__(self, other):
+        return self._binary(other, np.bitwise_and)
+
+    def __or__(self, other):
+        return self._binary(other, np.bitwise_or)
+
+    def __invert__(self):
+        return BitVector(np.invert(self.data), self.length)._clear_padding()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step == 1:
+                return BitVector.from_bits(self.unpack(start, max(start, stop)))
+            return BitVector.from_bits(self.unpack()[start:stop:step])
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("BitVector index out of range")
+        return int(self.data[index >> 3] >> (7 - (index & 7))) & 1
+
+    def __iter__(self):
+        for start in range(0, self.length, CHUNK_BITS):
+            yield from self.unpack(start, min(start + CHUNK_BITS, self.length)).tolist()
+
+    def __eq__(self, other):
+        if isinstance(other, BitVector):
+            return self.length == other.length and np.array_equal(self.data, other.data)
+        if isinstance(other, (list, tuple)):
+            return len(other) == self.length and self.tolist() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __str__(self):
+        return str(self.tolist())
+
+    def __repr__(self):
+        return f"BitVector(length={self.length})"
@@ -0,0 +1,98 @@
+import math
+import numpy as np
+from bitvector import BitVector
+from random_streams import as_stream
+
+DEFAULT_PASSES = 4
+
+# Lowest QBER the block size is planned for: a sample with no errors does not mean an error-free key
+MIN_QBER = 0.02
+
+
+# Function for the binary entropy h(p), the minimum leakage per key bit for error correction
+def binary_entropy(p):
+    if p <= 0 or p >= 1:
+        return 0.0
+    return -p * math.log2(p) - (1 - p) * math.log2(1 - p)
+
+
+# Function to pick the first-pass block size (about 0.73 / QBER) from the estimated QBER,
+# floored at MIN_QBER and 1 / length so that an estimate of 0 does not give one block
+def initial_block_size(qber, length):
+    qber = max(qber, MIN_QBER, 1 / max(length, 1))
+    return int(min(max(4, math.ceil(0.73 / qber)), max(length, 1)))
+
+
+# Function to compute the parity of consecutive blocks of `size` bits of bits[order]
+def block_parities(bits, order, size):
+    return np.add.reduceat(bits[order], np.arange(0, len(order), size)) & 1
+
+
+def cascade(key_alice, key_bob, qber, passes=DEFAULT_PASSES, rng=None):
+    """Cascade reconciliation of Bob's key against Alice's.
+
+    Pass 1 uses blocks of about 0.73 / qber bits (see initial_block_size), and every
+    later pass doubles the block size over a fresh random permutation, up to half the
+    key so that every pass has at least two blocks. All passes always run. Block
+    parities of a pass are compared as one vectorized step. An odd block is located
+    by BINARY search, and each corrected bit re-opens the blocks that contain it in
+    earlier passes.
+    Returns (Bob's corrected key, number of parity bits disclosed on the public channel).
+    """
+    alice = np.asarray(key_alice.unpack() if isinstance(key_alice, BitVector) else key_alice, dtype=np.uint8)
+    bob = np.array(key_bob.unpack() if isinstance(key_bob, BitVector) else key_bob, dtype=np.uint8)
+    length = len(alice)
+    if length == 0:
+        return BitVector.from_bits(bob), 0
+
+    rng = as_stream(rng).rng
+    size = initial_block_size(qber, length)
+    orders = []
+    positions = []
+    sizes = []
+    mismatched = []
+    leaked = 0
+
+    # Function to find and flip the single error of an odd block with BINARY, revealing one parity per halving
+    def binary_search(pass_index, block):
+        nonlocal leaked
+        start = block * sizes[pass_index]
+        indices = orders[pass_index][start:start + sizes[pass_index]]
+        while len(indices) > 1:
+            half = indices[:len(indices) // 2]
+            leaked += 1
+            if (alice[half].sum() ^ bob[half].sum()) & 1:
+                indices = half
+            else:
+                indices = indices[len(indices) // 2:]
+        error = indices[0]
+        bob[error] ^= 1
+        for q in range(len(orders)):
+            mismatched[q][positions[q][error] // sizes[q]] ^= 1
+
+    for pass_index in range(passes):
+        order = np.arange(length) if pass_index == 0 else rng.permutation(length)
+        position = np.empty(length, dtype=np.int64)
+        position[order] = np.arange(length)
+        orders.append(order)
+        positions.append(position)
+        sizes.append(min(size << pass_index, max(1, (length + 1) // 2)))
+
+        alice_parities = block_parities(alice, order, sizes[-1])
+        leaked += len(alice_parities)
+        mismatched.append(alice_parities ^ block_parities(bob, order, sizes[-1]))
+
+        # Cascade step: correct odd blocks, smallest blocks (earliest pass) first
+        while True:
+            odd = next((q for q in range(len(orders)) if mismatched[q].any()), None)
+            if odd is None:
+                break
+            binary_search(odd, int(np.flatnonzero(mismatched[odd])[0]))
+
+    return BitVector.from_bits(bob), leaked
+
+
+# Function to compare disclosed parities with the Shannon limit n * h(QBER); 1.0 is optimal
+def reconciliation_efficiency(leaked, length, qber):
+    limit = length * binary_entropy(qber)
+    return leaked / limit if limit else float('inf')
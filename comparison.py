@@ -1,85 +1,126 @@
-import random
 import numpy as np
-import matplotlib.pyplot as plt
-from qunetsim.components import Network, Host
 from qunetsim.objects import Qubit
+from random_streams import protocol_streams, spawn_seeds
+from results_sink import save_results
+from transport import DEFAULT_WAIT, DEFAULT_WINDOW, transmit
+from async_hosts import AsyncHost, run_roles, transfer_qubits
+from network_context import NetworkContext
 
-def bb84(sender, receiver, num_bits):
-    key = []
-    for _ in range(num_bits):
+# Bases are drawn as bits: 0 = Z basis, 1 = X basis
+# Function to prepare the BB84 qubits; returns them with the receiver's step, which turns the received qubits into the key
+def bb84_session(sender, num_bits, rng=None):
+    streams = protocol_streams(rng)
+    bases = streams['alice'].bits(num_bits).tolist()
+    bits = streams['alice'].bits(num_bits).tolist()
+    recv_bases = streams['bob'].bits(num_bits).tolist()
+    qubits = []
+    for basis, bit in zip(bases, bits):
         qubit = Qubit(sender)
-        basis = random.choice(['Z', 'X'])
-        bit = random.choice([0, 1])
         if bit == 1:
             qubit.X()
-        if basis == 'X':
+        if basis == 1:
             qubit.H()
-        sender.send_qubit(receiver.host_id, qubit, await_ack=True)
-        
-        recv_qubit = receiver.get_qubit(sender.host_id, wait=10)
-        recv_basis = random.choice(['Z', 'X'])
-        if recv_basis == 'X':
-            recv_qubit.H()
-        
-        measured_bit = recv_qubit.measure()
-        if basis == recv_basis:
-            key.append(measured_bit)
-    return key
+        qubits.append(qubit)
 
-def b92(sender, receiver, num_bits):
-    key = []
-    for _ in range(num_bits):
+    def measure(received):
+        key = []
+        for recv_qubit, basis, recv_basis in zip(received, bases, recv_bases):
+            if recv_qubit is None:
+                continue
+            if recv_basis == 1:
+                recv_qubit.H()
+
+            measured_bit = recv_qubit.measure()
+            if basis == recv_basis:
+                key.append(measured_bit)
+        return key
+    return qubits, measure
+
+def b92_session(sender, num_bits, rng=None):
+    streams = protocol_streams(rng)
+    bits = streams['alice'].bits(num_bits).tolist()
+    recv_bases = streams['bob'].bits(num_bits).tolist()
+    qubits = []
+    for bit in bits:
         qubit = Qubit(sender)
-        bit = random.choice([0, 1])
         if bit == 1:
             qubit.X()
         qubit.H()
-        sender.send_qubit(receiver.host_id, qubit, await_ack=True)
-        
-        recv_qubit = receiver.get_qubit(sender.host_id, wait=10)
-        recv_basis = random.choice(['Z', 'X'])
-        if recv_basis == 'X':
-            recv_qubit.H()
-        measured_bit = recv_qubit.measure()
-        if measured_bit == 1:
-            key.append(bit)
-    return key
-
-def e91(sender, receiver, num_bits):
-    key = []
-    for _ in range(num_bits):
+        qubits.append(qubit)
+
+    def measure(received):
+        key = []
+        for recv_qubit, bit, recv_basis in zip(received, bits, recv_bases):
+            if recv_qubit is None:
+                continue
+            if recv_basis == 1:
+                recv_qubit.H()
+            measured_bit = recv_qubit.measure()
+            if measured_bit == 1:
+                key.append(bit)
+        return key
+    return qubits, measure
+
+def e91_session(sender, num_bits, rng=None):
+    bases = protocol_streams(rng)['bob'].bits(num_bits).tolist()
+    qubits = []
+    for _ in bases:
         qubit1 = Qubit(sender)
         qubit2 = Qubit(sender)
         qubit1.H()
         qubit2.cnot(qubit1)
-        sender.send_qubit(receiver.host_id, qubit2, await_ack=True)
-        recv_qubit = receiver.get_qubit(sender.host_id, wait=10)
-        basis = random.choice(['Z', 'X'])
-        if basis == 'X':
-            recv_qubit.H()
-        measured_bit = recv_qubit.measure()
-        key.append(measured_bit)
-    return key
-
-def simulate_qkd():
-    network = Network.get_instance()
-    network.start()
-    sender = Host('A')
-    receiver = Host('B')
-    sender.add_connection('B')
-    receiver.add_connection('A')
-    network.add_hosts([sender, receiver])
-    sender.start()
-    receiver.start()
+        qubits.append(qubit2)
+
+    def measure(received):
+        key = []
+        for recv_qubit, basis in zip(received, bases):
+            if recv_qubit is None:
+                continue
+            if basis == 1:
+                recv_qubit.H()
+            measured_bit = recv_qubit.measure()
+            key.append(measured_bit)
+        return key
+    return qubits, measure
+
+SESSIONS = {'BB84': bb84_session, 'B92': b92_session, 'E91': e91_session}
+
+# Blocking versions: the qubits go over transport.transmit with windowed ACKs
+def bb84(sender, receiver, num_bits, rng=None, window=DEFAULT_WINDOW, ack='cumulative'):
+    qubits, measure = bb84_session(sender, num_bits, rng)
+    return measure(transmit(sender, receiver, qubits, window, ack))
+
+def b92(sender, receiver, num_bits, rng=None, window=DEFAULT_WINDOW, ack='cumulative'):
+    qubits, measure = b92_session(sender, num_bits, rng)
+    return measure(transmit(sender, receiver, qubits, window, ack))
+
+def e91(sender, receiver, num_bits, rng=None, window=DEFAULT_WINDOW, ack='cumulative'):
+    qubits, measure = e91_session(sender, num_bits, rng)
+    return measure(transmit(sender, receiver, qubits, window, ack))
+
+# Coroutine version on AsyncHosts: receiving awaits each qubit instead of blocking a thread
+async def protocol_role(protocol, sender, receiver, num_bits, rng=None, wait=DEFAULT_WAIT):
+    qubits, measure = SESSIONS[protocol](sender.host, num_bits, rng)
+    return measure(await transfer_qubits(sender, receiver, qubits, tag=protocol, wait=wait))
+
+# link='direct' hands qubits straight to the peer, link='network' routes them through qunetsim
+def simulate_qkd(results_path=None, show_plot=True, seed=None, link='direct'):
+    context = NetworkContext(('A', 'B'), link=link).start()
+    sender = context['A']
+    receiver = context['B']
     
     num_bits_list = np.linspace(10, 500, 50)
     key_lengths = { 'BB84': [], 'B92': [], 'E91': [] }
     complexities = { 'BB84': [], 'B92': [], 'E91': [] }
     
-    for num_bits in num_bits_list:
-        bb84_key = bb84(sender, receiver, int(num_bits))
-        b92_key = b92(sender, receiver, int(num_bits))
-        e91_key = e91(sender, receiver, int(num_bits))
+    # Every point gets its own child seed, split again per protocol
+    for num_bits, point_seed in zip(num_bits_list, spawn_seeds(seed, len(num_bits_list))):
+        # The three protocols run concurrently as coroutines on the same pair of hosts
+        bb84_seed, b92_seed, e91_seed = point_seed.spawn(3)
+        alice, bob = AsyncHost(sender), AsyncHost(receiver)
+        bb84_key, b92_key, e91_key = run_roles(protocol_role('BB84', alice, bob, int(num_bits), bb84_seed),
+                                               protocol_role('B92', alice, bob, int(num_bits), b92_seed),
+                                               protocol_role('E91', alice, bob, int(num_bits), e91_seed))
         
         key_lengths['BB84'].append(len(bb84_key))
         key_lengths['B92'].append(len(b92_key))
@@ -89,29 +130,37 @@ def simulate_qkd():
         complexities['B92'].append(num_bits * 1.5)
         complexities['E91'].append(num_bits * 3)
     
-    network.stop(True)
-    
-    plt.figure(figsize=(12, 5))
-    plt.subplot(1, 2, 1)
-    plt.plot(num_bits_list, key_lengths['BB84'], label='BB84', linestyle='-', marker='')
-    plt.plot(num_bits_list, key_lengths['B92'], label='B92', linestyle='-', marker='')
-    plt.plot(num_bits_list, key_lengths['E91'], label='E91', linestyle='-', marker='')
-    plt.xlabel('Number of Bits Sent')
-    plt.ylabel('Key Length Generated')
-    plt.title('Key Length Comparison')
-    plt.legend()
+    context.stop()
     
-    plt.subplot(1, 2, 2)
-    plt.plot(num_bits_list, complexities['BB84'], label='BB84 Complexity', linestyle='-', marker='')
-    plt.plot(num_bits_list, complexities['B92'], label='B92 Complexity', linestyle='-', marker='')
-    plt.plot(num_bits_list, complexities['E91'], label='E91 Complexity', linestyle='-', marker='')
-    plt.xlabel('Number of Bits Sent')
-    plt.ylabel('Complexity (Approximate Operations)')
-    plt.title('Complexity Analysis of QKD Protocols')
-    plt.legend()
-    
-    plt.tight_layout()
-    plt.show()
+    if results_path is not None:
+        save_results(results_path, num_bits_list=num_bits_list,
+                     **{f'{protocol}_key_lengths': v for protocol, v in key_lengths.items()},
+                     **{f'{protocol}_complexities': v for protocol, v in complexities.items()})
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(12, 5))
+        plt.subplot(1, 2, 1)
+        plt.plot(num_bits_list, key_lengths['BB84'], label='BB84', linestyle='-', marker='')
+        plt.plot(num_bits_list, key_lengths['B92'], label='B92', linestyle='-', marker='')
+        plt.plot(num_bits_list, key_lengths['E91'], label='E91', linestyle='-', marker='')
+        plt.xlabel('Number of Bits Sent')
+        plt.ylabel('Key Length Generated')
+        plt.title('Key Length Comparison')
+        plt.legend()
+
+        plt.subplot(1, 2, 2)
+        plt.plot(num_bits_list, complexities['BB84'], label='BB84 Complexity', linestyle='-', marker='')
+        plt.plot(num_bits_list, complexities['B92'], label='B92 Complexity', linestyle='-', marker='')
+        plt.plot(num_bits_list, complexities['E91'], label='E91 Complexity', linestyle='-', marker='')
+        plt.xlabel('Number of Bits Sent')
+        plt.ylabel('Complexity (Approximate Operations)')
+        plt.title('Complexity Analysis of QKD Protocols')
+        plt.legend()
+
+        plt.tight_layout()
+        plt.show()
     
 if __name__ == '__main__':
     simulate_qkd()
\ No newline at end of file
@@ -1,6 +1,6 @@
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import time
+from network_context import wait_drained, wait_ready
 
 def quantum_gate_example():
     # Initialize a network and start it
@@ -23,8 +23,8 @@ def quantum_gate_example():
     host_A.start()
     host_B.start()
 
-    # Allow some time for the network to stabilize
-    time.sleep(1)
+    # Wait until the network and both hosts are processing packets
+    wait_ready(network, [host_A, host_B])
 
     # Create a qubit on host A
     qubit_A = Qubit(host_A)
@@ -47,8 +47,8 @@ def quantum_gate_example():
     measurement = qubit_B.measure()
     print(f"Measurement result at Host B: {measurement}")
 
-    # Stop the network
-    time.sleep(2)
+    # Stop the network once everything sent has been acknowledged
+    wait_drained([host_A, host_B])
     network.stop(True)
 
 # Main program execution
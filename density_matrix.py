@@ -0,0 +1,94 @@
+import numpy as np
+from gate_registry import GATES, get_gate
+from gate_engine import EVE_EXPERIMENTS, gate_experiment, sequence_unitary
+
+
+def pauli_mix_kraus(probability, gates):
+    """Kraus operators of "with `probability` apply one of `gates`, chosen uniformly"."""
+    ops = [np.sqrt(1 - probability) * GATES['I']]
+    ops += [np.sqrt(probability / len(gates)) * get_gate(g) for g in gates]
+    return ops
+
+
+# Function to push a density matrix through a channel given by its Kraus operators
+def apply_kraus(rho, kraus_ops):
+    return sum(k @ rho @ k.conj().T for k in kraus_ops)
+
+
+def exact_error_rate(experiment, eve_probability, noise_probability):
+    """Exact probability of measuring 1 at the end of an experiment.
+
+    Eve measures and re-prepares the prepared state, so her intercept acts on the
+    state exactly like one more error channel.
+    """
+    prepare = sequence_unitary(experiment['prepare'])
+    undo = sequence_unitary(experiment['undo'])
+
+    rho = np.array([[1, 0], [0, 0]], dtype=complex)
+    rho = prepare @ rho @ prepare.conj().T
+    rho = apply_kraus(rho, pauli_mix_kraus(eve_probability, experiment['eve_errors']))
+    rho = apply_kraus(rho, pauli_mix_kraus(noise_probability, experiment['noise_errors']))
+    rho = undo @ rho @ undo.conj().T
+    return float(rho[1, 1].real)
+
+
+def exact_error_experiment_with_eve(gate, eve_probability=0.2,
+                                    noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5],
+                                    noise_probability_fixed=0.2):
+    """Analytic counterpart of gate_engine.batched_error_experiment_with_eve.
+
+    Returns the expected error rate (%) for every noise probability and the expected
+    per-qubit error rate at the fixed noise probability of the first experiment.
+    """
+    experiment = EVE_EXPERIMENTS[gate]
+    return {
+        'noise_probabilities': np.asarray(noise_probabilities),
+        'avg_error_rates': np.array([exact_error_rate(experiment, eve_probability, p) * 100
+                                     for p in noise_probabilities]),
+        'quantum_error_rate': exact_error_rate(experiment, eve_probability, noise_probability_fixed),
+    }
+
+
+def exact_gate_grid(gates, noise_probabilities, eve_probabilities=(0.0,),
+                    eve_errors=('X', 'Z', 'Y'), noise_errors=('X', 'Z', 'Y')):
+    """Exact error rate (%) for the same cells and row order as gate_engine.run_gate_grid."""
+    rows = [(g, p, e, exact_error_rate(gate_experiment(g, eve_errors, noise_errors), e, p) * 100)
+            for g in gates for p in noise_probabilities for e in eve_probabilities]
+    gate, noise_p, eve_p, error_rate = zip(*rows) if rows else ((), (), (), ())
+    return {
+        'gate': np.array(gate),
+        'noise_probability': np.array(noise_p, dtype=float),
+        'eve_probability': np.array(eve_p, dtype=float),
+        'error_rate': np.array(error_rate, dtype=float),
+    }
+
+
+def monte_carlo_deviation(table, eve_errors=('X', 'Z', 'Y'), noise_errors=('X', 'Z', 'Y')):
+    """Compare a run_gate_grid table with the exact values, row by row.
+
+    Adds 'exact_error_rate', 'deviation' (Monte Carlo minus exact, in %) and
+    'z_score' (deviation in units of the binomial standard error) to a copy of
+    the table. Gates must be registered by name.
+    """
+    exact = np.array([exact_error_rate(gate_experiment(g, eve_errors, noise_errors), e, p)
+                      for g, p, e in zip(table['gate'], table['noise_probability'], table['eve_probability'])])
+    estimate = table['errors'] / table['trials']
+    standard_error = np.sqrt(exact * (1 - exact) / table['trials'])
+
+    result = dict(table)
+    result['exact_error_rate'] = exact * 100
+    result['deviation'] = (estimate - exact) * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['z_score'] = np.where(standard_error > 0, (estimate - exact) / standard_error, 0.0)
+    return result
+
+
+if __name__ == "__main__":
+    from gate_engine import run_gate_grid
+
+    table = monte_carlo_deviation(run_gate_grid(['X', 'H', 'S', 'T', 'RX'], [0.01, 0.1, 0.5], [0.0, 0.2],
+                                                num_trials=10 ** 5, rng=0))
+    for row in zip(table['gate'], table['noise_probability'], table['eve_probability'],
+                   table['error_rate'], table['exact_error_rate'], table['z_score']):
+        print(f"Gate: {row[0]:>2}, Noise: {row[1]:.2f}, Eve: {row[2]:.2f}, "
+              f"Monte Carlo: {row[3]:.3f}%, Exact: {row[4]:.3f}%, z: {row[5]:+.2f}")
@@ -0,0 +1,84 @@
+from qunetsim.backends import EQSNBackend
+from qunetsim.components import Host
+from qunetsim.objects import Message, Qubit
+
+
+class DirectHost(Host):
+    """
+    Host whose connections are direct in-process links to peer hosts.
+
+    send_qubit hands the Qubit object itself to the peer's quantum storage and
+    send_classical puts the message straight into the peer's classical storage,
+    so get_qubit / get_next_classical / get_classical behave as on a networked
+    Host. There is no routing, no packet queue and no thread: delivery is done by
+    the time send returns, and the sender's ACK record is updated at once so that
+    ACK-based callers (await_ack, transport.send_qubits) never wait.
+    Channel models of qunetsim connections are not applied. Use the full network
+    (NetworkContext with link='network') for multi-hop topologies.
+    The backend is shared and keeps worker processes alive until it is stopped, so
+    whoever created the hosts stops it once (stop_direct_hosts), as Network.stop does.
+    """
+
+    def __init__(self, host_id, backend=None):
+        super().__init__(host_id, backend)
+        self.peers = {}
+
+    def connect(self, peer):
+        self.peers[peer.host_id] = peer
+        peer.peers[self.host_id] = self
+
+    # Nothing to start: there is no packet queue to process
+    def start(self):
+        pass
+
+    def stop(self, release_qubits=True):
+        if release_qubits:
+            self._qubit_storage.release_storage()
+
+    def _deliver(self, receiver_id, no_ack):
+        if receiver_id not in self.peers:
+            raise ValueError(f"{self.host_id} has no direct link to {receiver_id}")
+        seq_num = -1 if no_ack else self.get_next_sequence_number(receiver_id)
+        if seq_num != -1:
+            self._process_ack(receiver_id, seq_num)
+        return self.peers[receiver_id], seq_num
+
+    def send_qubit(self, receiver_id, q, await_ack=False, no_ack=False):
+        peer, _ = self._deliver(receiver_id, no_ack)
+        q.send_to(receiver_id)
+        peer._qubit_storage.add_qubit_from_host(q, Qubit.DATA_QUBIT, self.host_id)
+        if await_ack and not no_ack:
+            return q.id, True
+        return q.id
+
+    def send_classical(self, receiver_id, message, await_ack=False, no_ack=False):
+        peer, seq_num = self._deliver(receiver_id, no_ack)
+        peer._classical_messages.add_msg_to_storage(Message(sender=self.host_id, content=message, seq_num=seq_num))
+        if await_ack and not no_ack:
+            return True
+
+
+# Function to create directly linked hosts on one shared backend: every pair is linked,
+# or only host_id -> neighbours[host_id] when given
+def direct_hosts(host_ids, backend=None, neighbours=None):
+    backend = backend if backend is not None else EQSNBackend()
+    hosts = {host_id: DirectHost(host_id, backend) for host_id in host_ids}
+    if neighbours is not None:
+        for host_id, peer_ids in neighbours.items():
+            for peer_id in peer_ids:
+                hosts[host_id].connect(hosts[peer_id])
+        return hosts
+    peers = list(hosts.values())
+    for i, host in enumerate(peers):
+        for peer in peers[i + 1:]:
+            host.connect(peer)
+    return hosts
+
+
+# Function to release the hosts' qubits and stop their shared backend, without which the process cannot exit
+def stop_direct_hosts(hosts):
+    backends = {id(host.backend): host.backend for host in hosts.values()}
+    for host in hosts.values():
+        host.stop(True)
+    for backend in backends.values():
+        backend.stop()
@@ -1,10 +1,10 @@
-import random
-from qunetsim.components import Host, Network
+import sys
 from qunetsim.objects import Qubit
-
-# Helper function to create a random bit (0 or 1)
-def random_bit():
-    return random.randint(0, 1)
+from random_streams import protocol_streams
+from parameter_estimation import QBEREstimator, best_sample_size
+import sifting
+from monte_carlo import print_statistics, simulate_batch
+from network_context import NetworkContext, acquire
 
 # Function to generate a Bell state |Φ+⟩ between Alice and Bob
 def bell_state(host_a, host_b):
@@ -26,21 +26,19 @@ def measure_in_basis(qubit, basis):
     return qubit.measure()
 
 # Function to perform E91 protocol
-def e91_protocol(message_length=16):
-    # Initialize network and hosts
-    network = Network.get_instance()
-    network.start()
-    alice = Host('Alice')
-    bob = Host('Bob')
-    network.add_host(alice)
-    network.add_host(bob)
+def e91_protocol(message_length=16, expected_qber=0.02, seed=None, context=None):
+    # Use the caller's warm network or bring one up for this run
+    context, owned = acquire(context, connect=False, start_hosts=False)
+    alice = context['Alice']
+    bob = context['Bob']
     
     # Step 1: Create Bell state |Φ+⟩ between Alice and Bob
     q_a, q_b = bell_state(alice, bob)
     
     # Step 2: Alice and Bob choose random bases (0 = rectilinear, 1 = diagonal)
-    alice_bases = [random_bit() for _ in range(message_length)]
-    bob_bases = [random_bit() for _ in range(message_length)]
+    streams = protocol_streams(seed)
+    alice_bases = streams['alice'].bits(message_length).tolist()
+    bob_bases = streams['bob'].bits(message_length).tolist()
     
     # Step 3: Alice and Bob measure their qubits in the chosen bases
     alice_results = []
@@ -65,10 +63,16 @@ def e91_protocol(message_length=16):
             sifted_key_alice.append(alice_results[i])
             sifted_key_bob.append(bob_results[i])
     
-    # Step 5: Eavesdropping Detection (Simple check)
-    eavesdropping_detected = False
-    if len(sifted_key_alice) < message_length // 2:
-        eavesdropping_detected = True
+    # Step 5: Eavesdropping Detection on a revealed sample of the sifted key, sized as in bb84_ch
+    # (25% of the sifted key when it is too short to yield a secret key at all)
+    revealed_count, _ = best_sample_size(len(sifted_key_alice), expected_qber)
+    if revealed_count == 0:
+        revealed_count = len(sifted_key_alice) // 4
+    revealed = sifting.sample_mask(len(sifted_key_alice), revealed_count, streams['alice'])
+    revealed_bits_alice, revealed_bits_bob = sifting.reveal(sifted_key_alice, sifted_key_bob, revealed)
+    errors = (revealed_bits_alice ^ revealed_bits_bob).popcount()
+    estimator = QBEREstimator().update(len(revealed_bits_alice), errors)
+    print(f"QBER: {estimator.qber:.4f} (upper bound {estimator.upper_bound():.4f})")
     
     # Output the results
     print(f"Alice's bases: {alice_bases}")
@@ -78,34 +82,41 @@ def e91_protocol(message_length=16):
     print(f"Sifted key (Alice): {sifted_key_alice}")
     print(f"Sifted key (Bob): {sifted_key_bob}")
     
-    if eavesdropping_detected:
-        print("Eavesdropping detected!")
-    else:
-        print("No eavesdropping detected.")
+    print(f"Revealed bits (Alice): {revealed_bits_alice}")
+    print(f"Revealed bits (Bob): {revealed_bits_bob}")
+    print(estimator.report())
     
-    # Final secret key (from the sifted key)
-    print(f"Final secret key (Alice): {sifted_key_alice}")
-    print(f"Final secret key (Bob): {sifted_key_bob}")
+    # Final secret key (the sifted key without the revealed bits)
+    final_key_alice = sifting.final_key(sifted_key_alice, revealed).tolist()
+    final_key_bob = sifting.final_key(sifted_key_bob, revealed).tolist()
+    print(f"Final secret key (Alice): {final_key_alice}")
+    print(f"Final secret key (Bob): {final_key_bob}")
     
-    # Stop the network
-    network.stop()
+    # Stop the network if this run started it
+    if owned:
+        context.stop()
 
     # Calculate the percentage of the final key relative to the original message length
-    final_key_length = len(sifted_key_alice)
+    final_key_length = len(final_key_alice)
     percentage = (final_key_length / message_length) * 100
     print(f"Percentage of key length to original bits length: {percentage}%")
     
-    return sifted_key_alice, sifted_key_bob, percentage
+    return final_key_alice, final_key_bob, percentage
 
-# Run the E91 Protocol for 5 test cases with 16 bits each and calculate average percentage
+# Run the E91 Protocol for 5 test cases with 16 bits each and calculate average percentage,
+# or `python e91.py N` for batched statistics over N test cases
 if __name__ == '__main__':
-    test_lengths = [16, 16, 16, 16, 16]
-    average_percentage = 0
-    for length in test_lengths:
-        print(f"\nRunning E91 protocol with message length: {length}")
-        _, _, percentage = e91_protocol(length)
-        average_percentage += percentage
+    if len(sys.argv) > 1:
+        print_statistics(simulate_batch('e91', int(sys.argv[1]), 16))
+    else:
+        test_lengths = [16, 16, 16, 16, 16]
+        average_percentage = 0
+        with NetworkContext(connect=False, start_hosts=False) as context:
+            for length in test_lengths:
+                print(f"\nRunning E91 protocol with message length: {length}")
+                _, _, percentage = e91_protocol(length, context=context)
+                average_percentage += percentage
 
-    # Calculate the average percentage across the test cases
-    average_percentage /= len(test_lengths)
-    print(f"\nAverage percentage of key length to original bits length: {average_percentage}%")
+        # Calculate the average percentage across the test cases
+        average_percentage /= len(test_lengths)
+        print(f"\nAverage percentage of key length to original bits length: {average_percentage}%")
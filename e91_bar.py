@@ -1,10 +1,10 @@
-import random
 import numpy as np
-import matplotlib.pyplot as plt
 import psutil
-import time
 from qunetsim.components import Network, Host
 from qunetsim.objects import Qubit
+from network_context import wait_drained, wait_ready
+from results_sink import save_results
+from random_streams import as_stream
 
 def measure_resource_usage():
     return {
@@ -14,7 +14,9 @@ def measure_resource_usage():
         'network': psutil.net_io_counters().bytes_sent + psutil.net_io_counters().bytes_recv
     }
 
-def e91(sender, receiver, num_bits):
+# rng is Bob's basis stream (anything random_streams.as_stream accepts)
+def e91(sender, receiver, num_bits, rng=None):
+    rng = as_stream(rng)
     key = []
     for _ in range(num_bits):
         qubit1 = Qubit(sender)
@@ -23,14 +25,14 @@ def e91(sender, receiver, num_bits):
         qubit2.cnot(qubit1)
         sender.send_qubit(receiver.host_id, qubit2, await_ack=True)
         recv_qubit = receiver.get_qubit(sender.host_id, wait=10)
-        basis = random.choice(['Z', 'X'])
+        basis = rng.choice(['Z', 'X'])
         if basis == 'X':
             recv_qubit.H()
         measured_bit = recv_qubit.measure()
         key.append(measured_bit)
     return key
 
-def simulate_e91():
+def simulate_e91(results_path=None, show_plot=True, seed=None):
     network = Network.get_instance()
     network.start()
     sender = Host('A')
@@ -45,11 +47,11 @@ def simulate_e91():
     resource_usage = { 'CPU': 0, 'Memory': 0, 'Disk': 0, 'Network': 0 }
     
     usage_before = measure_resource_usage()
-    time.sleep(1)
+    wait_ready(network, [sender, receiver])
     
-    e91(sender, receiver, num_bits)
+    e91(sender, receiver, num_bits, seed)
     
-    time.sleep(1)
+    wait_drained([sender, receiver])
     usage_after = measure_resource_usage()
     
     resource_usage['CPU'] = abs(usage_after['cpu'] - usage_before['cpu'])
@@ -62,12 +64,18 @@ def simulate_e91():
     categories = list(resource_usage.keys())
     values = list(resource_usage.values())
     
-    plt.figure(figsize=(8, 5))
-    plt.bar(categories, values, color=['blue', 'orange', 'green', 'red'])
-    plt.xlabel('Resource Type')
-    plt.ylabel('Usage (%) or MB')
-    plt.title('Resource Usage for E91 Protocol')
-    plt.show()
+    if results_path is not None:
+        save_results(results_path, categories=categories, values=values)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(8, 5))
+        plt.bar(categories, values, color=['blue', 'orange', 'green', 'red'])
+        plt.xlabel('Resource Type')
+        plt.ylabel('Usage (%) or MB')
+        plt.title('Resource Usage for E91 Protocol')
+        plt.show()
     
 if __name__ == '__main__':
     simulate_e91()
@@ -1,15 +1,16 @@
-from qunetsim.components import Host, Network
 from qunetsim.objects import Logger
-import random
+from network_context import NetworkContext, acquire
+from random_streams import as_stream, protocol_streams, spawn_seeds
 
 # Disable logging for cleaner output
 Logger.DISABLED = True
 
 # Function to introduce errors in the qubits
-def introduce_errors(qubit, error_rate):
-    if random.random() < error_rate:
+def introduce_errors(qubit, error_rate, rng=None):
+    rng = as_stream(rng)
+    if rng.random() < error_rate:
         # Apply a random error (X, Y, or Z gate)
-        error_type = random.choice(['X', 'Y', 'Z'])
+        error_type = rng.choice(['X', 'Y', 'Z'])
         if error_type == 'X':
             qubit.X()
         elif error_type == 'Y':
@@ -19,24 +20,14 @@ def introduce_errors(qubit, error_rate):
     return qubit
 
 # Function to compare quantum gates based on error percentage
-def compare_gates(error_rate, num_qubits=100):
-    # Initialize the network
-    network = Network.get_instance()
-    network.start()
+def compare_gates(error_rate, num_qubits=100, context=None, seed=None):
+    # The channel noise draws from its own reproducible stream
+    noise_stream = protocol_streams(seed)['noise']
 
-    # Create two hosts, Alice and Bob
-    alice = Host('Alice')
-    bob = Host('Bob')
-    network.add_host(alice)
-    network.add_host(bob)
-
-    # Add connections between Alice and Bob
-    alice.add_connection('Bob')
-    bob.add_connection('Alice')
-
-    # Start the hosts
-    alice.start()
-    bob.start()
+    # Use the caller's warm network (connected, started Alice and Bob) or bring one up for this run
+    context, owned = acquire(context)
+    alice = context['Alice']
+    bob = context['Bob']
 
     # Alice prepares and sends qubits to Bob
     error_count = 0
@@ -48,7 +39,7 @@ def compare_gates(error_rate, num_qubits=100):
             continue
 
         # Introduce errors in the qubit
-        qubit = introduce_errors(qubit, error_rate)
+        qubit = introduce_errors(qubit, error_rate, noise_stream)
 
         # Alice sends the qubit to Bob
         alice.send_qubit('Bob', qubit)
@@ -66,14 +57,16 @@ def compare_gates(error_rate, num_qubits=100):
     error_percentage = (error_count / num_qubits) * 100
     print(f"Error rate: {error_rate}, Error percentage: {error_percentage}%")
 
-    # Stop the network
-    network.stop(True)
+    # Stop the network if this run started it
+    if owned:
+        context.stop()
 
 # Main function to compare different error rates
-def main():
+def main(seed=None):
     error_rates = [0.01, 0.05, 0.1, 0.2]  # Different error rates to compare
-    for rate in error_rates:
-        compare_gates(rate)
+    with NetworkContext() as context:
+        for rate, rate_seed in zip(error_rates, spawn_seeds(seed, len(error_rates))):
+            compare_gates(rate, context=context, seed=rate_seed)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
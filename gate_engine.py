@@ -0,0 +1,224 @@
+import numpy as np
+from gate_registry import GATES, get_gate
+
+# Gate sequences and error sets of the *_eve.py scripts.
+# 'prepare' is applied by Bob before the channel and again by Eve when she re-sends,
+# Eve adds one gate from 'eve_errors', the channel adds one gate from 'noise_errors',
+# and 'undo' is applied before the measurement.
+EVE_EXPERIMENTS = {
+    'hadamard': {'prepare': ('H',), 'undo': ('H',),
+                 'eve_errors': ('X', 'Z', 'Y'), 'noise_errors': ('X', 'Z', 'Y')},
+    'pauli_x': {'prepare': ('X',), 'undo': ('X',),
+                'eve_errors': ('H', 'Z', 'Y'), 'noise_errors': ('H', 'Z', 'Y')},
+    'pauli_y': {'prepare': ('Y',), 'undo': ('Y',),
+                'eve_errors': ('X', 'Z', 'Y'), 'noise_errors': ('H', 'Z', 'X')},
+    'pauli_z': {'prepare': ('Z',), 'undo': ('Z',),
+                'eve_errors': ('X', 'Y', 'H'), 'noise_errors': ('X', 'Y', 'H')},
+    'rx': {'prepare': ('H', 'Z', 'H'), 'undo': ('H', 'Z', 'H'),
+           'eve_errors': ('X', 'Y', 'H'), 'noise_errors': ('X', 'Y', 'H')},
+    'ry': {'prepare': ('Z', 'H'), 'undo': ('H', 'Z'),
+           'eve_errors': ('X', 'Y', 'H'), 'noise_errors': ('X', 'Y', 'H')},
+    'rz': {'prepare': ('Z',), 'undo': ('Z',),
+           'eve_errors': ('X', 'Y', 'H'), 'noise_errors': ('X', 'Y', 'H')},
+    's': {'prepare': ('Z', 'H', 'H'), 'undo': ('H', 'H', 'Z'),
+          'eve_errors': ('X', 'Z', 'Y'), 'noise_errors': ('X', 'Z', 'Y')},
+    't': {'prepare': ('Z', 'H', 'H'), 'undo': ('H', 'H', 'Z'),
+          'eve_errors': ('X', 'Z', 'Y'), 'noise_errors': ('X', 'Z', 'Y')},
+}
+
+# Ways error_rate_vs_qubits and the scripts sweep the number of qubits sent
+SWEEP_MODES = ('incremental', 'independent')
+
+# Trials are drawn in chunks of this size so 10^8-trial points stay in bounded memory
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+
+# Function to multiply a gate sequence (applied left to right) into one 2x2 unitary
+def sequence_unitary(gates):
+    unitary = GATES['I']
+    for gate in gates:
+        unitary = get_gate(gate) @ unitary
+    return unitary
+
+
+def error_probability_table(experiment):
+    """Return P(measure 1) for every (Eve error, noise error) combination.
+
+    Row 0 / column 0 mean "no Eve" / "no noise", row/column i means gate i-1 of
+    the experiment's 'eve_errors' / 'noise_errors' was applied.
+    """
+    prepare = sequence_unitary(experiment['prepare'])
+    undo = sequence_unitary(experiment['undo'])
+    eve_ops = [GATES['I']] + [get_gate(g) for g in experiment['eve_errors']]
+    noise_ops = [GATES['I']] + [get_gate(g) for g in experiment['noise_errors']]
+
+    table = np.empty((len(eve_ops), len(noise_ops)))
+    for i, eve_op in enumerate(eve_ops):
+        for j, noise_op in enumerate(noise_ops):
+            state = undo @ noise_op @ eve_op @ prepare @ np.array([1, 0], dtype=complex)
+            table[i, j] = abs(state[1]) ** 2
+    return table
+
+
+def sample_trials(table, num_trials, eve_probability, noise_probability, rng):
+    """Simulate a batch of trials; returns (error mask, Eve-intercept mask)."""
+    num_eve = table.shape[0] - 1
+    num_noise = table.shape[1] - 1
+
+    eve_mask = rng.random(num_trials) < eve_probability
+    eve_choice = np.where(eve_mask, rng.integers(1, num_eve + 1, num_trials), 0)
+    noise_mask = rng.random(num_trials) < noise_probability
+    noise_choice = np.where(noise_mask, rng.integers(1, num_noise + 1, num_trials), 0)
+
+    errors = rng.random(num_trials) < table[eve_choice, noise_choice]
+    return errors, eve_mask
+
+
+def count_errors(table, num_trials, eve_probability, noise_probability, rng,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """Count errors and Eve intercepts over num_trials, drawn chunk by chunk."""
+    errors = 0
+    intercepts = 0
+    remaining = num_trials
+    while remaining > 0:
+        size = min(remaining, chunk_size)
+        error_mask, eve_mask = sample_trials(table, size, eve_probability, noise_probability, rng)
+        errors += int(np.count_nonzero(error_mask))
+        intercepts += int(np.count_nonzero(eve_mask))
+        remaining -= size
+    return errors, intercepts
+
+
+# Function to reject any sweep mode other than 'incremental' and 'independent' (see error_rate_vs_qubits)
+def check_sweep_mode(sweep_mode):
+    if sweep_mode not in SWEEP_MODES:
+        raise ValueError(f"Unknown sweep mode: {sweep_mode}")
+
+
+def error_rate_vs_qubits(table, num_qubits, eve_probability, noise_probability, rng,
+                         sweep_mode='incremental'):
+    """Error rate (%) after every number of qubits sent, n = 1..num_qubits.
+
+    'incremental' simulates one stream of num_qubits trials and reports the running
+    error count at every prefix (O(N) trials). 'independent' simulates n fresh trials
+    for every point, as the scripts originally did (N(N+1)/2 trials), so the points
+    are statistically independent.
+    Returns (num_bits_sent, error rates, total errors, total trials, Eve intercepts).
+    """
+    check_sweep_mode(sweep_mode)
+    num_bits_sent = np.arange(1, num_qubits + 1)
+
+    if sweep_mode == 'incremental':
+        error_mask, eve_mask = sample_trials(table, num_qubits, eve_probability, noise_probability, rng)
+        running_errors = np.cumsum(error_mask)
+        total_errors = int(running_errors[-1]) if num_qubits else 0
+        return (num_bits_sent, running_errors / num_bits_sent * 100,
+                total_errors, num_qubits, int(np.count_nonzero(eve_mask)))
+
+    errors_per_n = np.empty(num_qubits, dtype=np.int64)
+    intercepts = 0
+    for i, n in enumerate(num_bits_sent):
+        errors_per_n[i], eve_count = count_errors(table, int(n), eve_probability, noise_probability, rng)
+        intercepts += eve_count
+    return (num_bits_sent, errors_per_n / num_bits_sent * 100,
+            int(errors_per_n.sum()), int(num_bits_sent.sum()), intercepts)
+
+
+def batched_error_experiment_with_eve(gate, num_qubits=100, eve_probability=0.2,
+                                      noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5],
+                                      noise_probability_fixed=0.2, trials_per_point=None, rng=None,
+                                      sweep_mode='incremental'):
+    """NumPy version of the *_eve.py experiments.
+
+    Returns the same curves as the scripts: error rate for every number of qubits
+    sent (see error_rate_vs_qubits for sweep_mode), error rate for every noise
+    probability, the log2 key-length curve and the overall error rates.
+    trials_per_point overrides the number of trials of the noise sweep.
+    """
+    experiment = EVE_EXPERIMENTS[gate]
+    table = error_probability_table(experiment)
+    rng = np.random.default_rng(rng)
+
+    # First experiment: error rate vs. number of qubits sent
+    num_bits_sent, error_counts_per_qubits, total_errors, total_measurements, intercepts = \
+        error_rate_vs_qubits(table, num_qubits, eve_probability, noise_probability_fixed, rng, sweep_mode)
+
+    # Second experiment: one point per noise probability
+    trials = trials_per_point or num_qubits
+    avg_error_rates = []
+    for noise_probability in noise_probabilities:
+        errors, _ = count_errors(table, trials, eve_probability, noise_probability, rng)
+        avg_error_rates.append(errors / trials * 100)
+
+    key_length_qubits = np.arange(100, 1100, 100)
+
+    return {
+        'num_bits_sent': num_bits_sent,
+        'error_counts_per_qubits': error_counts_per_qubits,
+        'noise_probabilities': np.asarray(noise_probabilities),
+        'avg_error_rates': np.asarray(avg_error_rates),
+        'key_length_qubits': key_length_qubits,
+        'key_lengths': np.log2(key_length_qubits),
+        'quantum_error_rate': total_errors / total_measurements if total_measurements else 0,
+        'eve_disturbance_rate': intercepts / total_measurements if total_measurements else 0,
+    }
+
+
+# Function to build the prepare / channel / undo experiment for a registered gate
+def gate_experiment(gate, eve_errors=('X', 'Z', 'Y'), noise_errors=('X', 'Z', 'Y')):
+    unitary = get_gate(gate)
+    return {'prepare': (unitary,), 'undo': (unitary.conj().T,),
+            'eve_errors': eve_errors, 'noise_errors': noise_errors}
+
+
+def run_gate_grid(gates, noise_probabilities, eve_probabilities=(0.0,), num_trials=100000,
+                  eve_errors=('X', 'Z', 'Y'), noise_errors=('X', 'Z', 'Y'), rng=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run every gate x noise probability x Eve probability cell as one batched job.
+
+    Each trial prepares U|0>, passes the Eve and noise channels, applies U^dagger and
+    counts a measured 1 as an error. Returns a tidy table as a dict of columns with
+    one row per cell.
+    """
+    rng = np.random.default_rng(rng)
+    tables = np.stack([error_probability_table(gate_experiment(g, eve_errors, noise_errors))
+                       for g in gates])
+
+    gate_index, noise_p, eve_p = (a.ravel() for a in np.meshgrid(
+        np.arange(len(gates)), np.asarray(noise_probabilities, dtype=float),
+        np.asarray(eve_probabilities, dtype=float), indexing='ij'))
+    num_cells = gate_index.size
+
+    errors = np.zeros(num_cells, dtype=np.int64)
+    intercepts = np.zeros(num_cells, dtype=np.int64)
+    rows_per_chunk = max(1, chunk_size // max(num_cells, 1))
+    remaining = num_trials
+    while remaining > 0:
+        shape = (min(remaining, rows_per_chunk), num_cells)
+        eve_mask = rng.random(shape) < eve_p
+        eve_choice = np.where(eve_mask, rng.integers(1, len(eve_errors) + 1, shape), 0)
+        noise_mask = rng.random(shape) < noise_p
+        noise_choice = np.where(noise_mask, rng.integers(1, len(noise_errors) + 1, shape), 0)
+        error_mask = rng.random(shape) < tables[gate_index, eve_choice, noise_choice]
+        errors += np.count_nonzero(error_mask, axis=0)
+        intercepts += np.count_nonzero(eve_mask, axis=0)
+        remaining -= shape[0]
+
+    names = [g if isinstance(g, str) else f'custom_{i}' for i, g in enumerate(gates)]
+    return {
+        'gate': np.array(names)[gate_index],
+        'noise_probability': noise_p,
+        'eve_probability': eve_p,
+        'trials': np.full(num_cells, num_trials, dtype=np.int64),
+        'errors': errors,
+        'eve_intercepts': intercepts,
+        'error_rate': errors / num_trials * 100 if num_trials else np.zeros(num_cells),
+    }
+
+
+if __name__ == "__main__":
+    table = run_gate_grid(['X', 'Y', 'Z', 'H', 'S', 'T', 'RX', 'RY', 'RZ'],
+                          noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5],
+                          eve_probabilities=[0.0, 0.2], num_trials=10 ** 5, rng=0)
+    for row in zip(table['gate'], table['noise_probability'], table['eve_probability'], table['error_rate']):
+        print(f"Gate: {row[0]:>2}, Noise: {row[1]:.2f}, Eve: {row[2]:.2f}, Error Rate: {row[3]:.2f}%")
@@ -0,0 +1,77 @@
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+from gate_registry import GATES
+
+# A compiled gate sequence: `name` is set when the whole sequence equals (up to
+# global phase) a single gate the Qubit exposes as a method, 'I' when it is the
+# identity, and None when it has to be applied as one custom 2x2 unitary.
+FusedGate = namedtuple('FusedGate', ['name', 'unitary'])
+
+# Gates that qunetsim's Qubit exposes as methods, in order of preference
+DISPATCH_NAMES = ('I', 'X', 'Y', 'Z', 'H', 'T')
+
+SELF_INVERSE = {'X', 'Y', 'Z', 'H'}
+
+# Pauli gates as (x, z) bits of a Pauli frame
+PAULI_BITS = {'I': (0, 0), 'X': (1, 0), 'Z': (0, 1), 'Y': (1, 1)}
+PAULI_NAMES = {bits: name for name, bits in PAULI_BITS.items()}
+
+
+# Function to drop adjacent pairs of self-inverse gates such as H·H or X·X
+def simplify(gates):
+    stack = []
+    for gate in gates:
+        if gate == 'I':
+            continue
+        if stack and stack[-1] == gate and gate in SELF_INVERSE:
+            stack.pop()
+        else:
+            stack.append(gate)
+    return tuple(stack)
+
+
+def equal_up_to_phase(a, b):
+    """True when a = e^{i phi} b for some global phase phi."""
+    overlap = np.vdot(b, a)
+    return np.isclose(abs(overlap), 2) and np.allclose(a, overlap / 2 * b)
+
+
+@lru_cache(maxsize=None)
+def compile_sequence(gates):
+    """Fuse a gate sequence (applied left to right) into one FusedGate.
+
+    Identity pairs are removed first; sequences of Pauli gates are combined as a
+    Pauli frame (XOR of x/z bits) without any matrix product; everything else is
+    multiplied into one 2x2 unitary and matched against the dispatchable gates.
+    Results are cached per sequence.
+    """
+    gates = simplify(tuple(gates))
+
+    if all(g in PAULI_BITS for g in gates):
+        x = z = 0
+        for g in gates:
+            gx, gz = PAULI_BITS[g]
+            x ^= gx
+            z ^= gz
+        name = PAULI_NAMES[(x, z)]
+        return FusedGate(name, GATES[name])
+
+    unitary = GATES['I']
+    for g in gates:
+        unitary = GATES[g] @ unitary
+    for name in DISPATCH_NAMES:
+        if equal_up_to_phase(unitary, GATES[name]):
+            return FusedGate(name, GATES[name])
+    return FusedGate(None, unitary)
+
+
+def apply_sequence(q, gates):
+    """Apply a gate sequence to a Qubit with at most one gate call."""
+    fused = compile_sequence(tuple(gates))
+    if fused.name == 'I':
+        return
+    if fused.name is not None:
+        getattr(q, fused.name)()
+    else:
+        q.custom_gate(fused.unitary)
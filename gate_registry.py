@@ -0,0 +1,55 @@
+import numpy as np
+import math
+
+
+# Function to build the rotation gate RX(theta)
+def rx_matrix(theta):
+    c, s = math.cos(theta / 2), math.sin(theta / 2)
+    return np.array([[c, -1j * s], [-1j * s, c]], dtype=complex)
+
+
+# Function to build the rotation gate RY(theta)
+def ry_matrix(theta):
+    c, s = math.cos(theta / 2), math.sin(theta / 2)
+    return np.array([[c, -s], [s, c]], dtype=complex)
+
+
+# Function to build the rotation gate RZ(theta)
+def rz_matrix(theta):
+    return np.array([[np.exp(-0.5j * theta), 0], [0, np.exp(0.5j * theta)]], dtype=complex)
+
+
+# Registry of named single-qubit gates (2x2 unitaries)
+GATES = {
+    'I': np.eye(2, dtype=complex),
+    'X': np.array([[0, 1], [1, 0]], dtype=complex),
+    'Y': np.array([[0, -1j], [1j, 0]], dtype=complex),
+    'Z': np.array([[1, 0], [0, -1]], dtype=complex),
+    'H': np.array([[1, 1], [1, -1]], dtype=complex) / math.sqrt(2),
+    'S': np.array([[1, 0], [0, 1j]], dtype=complex),
+    'T': np.array([[1, 0], [0, np.exp(0.25j * math.pi)]], dtype=complex),
+    'RX': rx_matrix(math.pi / 2),
+    'RY': ry_matrix(math.pi / 2),
+    'RZ': rz_matrix(math.pi / 2),
+}
+
+
+def register_gate(name, matrix):
+    """Add a user-defined single-qubit gate to the registry."""
+    matrix = np.asarray(matrix, dtype=complex)
+    if matrix.shape != (2, 2):
+        raise ValueError(f"Gate {name} must be a 2x2 matrix, got shape {matrix.shape}")
+    if not np.allclose(matrix.conj().T @ matrix, np.eye(2)):
+        raise ValueError(f"Gate {name} is not unitary")
+    GATES[name] = matrix
+    return matrix
+
+
+def get_gate(gate):
+    """Look a gate up by name; matrices are passed through unchanged."""
+    if isinstance(gate, str):
+        try:
+            return GATES[gate]
+        except KeyError:
+            raise KeyError(f"Unknown gate: {gate}") from None
+    return np.asarray(gate, dtype=complex)
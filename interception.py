@@ -0,0 +1,67 @@
+import numpy as np
+from qunetsim.objects import Qubit
+from bitvector import BitVector
+from random_streams import as_stream
+
+
+# Function to prepare one BB84 qubit per (bit, basis) pair: X for bit 1, then H for the diagonal basis
+def prepare_states(host, bits, bases):
+    qubits = []
+    for bit, basis in zip(bits, bases):
+        q = Qubit(host)
+        if bit == 1:
+            q.X()
+        if basis == 1:
+            q.H()
+        qubits.append(q)
+    return qubits
+
+
+# Function to measure qubits in the given bases (0 = rectilinear, 1 = diagonal)
+def measure_states(qubits, bases):
+    results = []
+    for q, basis in zip(qubits, bases):
+        if basis == 1:
+            q.H()
+        results.append(q.measure())
+    return BitVector.from_bits(results)
+
+
+def intercept_states(bits, bases, eve_bases, intercepted, rng=None):
+    """Intercept-resend on a block of BB84 states held as (bit, basis) arrays of any shape.
+
+    Eve's result is the bit where her basis matches the state's and a coin flip
+    otherwise; where `intercepted` is set, the state is replaced by her result in her
+    basis. Returns (Eve's results, resent bits, resent bases).
+    """
+    bits = np.asarray(bits, dtype=np.uint8)
+    bases = np.asarray(bases, dtype=np.uint8)
+    eve_bases = np.asarray(eve_bases, dtype=np.uint8)
+    intercepted = np.asarray(intercepted, dtype=bool)
+    coins = as_stream(rng).rng.integers(0, 2, bits.shape, dtype=np.uint8)
+    results = np.where(bases == eve_bases, bits, coins)
+    return results, np.where(intercepted, results, bits), np.where(intercepted, eve_bases, bases)
+
+
+def intercept_resend(eve, qubits, rng=None, probability=1.0):
+    """Eve takes qubits off the link, measures them and resends fresh ones.
+
+    Each qubit is intercepted with the given probability, measured in a random basis
+    and replaced by a new qubit of Eve's prepared from her (result, basis) pair, so
+    only two bits per qubit are kept and no Qubit object is copied. Untouched qubits
+    pass through. Returns (Eve's bases, her results (0 where not intercepted),
+    intercepted mask, qubits forwarded to Bob).
+    """
+    rng = as_stream(rng)
+    eve_bases = BitVector.random(len(qubits), rng)
+    intercepted = BitVector.from_bits(rng.uniform(len(qubits)) < probability)
+    positions = intercepted.indices().tolist()
+    chosen_bases = eve_bases.select(intercepted)
+    results = measure_states([qubits[i] for i in positions], chosen_bases)
+
+    forwarded = list(qubits)
+    for i, q in zip(positions, prepare_states(eve, results, chosen_bases)):
+        forwarded[i] = q
+    eve_results = np.zeros(len(qubits), dtype=np.uint8)
+    eve_results[positions] = results.unpack()
+    return eve_bases, BitVector.from_bits(eve_results), intercepted, forwarded
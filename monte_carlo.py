@@ -0,0 +1,133 @@
+from collections import namedtuple
+import numpy as np
+from random_streams import protocol_streams
+from interception import intercept_states
+
+# Bytes per (cases x length) bit array; test cases are simulated in batches of this size
+DEFAULT_BATCH_BYTES = 1 << 24
+
+# Per-case results of a batched run plus the mean and variance of the key percentage
+BatchStatistics = namedtuple('BatchStatistics', ['protocol', 'test_cases', 'length', 'sifted_lengths', 'errors',
+                                                 'key_lengths', 'percentages', 'mean', 'variance', 'qber'])
+
+
+# Function to draw a (cases x length) array of random bits
+def random_bits(rng, cases, length):
+    return rng.integers(0, 2, (cases, length), dtype=np.uint8)
+
+
+# Function to measure states prepared as (bits, bases) in `bases`: the bit when the bases agree, a coin flip otherwise
+def measure(bits, prepared_bases, bases, rng):
+    return np.where(prepared_bases == bases, bits, random_bits(rng, *bits.shape))
+
+
+def bb84_cases(streams, cases, length, eve_probability=0.0):
+    """BB84 over an ideal channel, test cases along axis 0.
+
+    With probability eve_probability per qubit Eve measures it in a random basis and
+    resends her result in that basis (intercept-resend).
+    Returns (sifted lengths, errors in the sifted keys) per case.
+    """
+    alice_bits = random_bits(streams['alice'].rng, cases, length)
+    alice_bases = random_bits(streams['alice'].rng, cases, length)
+    bits, bases = alice_bits, alice_bases
+    if eve_probability:
+        eve_bases = random_bits(streams['eve'].rng, cases, length)
+        intercepted = streams['eve'].rng.random((cases, length)) < eve_probability
+        _, bits, bases = intercept_states(bits, bases, eve_bases, intercepted, streams['noise'])
+    bob_bases = random_bits(streams['bob'].rng, cases, length)
+    bob_bits = measure(bits, bases, bob_bases, streams['noise'].rng)
+    matching = alice_bases == bob_bases
+    return matching.sum(axis=1), (matching & (alice_bits != bob_bits)).sum(axis=1)
+
+
+def bb84_pauli_y_cases(streams, cases, length, eve_probability=0.0):
+    """BB84 variant of bb84_pauliy_2, where the "diagonal" basis is a Pauli-Y gate.
+
+    Y only flips the computational bit, so Bob's result is deterministic:
+    Alice's bit XOR both bases. Eve is not modelled for this variant.
+    """
+    alice_bits = random_bits(streams['alice'].rng, cases, length)
+    alice_bases = random_bits(streams['alice'].rng, cases, length)
+    bob_bases = random_bits(streams['bob'].rng, cases, length)
+    bob_bits = alice_bits ^ alice_bases ^ bob_bases
+    matching = alice_bases == bob_bases
+    return matching.sum(axis=1), (matching & (alice_bits != bob_bits)).sum(axis=1)
+
+
+def b92_cases(streams, cases, length, eve_probability=0.0):
+    """B92 as in b92.py: bit 1 is sent as |1>, bit 0 as |+>, Bob measures in Z (0) or X (1).
+
+    A bit is kept where Bob's result differs from it (sifting.sift_b92), which only
+    happens on the random outcomes. Sifting uses Alice's bits, so there are no errors.
+    """
+    alice_bits = random_bits(streams['alice'].rng, cases, length)
+    bob_bases = random_bits(streams['bob'].rng, cases, length)
+    # |1> in Z always gives 1, |+> in X always gives 0, the other two combinations are a coin flip
+    determined = alice_bits != bob_bases
+    bob_results = np.where(determined, alice_bits, random_bits(streams['noise'].rng, cases, length))
+    sifted = (bob_results != alice_bits).sum(axis=1)
+    return sifted, np.zeros(cases, dtype=np.int64)
+
+
+def e91_cases(streams, cases, length, eve_probability=0.0):
+    """E91 as e91.py simulates it: Alice's qubit is |+>, Bob's is |0> (no CNOT, so no entanglement).
+
+    Alice's Z result and Bob's X result are coin flips, the other two are 0. Bits are
+    kept where the bases match.
+    """
+    alice_bases = random_bits(streams['alice'].rng, cases, length)
+    bob_bases = random_bits(streams['bob'].rng, cases, length)
+    alice_results = np.where(alice_bases == 0, random_bits(streams['noise'].rng, cases, length), 0)
+    bob_results = np.where(bob_bases == 1, random_bits(streams['noise'].rng, cases, length), 0)
+    matching = alice_bases == bob_bases
+    return matching.sum(axis=1), (matching & (alice_results != bob_results)).sum(axis=1)
+
+
+PROTOCOLS = {
+    'bb84': bb84_cases,
+    'bb84_pauli_y': bb84_pauli_y_cases,
+    'b92': b92_cases,
+    'e91': e91_cases,
+}
+
+
+def simulate_batch(protocol, test_cases, length, seed=None, eve_probability=0.0, reveal_fraction=0.0,
+                   batch_bytes=DEFAULT_BATCH_BYTES):
+    """Run test_cases independent runs of a protocol as one (test_cases x length) array.
+
+    No qubits or hosts are created: the measurement statistics of the ideal circuits
+    are drawn directly, batch_bytes worth of test cases at a time. reveal_fraction of
+    every sifted key is taken off as the parameter-estimation sample.
+    Returns BatchStatistics with per-case arrays and the mean and sample variance of
+    the key length as a percentage of `length`.
+    """
+    if protocol not in PROTOCOLS:
+        raise ValueError(f"Unknown protocol: {protocol}")
+    streams = protocol_streams(seed)
+    batch = max(1, batch_bytes // max(length, 1))
+    sifted_lengths = []
+    errors = []
+    for start in range(0, test_cases, batch):
+        sifted, wrong = PROTOCOLS[protocol](streams, min(batch, test_cases - start), length, eve_probability)
+        sifted_lengths.append(sifted)
+        errors.append(wrong)
+
+    sifted_lengths = np.concatenate(sifted_lengths or [np.empty(0, dtype=np.int64)]).astype(np.int64)
+    errors = np.concatenate(errors or [np.empty(0, dtype=np.int64)]).astype(np.int64)
+    key_lengths = sifted_lengths - (sifted_lengths * reveal_fraction).astype(np.int64)
+    percentages = key_lengths / length * 100 if length else np.zeros(test_cases)
+    mean = float(percentages.mean()) if test_cases else 0.0
+    variance = float(percentages.var(ddof=1)) if test_cases > 1 else 0.0
+    total_sifted = int(sifted_lengths.sum())
+    qber = int(errors.sum()) / total_sifted if total_sifted else 0.0
+    return BatchStatistics(protocol, test_cases, length, sifted_lengths, errors, key_lengths,
+                           percentages, mean, variance, qber)
+
+
+# Function to print the summary of a batched run instead of every key
+def print_statistics(stats):
+    print(f"\n{stats.protocol}: {stats.test_cases} test cases of {stats.length} qubits")
+    print(f"Mean sifted length: {stats.sifted_lengths.mean():.2f} bits, QBER: {stats.qber:.4f}")
+    print(f"Matching Percentage: mean {stats.mean:.2f}%, variance {stats.variance:.2f}, "
+          f"standard error {np.sqrt(stats.variance / max(stats.test_cases, 1)):.3f}%")
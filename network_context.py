@@ -0,0 +1,151 @@
+import time
+from qunetsim.components import Host, Network
+from direct_link import direct_hosts, stop_direct_hosts
+from transport import is_acked, wait_ack
+
+# Seconds to wait for the network and hosts to come up or drain before giving up
+DEFAULT_TIMEOUT = 10
+
+
+def wait_ready(network, hosts=()):
+    """Readiness check for the network and every host.
+
+    qunetsim starts the packet threads inside start() and adds a host to the routing
+    tables in add_host, and a packet sent to a host whose thread has not picked it up
+    yet waits in its queue, so a correctly started setup is ready at once and there
+    is nothing to sleep for. Raises RuntimeError for a thread that is not running or
+    a host the network does not know.
+    """
+    threads = [('Network', network._queue_processor_thread)]
+    threads += [(host.host_id, host._queue_processor_thread) for host in hosts]
+    for name, thread in threads:
+        if thread is None or not thread.is_alive():
+            raise RuntimeError(f"{name} packet thread is not running")
+    for host in hosts:
+        if network.ARP.get(host.host_id) is not host:
+            raise RuntimeError(f"{host.host_id} is not added to the network")
+    return True
+
+
+def wait_idle(host, timeout=DEFAULT_TIMEOUT):
+    """Block until every packet host sent with an ACK requested has been acknowledged.
+
+    The ACK is the receiver's own signal that the packet was processed and stored;
+    an empty packet queue would only say that it was taken off the queue. Packets
+    sent with no_ack carry no such signal, so protocols wait for their content to
+    arrive instead. Returns False if the ACKs do not all arrive within timeout.
+    """
+    deadline = time.monotonic() + timeout
+    for receiver_id, last_seq_num in list(host._seq_number_sender.items()):
+        for seq_num in range(last_seq_num + 1):
+            if not is_acked(host, receiver_id, seq_num) and \
+                    not wait_ack(host, receiver_id, seq_num, max(0.0, deadline - time.monotonic())):
+                return False
+    return True
+
+
+# Function to wait until every host is idle, i.e. nothing it sent is still unacknowledged
+def wait_drained(hosts=(), timeout=DEFAULT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    return all(wait_idle(host, max(0.0, deadline - time.monotonic())) for host in hosts)
+
+
+class NetworkContext(object):
+    """
+    A started network with a fixed set of hosts that is reused across runs.
+
+    Bringing the network and its host threads up and down costs more than a short
+    protocol run, so the network is started once and only per-run state (stored data
+    qubits, classical messages, sequence numbers) is cleared between runs:
+
+        with NetworkContext(('Alice', 'Bob')) as context:
+            for rate in error_rates:
+                context.reset()
+                run(context['Alice'], context['Bob'], rate)
+
+    connect adds classical and quantum connections between every pair of hosts and
+    start_hosts starts their packet-processing threads. link='direct' skips the
+    network altogether and links every pair of hosts in process (direct_link), which
+    is all a single-hop run needs. neighbours (host id -> ids it links to) connects
+    only those pairs instead, e.g. the edges of a topology.Topology.
+    """
+
+    def __init__(self, host_ids=('Alice', 'Bob'), connect=True, start_hosts=True, backend=None, link='network',
+                 neighbours=None):
+        if link not in ('network', 'direct'):
+            raise ValueError(f"Unknown link type: {link}")
+        self.host_ids = tuple(host_ids)
+        self.connect = connect
+        self.start_hosts = start_hosts
+        self.backend = backend
+        self.link = link
+        self.neighbours = neighbours
+        self.network = None
+        self.hosts = {}
+
+    def start(self):
+        if self.link == 'direct':
+            self.hosts = direct_hosts(self.host_ids, self.backend, self.neighbours if self.connect else {})
+            return self
+        self.network = Network.get_instance()
+        self.network.start(backend=self.backend)
+        self.hosts = {host_id: Host(host_id, backend=self.backend) for host_id in self.host_ids}
+        for host in self.hosts.values():
+            if self.connect:
+                others = self.host_ids if self.neighbours is None else self.neighbours.get(host.host_id, ())
+                for other in others:
+                    if other != host.host_id:
+                        host.add_connection(other)
+            self.network.add_host(host)
+        if self.start_hosts:
+            for host in self.hosts.values():
+                host.start()
+            self.ready()
+        return self
+
+    # Hosts that were not started never process packets, so only started ones are checked;
+    # direct links have no threads and acknowledge at once
+    def ready(self):
+        if self.network is None:
+            return True
+        return wait_ready(self.network, self.hosts.values() if self.start_hosts else ())
+
+    def drain(self, timeout=DEFAULT_TIMEOUT):
+        if self.network is None:
+            return True
+        return wait_drained(self.hosts.values() if self.start_hosts else (), timeout)
+
+    def reset(self):
+        """Clear what one run leaves behind in the hosts; connections and threads stay up."""
+        for host in self.hosts.values():
+            others = self.host_ids if self.neighbours is None else self.neighbours.get(host.host_id, ())
+            for other in others:
+                host.reset_data_qubits(other)
+            host.empty_classical(reset_seq_nums=True)
+        return self
+
+    def stop(self):
+        if self.network is not None:
+            self.drain()
+            self.network.stop(self.start_hosts)
+            self.network = None
+        else:
+            stop_direct_hosts(self.hosts)
+        self.hosts = {}
+
+    def __getitem__(self, host_id):
+        return self.hosts[host_id]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+# Function to hand a run its hosts: reset the caller's warm context, or bring up a one-off one
+def acquire(context, host_ids=('Alice', 'Bob'), **options):
+    if context is not None:
+        return context.reset(), False
+    return NetworkContext(host_ids, **options).start(), True
@@ -0,0 +1,59 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from gate_engine import run_gate_grid
+from random_streams import cell_seed
+
+
+# Function to list the (gate, noise probability, Eve probability) cells in a fixed order
+def sweep_cells(gates, noise_probabilities, eve_probabilities):
+    return list(itertools.product(gates, noise_probabilities, eve_probabilities))
+
+
+# Worker: run a single cell with its own random stream
+def _run_cell(cell, seed_sequence, num_trials, eve_errors, noise_errors):
+    gate, noise_probability, eve_probability = cell
+    return run_gate_grid([gate], [noise_probability], [eve_probability], num_trials,
+                         eve_errors=eve_errors, noise_errors=noise_errors,
+                         rng=np.random.default_rng(seed_sequence))
+
+
+def parallel_gate_sweep(gates, noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5],
+                        eve_probabilities=(0.0,), num_trials=100000, seed=None, max_workers=None,
+                        eve_errors=('X', 'Z', 'Y'), noise_errors=('X', 'Z', 'Y')):
+    """Spread the sweep cells over a process pool.
+
+    Every cell gets its own child SeedSequence of `seed`, so the result does not
+    depend on the number of workers or on scheduling, and results are merged back
+    in cell order. Returns the same dict-of-columns table as run_gate_grid plus a
+    'cell' column; with a fixed seed, rerun_cell(..., cell, seed) repeats one row exactly.
+    """
+    cells = sweep_cells(gates, noise_probabilities, eve_probabilities)
+    entropy = np.random.SeedSequence(seed).entropy
+    seeds = [cell_seed(entropy, i) for i in range(len(cells))]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_cell, cell, seed_sequence, num_trials, eve_errors, noise_errors)
+                   for cell, seed_sequence in zip(cells, seeds)]
+        results = [future.result() for future in futures]
+
+    if not results:
+        return {}
+    table = {column: np.concatenate([r[column] for r in results]) for column in results[0]}
+    table['cell'] = np.arange(len(cells))
+    return table
+
+
+def rerun_cell(gates, noise_probabilities, eve_probabilities, index, seed, num_trials=100000,
+               eve_errors=('X', 'Z', 'Y'), noise_errors=('X', 'Z', 'Y')):
+    """Re-run cell `index` of a parallel_gate_sweep in this process with the same random stream."""
+    cells = sweep_cells(gates, noise_probabilities, eve_probabilities)
+    entropy = np.random.SeedSequence(seed).entropy
+    return _run_cell(cells[index], cell_seed(entropy, index), num_trials, eve_errors, noise_errors)
+
+
+if __name__ == "__main__":
+    table = parallel_gate_sweep(['X', 'Z', 'H', 'S', 'T'], eve_probabilities=[0.0, 0.2],
+                                num_trials=10 ** 6, seed=2024)
+    for row in zip(table['gate'], table['noise_probability'], table['eve_probability'], table['error_rate']):
+        print(f"Gate: {row[0]:>2}, Noise: {row[1]:.2f}, Eve: {row[2]:.2f}, Error Rate: {row[3]:.2f}%")
@@ -0,0 +1,158 @@
+import math
+import numpy as np
+from cascade import binary_entropy
+
+try:
+    from scipy.special import betaincinv
+except ImportError:  # Clopper-Pearson bound by bisection on the binomial CDF
+    betaincinv = None
+
+# BB84 with one-way post-processing yields no key above this QBER
+QBER_THRESHOLD = 0.11
+DEFAULT_EPSILON_PE = 1e-10
+DEFAULT_EPSILON_SEC = 1e-10
+DEFAULT_EPSILON_COR = 1e-15
+
+# Outcomes of QBEREstimator.verdict()
+SECURE = 'secure'
+EAVESDROPPING = 'eavesdropping'
+INCONCLUSIVE = 'inconclusive'
+
+
+def hoeffding_upper(errors, samples, epsilon=DEFAULT_EPSILON_PE):
+    """Upper confidence bound on the error rate, holding except with probability epsilon."""
+    if samples == 0:
+        return 1.0
+    return min(errors / samples + math.sqrt(math.log(1 / epsilon) / (2 * samples)), 1.0)
+
+
+# Function for P(X <= errors) with X ~ Binomial(samples, p), summed in log space
+def _binomial_cdf(errors, samples, p):
+    k = np.arange(errors + 1)
+    log_pmf = (math.lgamma(samples + 1) - np.array([math.lgamma(i + 1) + math.lgamma(samples - i + 1) for i in k])
+               + k * math.log(p) + (samples - k) * math.log1p(-p))
+    return float(np.exp(log_pmf).sum())
+
+
+def clopper_pearson_upper(errors, samples, epsilon=DEFAULT_EPSILON_PE):
+    """Exact one-sided binomial (Clopper-Pearson) upper bound on the error rate."""
+    if samples == 0 or errors >= samples:
+        return 1.0
+    if betaincinv is not None:
+        return float(betaincinv(errors + 1, samples - errors, 1 - epsilon))
+    low, high = errors / samples, 1.0
+    for _ in range(60):
+        mid = (low + high) / 2
+        if _binomial_cdf(errors, samples, mid) > epsilon:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+def sampling_deviation(key_length, samples, epsilon=DEFAULT_EPSILON_PE):
+    """How far the error rate of the unrevealed key may exceed that of a random sample
+    of `samples` bits, except with probability epsilon (Tomamichel et al. 2012)."""
+    if samples == 0 or key_length == 0:
+        return 0.5
+    return math.sqrt((key_length + samples) / (key_length * samples) * (samples + 1) / samples
+                     * math.log(1 / epsilon))
+
+
+def finite_key_length(key_length, samples, errors, leaked, epsilon_pe=DEFAULT_EPSILON_PE,
+                      epsilon_sec=DEFAULT_EPSILON_SEC, epsilon_cor=DEFAULT_EPSILON_COR):
+    """Secret key length from key_length bits when `errors` of `samples` revealed bits differ.
+
+    l = n (1 - h(Q + mu)) - leak_EC - log2(2 / (epsilon_sec^2 epsilon_cor)), never below 0.
+    """
+    qber = errors / samples if samples else 0.5
+    worst_qber = min(qber + sampling_deviation(key_length, samples, epsilon_pe), 0.5)
+    length = (key_length * (1 - binary_entropy(worst_qber)) - leaked
+              - math.log2(2 / (epsilon_sec ** 2 * epsilon_cor)))
+    return max(int(math.floor(length)), 0)
+
+
+def best_sample_size(sifted_length, expected_qber, leak_factor=1.2, epsilon_pe=DEFAULT_EPSILON_PE,
+                     epsilon_sec=DEFAULT_EPSILON_SEC, epsilon_cor=DEFAULT_EPSILON_COR):
+    """Number of sifted bits to reveal that maximizes the expected finite-key length.
+
+    Revealing more bits tightens the QBER bound but leaves fewer key bits; the leak
+    of error correction is modelled as leak_factor * n * h(QBER).
+    Returns (sample size, expected secret length).
+    """
+    candidates = np.unique(np.geomspace(1, max(sifted_length - 1, 1), 200).astype(np.int64))
+    best = (0, 0)
+    for samples in candidates.tolist():
+        key_length = sifted_length - samples
+        leaked = leak_factor * key_length * binary_entropy(expected_qber)
+        length = finite_key_length(key_length, samples, round(expected_qber * samples), leaked,
+                                   epsilon_pe, epsilon_sec, epsilon_cor)
+        if length > best[1]:
+            best = (samples, length)
+    return best
+
+
+class QBEREstimator(object):
+    """
+    Running QBER estimate over the revealed samples of a key stream.
+
+    Call update() once per sifted block with the number of revealed bits, how many
+    of them differed and how many key bits the block kept; the bounds and the
+    finite-key length always reflect everything seen so far.
+    """
+
+    def __init__(self, epsilon=DEFAULT_EPSILON_PE, method='clopper-pearson'):
+        if method not in ('clopper-pearson', 'hoeffding'):
+            raise ValueError(f"Unknown confidence bound: {method}")
+        self.epsilon = epsilon
+        self.method = method
+        self.samples = 0
+        self.errors = 0
+        self.key_bits = 0
+
+    def update(self, samples, errors, key_bits=0):
+        self.samples += samples
+        self.errors += errors
+        self.key_bits += key_bits
+        return self
+
+    @property
+    def qber(self):
+        return self.errors / self.samples if self.samples else 0.0
+
+    def upper_bound(self):
+        if self.method == 'hoeffding':
+            return hoeffding_upper(self.errors, self.samples, self.epsilon)
+        return clopper_pearson_upper(self.errors, self.samples, self.epsilon)
+
+    def min_samples(self, threshold=QBER_THRESHOLD):
+        """Fewest revealed bits for which an error-free sample bounds the QBER at or below threshold."""
+        if self.method == 'hoeffding':
+            return math.ceil(math.log(1 / self.epsilon) / (2 * threshold ** 2))
+        return math.ceil(math.log(self.epsilon) / math.log1p(-threshold))  # Zero errors: 1 - epsilon^(1/n)
+
+    def verdict(self, threshold=QBER_THRESHOLD):
+        """SECURE if the QBER bound is at or below threshold, EAVESDROPPING if the observed QBER
+        itself is above it, otherwise INCONCLUSIVE: the sample is too small to tell."""
+        if self.samples and self.upper_bound() <= threshold:
+            return SECURE
+        if self.qber > threshold:
+            return EAVESDROPPING
+        return INCONCLUSIVE
+
+    def eavesdropping_detected(self, threshold=QBER_THRESHOLD):
+        return self.verdict(threshold) == EAVESDROPPING
+
+    # Function to describe the verdict in one line for the protocol scripts
+    def report(self, threshold=QBER_THRESHOLD):
+        verdict = self.verdict(threshold)
+        if verdict == SECURE:
+            return "No eavesdropping detected, QBER bound is below the threshold."
+        if verdict == EAVESDROPPING:
+            return "Potential eavesdropping detected, QBER is above the threshold!"
+        return (f"Inconclusive: {self.samples} revealed bits cannot bound the QBER below {threshold} "
+                f"(at least {self.min_samples(threshold)} error-free bits are needed).")
+
+    def secret_length(self, leaked, epsilon_sec=DEFAULT_EPSILON_SEC, epsilon_cor=DEFAULT_EPSILON_COR):
+        return finite_key_length(self.key_bits, self.samples, self.errors, leaked, self.epsilon,
+                                 epsilon_sec, epsilon_cor)
@@ -1,11 +1,16 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
+from random_streams import protocol_streams
 import math
+from gate_engine import check_sweep_mode
+
+def pauli_x_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5], sweep_mode='incremental', seed=None):
+    check_sweep_mode(sweep_mode)
+    # Eve and the channel noise draw from their own reproducible streams
+    streams = protocol_streams(seed)
+    eve_stream, noise_stream = streams['eve'], streams['noise']
 
-def pauli_x_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5]):
     network = Network.get_instance()
     network.start()
 
@@ -32,25 +37,30 @@ def pauli_x_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise
     noise_probability_fixed = 0.2  
 
     print("\n--- Error Tracking for Each Qubit Sent (Fixed Noise Probability) ---")
+    errors = 0
     for n in range(1, num_qubits + 1):
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(bob)
             q.X()  
 
-            if random.random() < eve_probability:
+            if eve_stream.random() < eve_probability:
                 q.measure()
                 eve_errors += 1  
 
                 q = Qubit(eve)
                 q.X()
-                error_gate = random.choice(['H', 'Z', 'Y'])
+                error_gate = eve_stream.choice(['H', 'Z', 'Y'])
                 if error_gate == 'H': q.H()
                 elif error_gate == 'Z': q.Z()
                 elif error_gate == 'Y': q.Y()
 
-            if random.random() < noise_probability_fixed:
-                noise_type = random.choice(['H', 'Z', 'Y'])
+            if noise_stream.random() < noise_probability_fixed:
+                noise_type = noise_stream.choice(['H', 'Z', 'Y'])
                 if noise_type == 'H': q.H()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'Y': q.Y()
@@ -60,12 +70,12 @@ def pauli_x_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise
 
             if measurement == 1:
                 errors += 1
+                total_errors += 1
 
         error_rate = (errors / n) * 100
         error_counts_per_qubits.append(error_rate)
         num_bits_sent.append(n)
-        total_errors += errors
-        total_measurements += n
+        total_measurements += trials
 
         print(f"Bits Sent: {n}, Error Rate: {error_rate:.2f}%, Eve Errors: {eve_errors}")
 
@@ -0,0 +1,59 @@
+import math
+import numpy as np
+from bitvector import BitVector
+from cascade import binary_entropy
+
+try:
+    import scipy.fft as fft
+    _fast_length = fft.next_fast_len
+except ImportError:  # NumPy's FFT on power-of-two lengths
+    fft = np.fft
+    _fast_length = lambda n, real=True: 1 << max(n - 1, 0).bit_length()
+
+# Failure probability of privacy amplification (leftover hash lemma)
+DEFAULT_EPSILON = 1e-10
+
+
+def secure_length(n, qber, leaked, epsilon=DEFAULT_EPSILON):
+    """Output length of the hash: n * (1 - h(QBER)) minus the bits leaked during
+    error correction and the 2 log2(1 / epsilon) security margin, never below 0."""
+    length = n * (1 - binary_entropy(qber)) - leaked - 2 * math.log2(1 / epsilon)
+    return max(int(math.floor(length)), 0)
+
+
+def toeplitz_hash(key, output_length, seed):
+    """Multiply the key by an output_length x n binary Toeplitz matrix over GF(2).
+
+    The matrix is fixed by its n + output_length - 1 bit diagonal `seed`
+    (T[i, j] = seed[i - j + n - 1]), so T x is a slice of the convolution of seed
+    and x. A circular convolution of len(seed) points already leaves that slice
+    free of wrap-around, so it is computed with real FFTs of that size in
+    O(n log n), then reduced mod 2.
+    """
+    bits = key.unpack() if isinstance(key, BitVector) else np.asarray(key, dtype=np.uint8)
+    seed = seed.unpack() if isinstance(seed, BitVector) else np.asarray(seed, dtype=np.uint8)
+    n = len(bits)
+    if output_length == 0 or n == 0:
+        return BitVector.zeros(output_length)
+    if len(seed) != n + output_length - 1:
+        raise ValueError(f"A {output_length} x {n} Toeplitz matrix needs {n + output_length - 1} seed bits, got {len(seed)}")
+
+    size = _fast_length(len(seed), real=True)
+    spectrum = fft.rfft(bits.astype(np.float64), size) * fft.rfft(seed.astype(np.float64), size)
+    convolution = fft.irfft(spectrum, size)[n - 1:n - 1 + output_length]
+    return BitVector.from_bits(np.rint(convolution).astype(np.int64) & 1)
+
+
+def privacy_amplification(key_alice, key_bob, qber, leaked, rng=None, epsilon=DEFAULT_EPSILON,
+                           output_length=None):
+    """Compress both reconciled keys with the same randomly chosen Toeplitz hash.
+
+    The hash seed is public (Alice draws it and sends it to Bob). output_length
+    overrides secure_length, e.g. with a finite-key length from parameter_estimation.
+    Returns (Alice's final key, Bob's final key, seed).
+    """
+    if output_length is None:
+        output_length = secure_length(len(key_alice), qber, leaked, epsilon)
+    seed = BitVector.random(len(key_alice) + output_length - 1 if output_length else 0, rng)
+    return (toeplitz_hash(key_alice, output_length, seed),
+            toeplitz_hash(key_bob, output_length, seed), seed)
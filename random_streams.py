@@ -0,0 +1,82 @@
+import numpy as np
+
+# Roles that draw randomness in the protocols, each gets its own child stream
+PROTOCOL_ROLES = ('alice', 'bob', 'eve', 'noise')
+
+# Number of values drawn per Generator call when a stream is read one value at a time
+DEFAULT_BUFFER_SIZE = 4096
+
+
+class BitStream:
+    """Buffered draws from a single numpy Generator.
+
+    Protocol loops ask for one bit, float or choice at a time. The stream refills
+    a buffer of buffer_size values per Generator call instead of making one call
+    per draw, and bits(n) / uniform(n) hand out whole arrays for bulk callers.
+    The same seed and the same sequence of calls always give the same values.
+    """
+
+    def __init__(self, rng=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.rng = np.random.default_rng(rng)
+        self.buffer_size = buffer_size
+        self._bits = []
+        self._floats = []
+
+    def bit(self):
+        if not self._bits:
+            self._bits = self.rng.integers(0, 2, self.buffer_size, dtype=np.uint8).tolist()[::-1]
+        return self._bits.pop()
+
+    def random(self):
+        if not self._floats:
+            self._floats = self.rng.random(self.buffer_size).tolist()[::-1]
+        return self._floats.pop()
+
+    def choice(self, options):
+        return options[int(self.random() * len(options))]
+
+    def bits(self, n):
+        return self.rng.integers(0, 2, n, dtype=np.uint8)
+
+    def uniform(self, n):
+        return self.rng.random(n)
+
+
+# Function to accept either a ready BitStream or anything np.random.default_rng takes
+def as_stream(rng=None):
+    return rng if isinstance(rng, BitStream) else BitStream(rng)
+
+
+def seed_sequence(seed=None):
+    """SeedSequence behind an int / None / SeedSequence / Generator / BitStream seed."""
+    if isinstance(seed, BitStream):
+        seed = seed.rng
+    if isinstance(seed, np.random.Generator):
+        return seed.bit_generator.seed_seq
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def cell_seed(seed, index):
+    """Independent SeedSequence for cell `index`, the same as SeedSequence(seed).spawn()[index]."""
+    return np.random.SeedSequence(seed, spawn_key=(index,))
+
+
+# Function to split a seed into count independent child SeedSequences (one per worker or point)
+def spawn_seeds(seed, count):
+    return seed_sequence(seed).spawn(count)
+
+
+# Function to build one BitStream per independent child of seed
+def spawn_streams(seed, count, buffer_size=DEFAULT_BUFFER_SIZE):
+    return [BitStream(child, buffer_size) for child in spawn_seeds(seed, count)]
+
+
+def protocol_streams(seed=None, roles=PROTOCOL_ROLES, buffer_size=DEFAULT_BUFFER_SIZE):
+    """One BitStream per protocol role, keyed by role name.
+
+    The roles draw from independent child streams, so changing how often Eve or
+    the noise channel draws does not shift Alice's or Bob's values.
+    """
+    return dict(zip(roles, spawn_streams(seed, len(roles), buffer_size)))
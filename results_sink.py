@@ -0,0 +1,116 @@
+import json
+import sys
+import numpy as np
+
+# Entry of an .npz results file (Parquet: schema metadata key) naming the fields saved from scalars
+SCALARS_KEY = '__scalars__'
+
+# Parquet schema metadata key recording whether the arrays are plain columns or one row of list cells
+LAYOUT_KEY = '__layout__'
+
+
+def save_results(path, **arrays):
+    """Write a sweep's arrays to `path` as .npz, or as Parquet when it ends in .parquet.
+
+    Equal-length 1-D arrays (e.g. a gate_engine.run_gate_grid table) become plain
+    Parquet columns; otherwise every array is stored as a single list-valued cell.
+    Which of the two it is and which fields were scalars is saved alongside, so
+    load_results gives back the same shapes. Parquet needs pyarrow; .npz only needs NumPy.
+    """
+    columns = {name: np.asarray(value) for name, value in arrays.items()}
+    scalars = [name for name, value in columns.items() if value.ndim == 0]
+
+    if str(path).endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet results requires pyarrow") from None
+        lengths = {value.shape for value in columns.values()}
+        if len(lengths) == 1 and len(next(iter(lengths))) == 1:
+            table = pa.table({name: value for name, value in columns.items()})
+            layout = 'columns'
+        else:
+            table = pa.table({name: [value.tolist()] for name, value in columns.items()})
+            layout = 'cells'
+        table = table.replace_schema_metadata({LAYOUT_KEY: layout, SCALARS_KEY: json.dumps(scalars)})
+        pq.write_table(table, path)
+    else:
+        np.savez_compressed(path, **columns, **{SCALARS_KEY: np.array(scalars, dtype=str)})
+    return path
+
+
+def load_results(path):
+    """Read results written by save_results back into a dict of arrays (0-d for saved scalars)."""
+    if str(path).endswith('.parquet'):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        scalars = json.loads(metadata.get(SCALARS_KEY.encode(), b'[]'))
+        if metadata.get(LAYOUT_KEY.encode()) == b'cells':
+            results = {name: np.asarray(table.column(name)[0].as_py()) for name in table.column_names}
+        else:
+            results = {name: table.column(name).to_numpy() for name in table.column_names}
+    else:
+        with np.load(path) as data:
+            results = {name: data[name] for name in data.files if name != SCALARS_KEY}
+            scalars = data[SCALARS_KEY].tolist() if SCALARS_KEY in data.files else []
+    for name in scalars:
+        results[name] = results[name].reshape(())
+    return results
+
+
+def render_sweep(results, path, title=None):
+    """Render the three-panel gate sweep figure to an image file.
+
+    Uses the Agg canvas directly, so no GUI backend or event loop is involved
+    and pyplot's global state is left untouched.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if isinstance(results, str):
+        results = load_results(results)
+
+    num_bits_sent = results['num_bits_sent']
+    error_counts = results.get('error_counts_per_qubits', results.get('error_counts'))
+    key_lengths = results.get('key_lengths')
+    if key_lengths is not None and len(results.get('key_length_qubits', ())) == len(key_lengths):
+        key_length_qubits = results['key_length_qubits']
+    elif key_lengths is not None and len(key_lengths) == len(num_bits_sent):
+        key_length_qubits = num_bits_sent
+    else:
+        key_length_qubits = np.arange(100, 1100, 100)
+
+    fig = Figure(figsize=(18, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots(1, 3)
+
+    ax[0].plot(num_bits_sent, error_counts, linestyle='-', color='b')
+    ax[0].set_xlabel('Number of Qubits Sent')
+    ax[0].set_ylabel('Error Rate (%)')
+    ax[0].set_title(title or 'Error Rate vs. Number of Qubits')
+    ax[0].grid()
+
+    if 'avg_error_rates' in results:
+        ax[1].plot(results['noise_probabilities'], results['avg_error_rates'], linestyle='-', color='r')
+    ax[1].set_xlabel('Noise Probability')
+    ax[1].set_ylabel('Error Rate (%)')
+    ax[1].set_title('Error Rate vs. Noise Probability')
+    ax[1].grid()
+
+    if key_lengths is not None:
+        ax[2].plot(key_length_qubits, key_lengths, linestyle='-', color='g')
+    ax[2].set_xlabel('Number of Qubits Sent')
+    ax[2].set_ylabel('Key Length (log₂ N)')
+    ax[2].set_title('Number of Qubits vs. Key Length')
+    ax[2].grid()
+
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+# Render saved results to an image: python results_sink.py results.npz figure.png
+if __name__ == "__main__":
+    render_sweep(sys.argv[1], sys.argv[2])
@@ -1,11 +1,16 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
+from gate_fusion import apply_sequence
+from results_sink import save_results
+from random_streams import protocol_streams
 import math
+from gate_engine import check_sweep_mode
 
-def ry_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5]):
+def ry_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5], sweep_mode='incremental', results_path=None, show_plot=True, seed=None):
+    check_sweep_mode(sweep_mode)
+    # The channel noise draws from its own reproducible stream
+    noise_stream = protocol_streams(seed)['noise']
     network = Network.get_instance()
     network.start()
 
@@ -21,45 +26,50 @@ def ry_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
     total_measurements = 0
 
     noise_probability_fixed = 0.1
+    errors = 0
     for n in range(1, num_qubits + 1):
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(host)
-            q.Z(); q.H()  # Approximate RY(π/2)
+            apply_sequence(q, ('Z', 'H'))  # Approximate RY(π/2)
 
-            if random.random() < noise_probability_fixed:
-                noise_type = random.choice(['H', 'Z', 'X'])
+            if noise_stream.random() < noise_probability_fixed:
+                noise_type = noise_stream.choice(['H', 'Z', 'X'])
                 if noise_type == 'H': q.H()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'X': q.X()
 
-            q.H(); q.Z()  # Apply RY(π/2) again
+            apply_sequence(q, ('H', 'Z'))  # Apply RY(π/2) again
             measurement = q.measure()
 
             if measurement == 1:
                 errors += 1
+                total_errors += 1
 
         error_rate = (errors / n) * 100
         error_counts_per_qubits.append(error_rate)
         num_bits_sent.append(n)
         key_lengths.append(math.log2(n) if n > 0 else 0)
-        total_errors += errors
-        total_measurements += n
+        total_measurements += trials
 
     # **Fix: Add noise probability error tracking**
     for noise_probability in noise_probabilities:
         errors = 0
         for _ in range(num_qubits):
             q = Qubit(host)
-            q.Z(); q.H()
+            apply_sequence(q, ('Z', 'H'))
 
-            if random.random() < noise_probability:
-                noise_type = random.choice(['H', 'Z', 'X'])
+            if noise_stream.random() < noise_probability:
+                noise_type = noise_stream.choice(['H', 'Z', 'X'])
                 if noise_type == 'H': q.H()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'X': q.X()
 
-            q.H(); q.Z()
+            apply_sequence(q, ('H', 'Z'))
             measurement = q.measure()
 
             if measurement == 1:
@@ -72,13 +82,23 @@ def ry_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
     host.stop()
     network.stop(True)
 
-    fig, ax = plt.subplots(1, 3, figsize=(18, 5))
-    ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
-    ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
-    ax[2].plot(num_bits_sent, key_lengths, linestyle='-', color='g')
+    if results_path is not None:
+        save_results(results_path, num_bits_sent=num_bits_sent, error_counts_per_qubits=error_counts_per_qubits,
+                     noise_probabilities=noise_probabilities, avg_error_rates=avg_error_rates,
+                     key_length_qubits=key_length_qubits, key_lengths=key_lengths,
+                     total_errors=total_errors, total_measurements=total_measurements,
+                     quantum_error_rate=quantum_error_rate)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(1, 3, figsize=(18, 5))
+        ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
+        ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
+        ax[2].plot(num_bits_sent, key_lengths, linestyle='-', color='g')
 
-    plt.tight_layout()
-    plt.show()
+        plt.tight_layout()
+        plt.show()
 
     print("\n=== Quantum Error Rate ===")
     print(f"Total Errors: {total_errors}")
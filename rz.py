@@ -1,11 +1,15 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from qunetsim.components import Host, Network  # ✅ FIXED: Import Network
 from qunetsim.objects import Qubit
-import random
+from results_sink import save_results
+from random_streams import protocol_streams
 import math
+from gate_engine import check_sweep_mode
 
-def rz_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5]):
+def rz_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5], sweep_mode='incremental', results_path=None, show_plot=True, seed=None):
+    check_sweep_mode(sweep_mode)
+    # The channel noise draws from its own reproducible stream
+    noise_stream = protocol_streams(seed)['noise']
     network = Network.get_instance()  # ✅ FIXED: Network is now defined
     network.start()
 
@@ -21,14 +25,19 @@ def rz_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
     total_measurements = 0
 
     noise_probability_fixed = 0.1
+    errors = 0
     for n in range(1, num_qubits + 1):
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(host)
             q.Z()  # Approximate RZ(π/2)
 
-            if random.random() < noise_probability_fixed:
-                noise_type = random.choice(['H', 'X', 'Y'])
+            if noise_stream.random() < noise_probability_fixed:
+                noise_type = noise_stream.choice(['H', 'X', 'Y'])
                 if noise_type == 'H': q.H()
                 elif noise_type == 'X': q.X()
                 elif noise_type == 'Y': q.Y()
@@ -38,13 +47,13 @@ def rz_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
 
             if measurement == 1:
                 errors += 1
+                total_errors += 1
 
         error_rate = (errors / n) * 100
         error_counts_per_qubits.append(error_rate)
         num_bits_sent.append(n)
         key_lengths.append(math.log2(n) if n > 0 else 0)
-        total_errors += errors
-        total_measurements += n
+        total_measurements += trials
 
     for noise_probability in noise_probabilities:
         errors = 0
@@ -52,8 +61,8 @@ def rz_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
             q = Qubit(host)
             q.Z()
 
-            if random.random() < noise_probability:
-                noise_type = random.choice(['H', 'X', 'Y'])
+            if noise_stream.random() < noise_probability:
+                noise_type = noise_stream.choice(['H', 'X', 'Y'])
                 if noise_type == 'H': q.H()
                 elif noise_type == 'X': q.X()
                 elif noise_type == 'Y': q.Y()
@@ -71,13 +80,23 @@ def rz_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
     host.stop()
     network.stop(True)
 
-    fig, ax = plt.subplots(1, 3, figsize=(18, 5))
-    ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
-    ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
-    ax[2].plot(num_bits_sent, key_lengths, linestyle='-', color='g')
+    if results_path is not None:
+        save_results(results_path, num_bits_sent=num_bits_sent, error_counts_per_qubits=error_counts_per_qubits,
+                     noise_probabilities=noise_probabilities, avg_error_rates=avg_error_rates,
+                     key_length_qubits=key_length_qubits, key_lengths=key_lengths,
+                     total_errors=total_errors, total_measurements=total_measurements,
+                     quantum_error_rate=quantum_error_rate)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(1, 3, figsize=(18, 5))
+        ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
+        ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
+        ax[2].plot(num_bits_sent, key_lengths, linestyle='-', color='g')
 
-    plt.tight_layout()
-    plt.show()
+        plt.tight_layout()
+        plt.show()
 
     print("\n=== Quantum Error Rate ===")
     print(f"Total Errors: {total_errors}")
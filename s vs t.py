@@ -1,11 +1,16 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
+from results_sink import save_results
+from random_streams import protocol_streams
 import math
+import sys
+from gate_engine import check_sweep_mode
 
-def quantum_gate_error_experiment(gate_name, apply_gate, num_qubits=100, noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5]):
+def quantum_gate_error_experiment(gate_name, apply_gate, num_qubits=100, noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5], sweep_mode='incremental', seed=None):
+    check_sweep_mode(sweep_mode)
+    # The channel noise draws from its own reproducible stream
+    noise_stream = protocol_streams(seed)['noise']
     network = Network.get_instance()
     network.start()
 
@@ -21,15 +26,21 @@ def quantum_gate_error_experiment(gate_name, apply_gate, num_qubits=100, noise_p
 
     noise_probability_fixed = 0.1
     total_errors = 0
+    total_measurements = 0
 
+    errors = 0
     for n in num_bits_sent:
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(host)
             apply_gate(q)
 
-            if random.random() < noise_probability_fixed:
-                noise_type = random.choice(['X', 'Z', 'Y'])
+            if noise_stream.random() < noise_probability_fixed:
+                noise_type = noise_stream.choice(['X', 'Z', 'Y'])
                 if noise_type == 'X': q.X()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'Y': q.Y()
@@ -38,9 +49,10 @@ def quantum_gate_error_experiment(gate_name, apply_gate, num_qubits=100, noise_p
             measurement = q.measure()
             if measurement == 1:
                 errors += 1
+                total_errors += 1
 
         error_counts.append((errors / n) * 100)
-        total_errors += errors
+        total_measurements += trials
 
     for noise_probability in noise_probabilities:
         errors = 0
@@ -48,8 +60,8 @@ def quantum_gate_error_experiment(gate_name, apply_gate, num_qubits=100, noise_p
             q = Qubit(host)
             apply_gate(q)
 
-            if random.random() < noise_probability:
-                noise_type = random.choice(['X', 'Z', 'Y'])
+            if noise_stream.random() < noise_probability:
+                noise_type = noise_stream.choice(['X', 'Z', 'Y'])
                 if noise_type == 'X': q.X()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'Y': q.Y()
@@ -64,7 +76,7 @@ def quantum_gate_error_experiment(gate_name, apply_gate, num_qubits=100, noise_p
     host.stop()
     network.stop(True)
 
-    quantum_error_rate = total_errors / (num_qubits * (num_qubits + 1) / 2)  # Normalized error rate
+    quantum_error_rate = total_errors / total_measurements  # Normalized error rate
     return num_bits_sent, error_counts, noise_probabilities, avg_error_rates, key_length_qubits, key_lengths, quantum_error_rate
 
 def apply_s_gate(q):
@@ -80,44 +92,59 @@ def apply_t_gate(q):
     q.H()
 
 if __name__ == "__main__":
+    # python "s vs t.py" [results.npz|results.parquet] [--show]; the window only opens with --show
+    show_plot = '--show' in sys.argv[1:]
+    paths = [arg for arg in sys.argv[1:] if arg != '--show']
+    results_path = paths[0] if paths else 's_vs_t.npz'
+
     print("\nRunning S-Gate Error Experiment...")
     s_bits, s_errors, s_noises, s_avg_errors, s_keys, s_key_lengths, s_error_rate = quantum_gate_error_experiment("S", apply_s_gate)
 
     print("\nRunning T-Gate Error Experiment...")
     t_bits, t_errors, t_noises, t_avg_errors, t_keys, t_key_lengths, t_error_rate = quantum_gate_error_experiment("T", apply_t_gate)
 
-    # Plot Results (Both gates in same graphs)
-    fig, ax = plt.subplots(1, 3, figsize=(18, 5))
-
-    # Error Rate vs. Number of Qubits
-    ax[0].plot(s_bits, s_errors, linestyle='-', color='b', label="S Gate")
-    ax[0].plot(t_bits, t_errors, linestyle='-', color='r', label="T Gate")
-    ax[0].set_xlabel('Number of Qubits Sent')
-    ax[0].set_ylabel('Error Rate (%)')
-    ax[0].set_title('Error Rate vs. Number of Qubits')
-    ax[0].grid()
-    ax[0].legend()
-
-    # Error Rate vs. Noise Probability
-    ax[1].plot(s_noises, s_avg_errors, linestyle='-', color='b', label="S Gate")
-    ax[1].plot(t_noises, t_avg_errors, linestyle='-', color='r', label="T Gate")
-    ax[1].set_xlabel('Noise Probability')
-    ax[1].set_ylabel('Error Rate (%)')
-    ax[1].set_title('Error Rate vs. Noise Probability')
-    ax[1].grid()
-    ax[1].legend()
-
-    # Number of Qubits vs. Key Length (Fix: Different linestyle for visibility)
-    ax[2].plot(s_keys, s_key_lengths, linestyle='--', color='b', label="S Gate")
-    ax[2].plot(t_keys, t_key_lengths, linestyle='-', color='r', label="T Gate")
-    ax[2].set_xlabel('Number of Qubits Sent')
-    ax[2].set_ylabel('Key Length (log₂ N)')
-    ax[2].set_title('Number of Qubits vs. Key Length')
-    ax[2].grid()
-    ax[2].legend()
-
-    plt.tight_layout()
-    plt.show()
+    save_results(results_path,
+                 s_bits=s_bits, s_errors=s_errors, s_noises=s_noises, s_avg_errors=s_avg_errors,
+                 s_keys=s_keys, s_key_lengths=s_key_lengths, s_error_rate=s_error_rate,
+                 t_bits=t_bits, t_errors=t_errors, t_noises=t_noises, t_avg_errors=t_avg_errors,
+                 t_keys=t_keys, t_key_lengths=t_key_lengths, t_error_rate=t_error_rate)
+    print(f"Results written to {results_path}")
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        # Plot Results (Both gates in same graphs)
+        fig, ax = plt.subplots(1, 3, figsize=(18, 5))
+
+        # Error Rate vs. Number of Qubits
+        ax[0].plot(s_bits, s_errors, linestyle='-', color='b', label="S Gate")
+        ax[0].plot(t_bits, t_errors, linestyle='-', color='r', label="T Gate")
+        ax[0].set_xlabel('Number of Qubits Sent')
+        ax[0].set_ylabel('Error Rate (%)')
+        ax[0].set_title('Error Rate vs. Number of Qubits')
+        ax[0].grid()
+        ax[0].legend()
+
+        # Error Rate vs. Noise Probability
+        ax[1].plot(s_noises, s_avg_errors, linestyle='-', color='b', label="S Gate")
+        ax[1].plot(t_noises, t_avg_errors, linestyle='-', color='r', label="T Gate")
+        ax[1].set_xlabel('Noise Probability')
+        ax[1].set_ylabel('Error Rate (%)')
+        ax[1].set_title('Error Rate vs. Noise Probability')
+        ax[1].grid()
+        ax[1].legend()
+
+        # Number of Qubits vs. Key Length (Fix: Different linestyle for visibility)
+        ax[2].plot(s_keys, s_key_lengths, linestyle='--', color='b', label="S Gate")
+        ax[2].plot(t_keys, t_key_lengths, linestyle='-', color='r', label="T Gate")
+        ax[2].set_xlabel('Number of Qubits Sent')
+        ax[2].set_ylabel('Key Length (log₂ N)')
+        ax[2].set_title('Number of Qubits vs. Key Length')
+        ax[2].grid()
+        ax[2].legend()
+
+        plt.tight_layout()
+        plt.show()
 
     # Quantum Error Rate Summary
     print("\n=== Quantum Error Rate Comparison ===")
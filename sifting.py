@@ -0,0 +1,63 @@
+import numpy as np
+from bitvector import CHUNK_BITS, BitVector
+from random_streams import as_stream
+
+
+# Function to accept a BitVector or any sequence of 0/1 values
+def as_bits(bits):
+    return bits if isinstance(bits, BitVector) else BitVector.from_bits(bits)
+
+
+def basis_match_mask(alice_bases, bob_bases, measured=None):
+    """Mask with 1 where Alice and Bob used the same basis (and, if given, Bob's measurement is valid)."""
+    matching = ~(as_bits(alice_bases) ^ as_bits(bob_bases))
+    if measured is not None:
+        matching = matching & as_bits(measured)
+    return matching
+
+
+def sift(alice_bases, bob_bases, alice_bits, bob_bits, measured=None):
+    """BB84 sifting in one pass: returns (match mask, Alice's sifted key, Bob's sifted key)."""
+    matching = basis_match_mask(alice_bases, bob_bases, measured)
+    return matching, as_bits(alice_bits).select(matching), as_bits(bob_bits).select(matching)
+
+
+def sift_b92(alice_bits, bob_results):
+    """B92 sifting: Alice's bit is kept wherever Bob's result differs from it (a conclusive detection)."""
+    alice_bits = as_bits(alice_bits)
+    return alice_bits.select(alice_bits ^ as_bits(bob_results))
+
+
+def sample_mask(length, count, rng=None):
+    """Mask with `count` ones at distinct uniformly random positions out of `length`.
+
+    The ones are split over CHUNK_BITS-sized chunks with a sequential hypergeometric
+    draw and placed within each chunk, so memory stays bounded for huge keys.
+    """
+    rng = as_stream(rng).rng
+    data = np.zeros((length + 7) // 8, dtype=np.uint8)
+    remaining = count
+    for start in range(0, length, CHUNK_BITS):
+        size = min(CHUNK_BITS, length - start)
+        rest = length - start - size
+        chunk_count = rng.hypergeometric(size, rest, remaining) if rest else remaining
+        if chunk_count:
+            positions = rng.choice(size, chunk_count, replace=False) + start
+            np.bitwise_or.at(data, positions >> 3, (0x80 >> (positions & 7)).astype(np.uint8))
+        remaining -= chunk_count
+    return BitVector(data, length)
+
+
+def reveal(sifted_key_alice, sifted_key_bob, revealed):
+    """Bits of both sifted keys at the revealed positions."""
+    return as_bits(sifted_key_alice).select(revealed), as_bits(sifted_key_bob).select(revealed)
+
+
+def final_key(sifted_key, revealed):
+    """The sifted key without the publicly revealed positions."""
+    return as_bits(sifted_key).select(~revealed)
+
+
+# Function to map positions in the sifted key back to positions in the original stream
+def original_positions(matching, positions):
+    return matching.indices()[np.asarray(positions, dtype=np.int64)]
@@ -0,0 +1,420 @@
+import math
+import threading
+import uuid
+from queue import Queue
+import numpy as np
+
+# Tableau rows are bit-packed into 64-bit words, one bit per qubit
+WORD_BITS = 64
+ONE = np.uint64(1)
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount_rows(words):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    def _popcount_rows(words):
+        bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1)
+        return bits.sum(axis=-1, dtype=np.int64)
+
+
+class StabilizerTableau(object):
+    """
+    Aaronson-Gottesman (CHP) stabilizer tableau for Clifford circuits.
+
+    Rows 0..n-1 are destabilizers, rows n..2n-1 stabilizers and row 2n is scratch
+    space. Every gate is a column update over all rows at once, so the cost of a
+    gate grows with the number of rows, not with 2^n like a state vector.
+    Qubit slots are handed out by allocate() and recycled after release(); the
+    tableau doubles its capacity when it runs out.
+    """
+
+    def __init__(self, num_qubits=64, rng=None):
+        self._rng = np.random.default_rng(rng)
+        self._lock = threading.RLock()
+        self._n = 0
+        self._next = 0
+        self._free = []
+        self._x = np.zeros((1, 1), dtype=np.uint64)
+        self._z = np.zeros((1, 1), dtype=np.uint64)
+        self._r = np.zeros(1, dtype=np.uint8)
+        self._resize(max(int(num_qubits), 1))
+
+    @property
+    def num_qubits(self):
+        return self._n
+
+    def _resize(self, n):
+        old_n = self._n
+        words = -(-n // WORD_BITS)
+        x = np.zeros((2 * n + 1, words), dtype=np.uint64)
+        z = np.zeros((2 * n + 1, words), dtype=np.uint64)
+        r = np.zeros(2 * n + 1, dtype=np.uint8)
+
+        if old_n:
+            old_words = self._x.shape[1]
+            for src, dst in ((slice(0, old_n), slice(0, old_n)),
+                             (slice(old_n, 2 * old_n), slice(n, n + old_n))):
+                x[dst, :old_words] = self._x[src]
+                z[dst, :old_words] = self._z[src]
+                r[dst] = self._r[src]
+
+        # New qubits start in |0>: destabilizer X_j, stabilizer Z_j
+        new = np.arange(old_n, n)
+        word, bit = np.divmod(new, WORD_BITS)
+        masks = np.left_shift(ONE, bit.astype(np.uint64))
+        x[new, word] |= masks
+        z[n + new, word] |= masks
+
+        self._x, self._z, self._r, self._n = x, z, r, n
+
+    def allocate(self):
+        """Reserve a qubit slot in state |0> and return its index."""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            if self._next == self._n:
+                self._resize(2 * self._n)
+            index = self._next
+            self._next += 1
+            return index
+
+    def release(self, q):
+        """Measure a slot, reset it to |0> and make it available again."""
+        with self._lock:
+            if self.measure(q):
+                self.X(q)
+            self._free.append(q)
+
+    # Function to read the x and z bits of qubit q for every row
+    def _columns(self, q):
+        word, bit = divmod(q, WORD_BITS)
+        shift = np.uint64(bit)
+        x = ((self._x[:, word] >> shift) & ONE).astype(bool)
+        z = ((self._z[:, word] >> shift) & ONE).astype(bool)
+        return x, z, word, shift
+
+    ##########################
+    #   Clifford gates      #
+    ##########################
+
+    def X(self, q):
+        with self._lock:
+            _, z, _, _ = self._columns(q)
+            self._r ^= z
+
+    def Y(self, q):
+        with self._lock:
+            x, z, _, _ = self._columns(q)
+            self._r ^= x ^ z
+
+    def Z(self, q):
+        with self._lock:
+            x, _, _, _ = self._columns(q)
+            self._r ^= x
+
+    def H(self, q):
+        with self._lock:
+            x, z, word, shift = self._columns(q)
+            self._r ^= x & z
+            swap = (x ^ z).astype(np.uint64) << shift
+            self._x[:, word] ^= swap
+            self._z[:, word] ^= swap
+
+    def S(self, q):
+        with self._lock:
+            x, z, word, shift = self._columns(q)
+            self._r ^= x & z
+            self._z[:, word] ^= x.astype(np.uint64) << shift
+
+    def cnot(self, control, target):
+        with self._lock:
+            xc, zc, word_c, shift_c = self._columns(control)
+            xt, zt, word_t, shift_t = self._columns(target)
+            self._r ^= xc & zt & ~(xt ^ zc)
+            self._x[:, word_t] ^= xc.astype(np.uint64) << shift_t
+            self._z[:, word_c] ^= zt.astype(np.uint64) << shift_c
+
+    def cphase(self, control, target):
+        with self._lock:
+            self.H(target)
+            self.cnot(control, target)
+            self.H(target)
+
+    ##########################
+    #   Measurement         #
+    ##########################
+
+    def _rowsum(self, rows, source):
+        """Multiply the Pauli of row `source` into every row in `rows`, tracking signs."""
+        x1, z1 = self._x[source], self._z[source]
+        x2, z2 = self._x[rows], self._z[rows]
+        plus = (x1 & z1 & z2 & ~x2) | (x1 & ~z1 & z2 & x2) | (~x1 & z1 & x2 & ~z2)
+        minus = (x1 & z1 & x2 & ~z2) | (x1 & ~z1 & z2 & ~x2) | (~x1 & z1 & x2 & z2)
+        phase = (2 * self._r[rows].astype(np.int64) + 2 * int(self._r[source])
+                 + _popcount_rows(plus) - _popcount_rows(minus))
+        self._r[rows] = (phase % 4 == 2)
+        self._x[rows] ^= x1
+        self._z[rows] ^= z1
+
+    def _clear_scratch(self):
+        scratch = 2 * self._n
+        self._x[scratch] = 0
+        self._z[scratch] = 0
+        self._r[scratch] = 0
+        return scratch
+
+    def measure(self, q):
+        """Measure qubit q in the computational basis and return 0 or 1."""
+        with self._lock:
+            n = self._n
+            x, _, word, shift = self._columns(q)
+            anticommuting = np.flatnonzero(x[n:2 * n]) + n
+
+            if anticommuting.size:
+                # Random outcome
+                p = anticommuting[0]
+                rows = np.flatnonzero(x[:2 * n])
+                self._rowsum(rows[rows != p], p)
+                self._x[p - n] = self._x[p]
+                self._z[p - n] = self._z[p]
+                self._r[p - n] = self._r[p]
+                self._x[p] = 0
+                self._z[p] = 0
+                self._z[p, word] = ONE << shift
+                self._r[p] = self._rng.integers(0, 2)
+                return int(self._r[p])
+
+            # Deterministic outcome
+            scratch = self._clear_scratch()
+            for i in np.flatnonzero(x[:n]):
+                self._rowsum([scratch], i + n)
+            return int(self._r[scratch])
+
+    def expectation(self, q, pauli):
+        """Expectation value (-1, 0 or +1) of the single-qubit Pauli 'X', 'Y' or 'Z' on q."""
+        px, pz = {'X': (True, False), 'Y': (True, True), 'Z': (False, True)}[pauli]
+        with self._lock:
+            n = self._n
+            x, z, _, _ = self._columns(q)
+            anticommutes = (x & pz) ^ (z & px)
+            if anticommutes[n:2 * n].any():
+                return 0
+            scratch = self._clear_scratch()
+            for i in np.flatnonzero(anticommutes[:n]):
+                self._rowsum([scratch], i + n)
+            return -1 if self._r[scratch] else 1
+
+    def density_operator(self, q):
+        """Reduced 2x2 density operator of qubit q."""
+        rho = np.eye(2, dtype=complex)
+        rho += self.expectation(q, 'X') * np.array([[0, 1], [1, 0]], dtype=complex)
+        rho += self.expectation(q, 'Y') * np.array([[0, -1j], [1j, 0]], dtype=complex)
+        rho += self.expectation(q, 'Z') * np.array([[1, 0], [0, -1]], dtype=complex)
+        return rho / 2
+
+
+class StabilizerQubit(object):
+    """
+    Standalone qubit on a StabilizerTableau with the qunetsim Qubit gate methods
+    (X/Y/Z/H/S/cnot/measure), for protocol code that runs without hosts.
+    """
+
+    def __init__(self, tableau):
+        self._tableau = tableau
+        self._index = tableau.allocate()
+
+    def X(self):
+        self._tableau.X(self._index)
+
+    def Y(self):
+        self._tableau.Y(self._index)
+
+    def Z(self):
+        self._tableau.Z(self._index)
+
+    def H(self):
+        self._tableau.H(self._index)
+
+    def S(self):
+        self._tableau.S(self._index)
+
+    def cnot(self, target):
+        self._tableau.cnot(self._index, target._index)
+
+    def cphase(self, target):
+        self._tableau.cphase(self._index, target._index)
+
+    def density_operator(self):
+        return self._tableau.density_operator(self._index)
+
+    def measure(self, non_destructive=False):
+        outcome = self._tableau.measure(self._index)
+        if not non_destructive:
+            self.release()
+        return outcome
+
+    def release(self):
+        if self._index is not None:
+            self._tableau.release(self._index)
+            self._index = None
+
+
+# Function to turn a rotation angle into a number of quarter turns, if it is Clifford
+def _quarter_turns(phi):
+    turns = phi / (math.pi / 2)
+    if not math.isclose(turns, round(turns), abs_tol=1e-9):
+        raise ValueError(f"Rotation by {phi} rad is not a Clifford gate")
+    return int(round(turns)) % 4
+
+
+class StabilizerBackend(object):
+    """
+    qunetsim backend that simulates qubits on one shared StabilizerTableau.
+
+    Pass the same instance to every Host and to Network.start(backend=...), e.g.
+    Host('Alice', backend=backend); the protocol code that creates Qubit(host)
+    and applies X/Y/Z/H/cnot/measure then runs unchanged. Only Clifford
+    operations are supported: T, K, custom gates and non-multiple-of-pi/2
+    rotations raise ValueError.
+    """
+
+    def __init__(self, num_qubits=64, rng=None):
+        self._tableau = StabilizerTableau(num_qubits, rng)
+        self._hosts = {}
+        self._entanglement_qubits = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tableau(self):
+        return self._tableau
+
+    def start(self, **kwargs):
+        pass
+
+    def stop(self):
+        pass
+
+    def add_host(self, host):
+        with self._lock:
+            self._hosts[host.host_id] = host
+
+    def create_qubit(self, host_id):
+        return self._tableau.allocate()
+
+    def send_qubit_to(self, qubit, from_host_id, to_host_id):
+        qubit.host = self._hosts[to_host_id]
+
+    def create_EPR(self, host_a_id, host_b_id, q_id=None, block=False):
+        from qunetsim.objects import Qubit
+
+        a = self._tableau.allocate()
+        b = self._tableau.allocate()
+        self._tableau.H(a)
+        self._tableau.cnot(a, b)
+        q1 = Qubit(self._hosts[host_a_id], qubit=a, q_id=q_id, blocked=block)
+        q2 = Qubit(self._hosts[host_b_id], qubit=b, q_id=q1.id, blocked=block)
+        self.store_ent_pair(host_a_id, host_b_id, q2)
+        return q1
+
+    def store_ent_pair(self, host_a, host_b, qubit):
+        with self._lock:
+            self._entanglement_qubits.setdefault(host_a + ':' + host_b, Queue()).put(qubit)
+
+    def receive_epr(self, host_id, sender_id, q_id=None, block=False):
+        with self._lock:
+            ent_queue = self._entanglement_qubits.get(sender_id + ':' + host_id)
+        if ent_queue is None:
+            raise Exception("Internal Error!")
+        q = ent_queue.get()
+        if q_id is not None and q_id != q.id:
+            raise ValueError("Qid doesent match id!")
+        return q
+
+    ##########################
+    #   Gate definitions    #
+    ##########################
+
+    def I(self, qubit):
+        pass
+
+    def X(self, qubit):
+        self._tableau.X(qubit.qubit)
+
+    def Y(self, qubit):
+        self._tableau.Y(qubit.qubit)
+
+    def Z(self, qubit):
+        self._tableau.Z(qubit.qubit)
+
+    def H(self, qubit):
+        self._tableau.H(qubit.qubit)
+
+    def S(self, qubit):
+        self._tableau.S(qubit.qubit)
+
+    def K(self, qubit):
+        raise ValueError("K is not supported by the stabilizer backend")
+
+    def T(self, qubit):
+        raise ValueError("T is not a Clifford gate")
+
+    def rz(self, qubit, phi):
+        for _ in range(_quarter_turns(phi)):
+            self._tableau.S(qubit.qubit)
+
+    def rx(self, qubit, phi):
+        self._tableau.H(qubit.qubit)
+        self.rz(qubit, phi)
+        self._tableau.H(qubit.qubit)
+
+    def ry(self, qubit, phi):
+        # RY = S RX S^dagger
+        turns = _quarter_turns(phi)
+        for _ in range(3):
+            self._tableau.S(qubit.qubit)
+        self.rx(qubit, turns * math.pi / 2)
+        self._tableau.S(qubit.qubit)
+
+    def cnot(self, qubit, target):
+        self._tableau.cnot(qubit.qubit, target.qubit)
+
+    def cphase(self, qubit, target):
+        self._tableau.cphase(qubit.qubit, target.qubit)
+
+    def custom_gate(self, qubit, gate):
+        raise ValueError("Custom gates are not supported by the stabilizer backend")
+
+    def custom_controlled_gate(self, qubit, target, gate):
+        raise ValueError("Custom gates are not supported by the stabilizer backend")
+
+    def custom_controlled_two_qubit_gate(self, qubit, target_1, target_2, gate):
+        raise ValueError("Custom gates are not supported by the stabilizer backend")
+
+    def custom_two_qubit_gate(self, qubit1, qubit2, gate):
+        raise ValueError("Custom gates are not supported by the stabilizer backend")
+
+    def density_operator(self, qubit):
+        return self._tableau.density_operator(qubit.qubit)
+
+    def statevector(self, qubit):
+        raise ValueError("The stabilizer backend does not keep a state vector")
+
+    def measure(self, qubit, non_destructive):
+        outcome = self._tableau.measure(qubit.qubit)
+        if not non_destructive:
+            self._tableau.release(qubit.qubit)
+        return outcome
+
+    def release(self, qubit):
+        self._tableau.release(qubit.qubit)
+
+
+if __name__ == "__main__":
+    # Bell pairs between many qubits stay cheap on the tableau
+    tableau = StabilizerTableau(rng=7)
+    pairs = [(StabilizerQubit(tableau), StabilizerQubit(tableau)) for _ in range(500)]
+    for a, b in pairs:
+        a.H()
+        a.cnot(b)
+    agree = sum(a.measure() == b.measure() for a, b in pairs)
+    print(f"Tableau qubits: {tableau.num_qubits}, correlated Bell pairs: {agree}/{len(pairs)}")
@@ -1,11 +1,18 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
+from gate_fusion import apply_sequence
+from results_sink import save_results
+from random_streams import protocol_streams
 import math
+from gate_engine import check_sweep_mode
+
+def t_gate_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5], sweep_mode='incremental', results_path=None, show_plot=True, seed=None):
+    check_sweep_mode(sweep_mode)
+    # Eve and the channel noise draw from their own reproducible streams
+    streams = protocol_streams(seed)
+    eve_stream, noise_stream = streams['eve'], streams['noise']
 
-def t_gate_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5]):
     network = Network.get_instance()
     network.start()
 
@@ -32,48 +39,47 @@ def t_gate_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise_
     noise_probability_fixed = 0.2  
 
     print("\n--- Error Tracking for Each Qubit Sent (Fixed Noise Probability) ---")
+    errors = 0
     for n in range(1, num_qubits + 1):
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(bob)
-            q.Z()  
-            q.H()
-            q.H()  
+            apply_sequence(q, ('Z', 'H', 'H'))
 
             # Eve intercepts with probability eve_probability
-            if random.random() < eve_probability:
+            if eve_stream.random() < eve_probability:
                 q.measure()
                 eve_errors += 1  
 
                 q = Qubit(eve)  
-                q.Z()
-                q.H()
-                q.H()
-                error_gate = random.choice(['X', 'Z', 'Y'])  
+                apply_sequence(q, ('Z', 'H', 'H'))
+                error_gate = eve_stream.choice(['X', 'Z', 'Y'])  
                 if error_gate == 'X': q.X()
                 elif error_gate == 'Z': q.Z()
                 elif error_gate == 'Y': q.Y()
 
             # Introduce noise (regardless of Eve’s interference)
-            if random.random() < noise_probability_fixed:
-                noise_type = random.choice(['X', 'Z', 'Y'])
+            if noise_stream.random() < noise_probability_fixed:
+                noise_type = noise_stream.choice(['X', 'Z', 'Y'])
                 if noise_type == 'X': q.X()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'Y': q.Y()
 
-            q.H()
-            q.H()
-            q.Z()  
+            apply_sequence(q, ('H', 'H', 'Z'))
 
             measurement = q.measure()
             if measurement == 1:
                 errors += 1
+                total_errors += 1
 
         error_rate = (errors / n) * 100
         error_counts_per_qubits.append(error_rate)
         num_bits_sent.append(n)
-        total_errors += errors
-        total_measurements += n  
+        total_measurements += trials  
 
         print(f"Bits Sent: {n}, Error Rate: {error_rate:.2f}%, Eve Errors: {eve_errors}")
 
@@ -82,34 +88,28 @@ def t_gate_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise_
         errors = 0
         for _ in range(num_qubits):
             q = Qubit(bob)
-            q.Z()
-            q.H()
-            q.H()
+            apply_sequence(q, ('Z', 'H', 'H'))
 
             # Eve intercepts
-            if random.random() < eve_probability:
+            if eve_stream.random() < eve_probability:
                 q.measure()
                 eve_errors += 1  
 
                 q = Qubit(eve)
-                q.Z()
-                q.H()
-                q.H()
-                error_gate = random.choice(['X', 'Z', 'Y'])  
+                apply_sequence(q, ('Z', 'H', 'H'))
+                error_gate = eve_stream.choice(['X', 'Z', 'Y'])  
                 if error_gate == 'X': q.X()
                 elif error_gate == 'Z': q.Z()
                 elif error_gate == 'Y': q.Y()
 
             # Introduce noise regardless of Eve
-            if random.random() < noise_probability:
-                noise_type = random.choice(['X', 'Z', 'Y'])
+            if noise_stream.random() < noise_probability:
+                noise_type = noise_stream.choice(['X', 'Z', 'Y'])
                 if noise_type == 'X': q.X()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'Y': q.Y()
 
-            q.H()
-            q.H()
-            q.Z()
+            apply_sequence(q, ('H', 'H', 'Z'))
 
             measurement = q.measure()
             if measurement == 1:
@@ -131,28 +131,38 @@ def t_gate_error_experiment_with_eve(num_qubits=100, eve_probability=0.2, noise_
     quantum_error_rate = total_errors / total_measurements if total_measurements > 0 else 0
     eve_disturbance_rate = eve_errors / total_measurements if total_measurements > 0 else 0
 
-    fig, ax = plt.subplots(1, 3, figsize=(18, 5))
-
-    ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
-    ax[0].set_xlabel('Number of Qubits Sent')
-    ax[0].set_ylabel('Error Rate (%)')
-    ax[0].set_title(f'Error Rate vs. Number of Qubits (Noise={noise_probability_fixed}, Eve={eve_probability})')
-    ax[0].grid()
-
-    ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
-    ax[1].set_xlabel('Noise Probability')
-    ax[1].set_ylabel('Error Rate (%)')
-    ax[1].set_title('Error Rate vs. Noise Probability')
-    ax[1].grid()
-
-    ax[2].plot(range(100, 1100, 100), key_lengths, linestyle='-', color='g')
-    ax[2].set_xlabel('Number of Qubits Sent')
-    ax[2].set_ylabel('Key Length (log₂ N)')
-    ax[2].set_title('Number of Qubits vs. Key Length')
-    ax[2].grid()
-
-    plt.tight_layout()
-    plt.show()
+    if results_path is not None:
+        save_results(results_path, num_bits_sent=num_bits_sent, error_counts_per_qubits=error_counts_per_qubits,
+                     noise_probabilities=noise_probabilities, avg_error_rates=avg_error_rates,
+                     key_lengths=key_lengths, total_errors=total_errors,
+                     total_measurements=total_measurements, quantum_error_rate=quantum_error_rate,
+                     eve_disturbance_rate=eve_disturbance_rate)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(1, 3, figsize=(18, 5))
+
+        ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
+        ax[0].set_xlabel('Number of Qubits Sent')
+        ax[0].set_ylabel('Error Rate (%)')
+        ax[0].set_title(f'Error Rate vs. Number of Qubits (Noise={noise_probability_fixed}, Eve={eve_probability})')
+        ax[0].grid()
+
+        ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
+        ax[1].set_xlabel('Noise Probability')
+        ax[1].set_ylabel('Error Rate (%)')
+        ax[1].set_title('Error Rate vs. Noise Probability')
+        ax[1].grid()
+
+        ax[2].plot(range(100, 1100, 100), key_lengths, linestyle='-', color='g')
+        ax[2].set_xlabel('Number of Qubits Sent')
+        ax[2].set_ylabel('Key Length (log₂ N)')
+        ax[2].set_title('Number of Qubits vs. Key Length')
+        ax[2].grid()
+
+        plt.tight_layout()
+        plt.show()
 
     print("\n=== Quantum Error Rate ===")
     print(f"Total Errors: {total_errors}")
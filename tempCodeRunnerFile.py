@@ -1,39 +1,36 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
+from network_context import NetworkContext
+from results_sink import save_results
+from gate_engine import check_sweep_mode
 
-def hadamard_error_experiment(num_qubits=100):
-    network = Network.get_instance()
-    network.start()
-
-    bob = Host('Bob')
-    alice = Host('Alice')
-
-    bob.add_connection('Alice')
-    alice.add_connection('Bob')
-
-    network.add_host(bob)
-    network.add_host(alice)
-
-    bob.start()
-    alice.start()
+def hadamard_error_experiment(num_qubits=100, sweep_mode='incremental', results_path=None, show_plot=True, link='direct'):
+    check_sweep_mode(sweep_mode)
+    # Bob and Alice share one link: direct in-process hand-over unless link='network'
+    context = NetworkContext(('Bob', 'Alice'), link=link).start()
+    bob = context['Bob']
+    alice = context['Alice']
 
     error_counts = []
     num_bits_sent = []
 
+    errors = 0
     for n in range(1, num_qubits + 1):
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(bob)
             q.H()  # Apply Hadamard gate
 
-            send_status = bob.send_qubit(q, 'Alice', await_ack=True)
-            if isinstance(send_status, str):  # If failure, debug
-                print(f"Failed to send qubit: {send_status}")
+            _, acked = bob.send_qubit('Alice', q, await_ack=True)
+            if not acked:  # If failure, debug
+                print(f"Failed to send qubit {q.id}")
                 continue
 
-            received_q = alice.get_data_qubit(sender='Bob', wait=10)
+            received_q = alice.get_qubit('Bob', wait=10)
             if received_q is None:
                 print("Alice did not receive the qubit.")
                 continue
@@ -47,16 +44,20 @@ def hadamard_error_experiment(num_qubits=100):
         error_counts.append(error_rate)
         num_bits_sent.append(n)
 
-    bob.stop()
-    alice.stop()
-    network.stop(True)
+    context.stop()
+
+    if results_path is not None:
+        save_results(results_path, num_bits_sent=num_bits_sent, error_counts=error_counts)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
 
-    plt.plot(num_bits_sent, error_counts, marker='o', linestyle='-')
-    plt.xlabel('Number of Qubits Sent')
-    plt.ylabel('Error Rate')
-    plt.title('Error Rate of Hadamard Gate vs. Number of Qubits Sent')
-    plt.grid()
-    plt.show()
+        plt.plot(num_bits_sent, error_counts, marker='o', linestyle='-')
+        plt.xlabel('Number of Qubits Sent')
+        plt.ylabel('Error Rate')
+        plt.title('Error Rate of Hadamard Gate vs. Number of Qubits Sent')
+        plt.grid()
+        plt.show()
 
 if __name__ == "__main__":
     hadamard_error_experiment(100)
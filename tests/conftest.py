@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+# The modules live flat in the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Seconds a snippet run in its own interpreter may take before it counts as hung
+RUN_TIMEOUT = 60
+
+
+# Function to run a snippet in a fresh interpreter, so a backend left running shows up as a process that never exits
+def run_script(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                          timeout=RUN_TIMEOUT)
@@ -0,0 +1,35 @@
+from conftest import run_script
+
+
+def test_awaited_ack_with_timeout():
+    # The ACK is processed on another thread after the waiter is registered, as the packet thread would
+    result = run_script("import threading\n"
+                        "from async_hosts import AsyncHost, run_roles\n"
+                        "from direct_link import direct_hosts, stop_direct_hosts\n"
+                        "hosts = direct_hosts(('A', 'B'))\n"
+                        "try:\n"
+                        "    hosts['A'].max_ack_wait = 5\n"
+                        "    seq_num = hosts['A'].get_next_sequence_number('B')\n"
+                        "    threading.Timer(0.2, hosts['A']._process_ack, ('B', seq_num)).start()\n"
+                        "    print(run_roles(AsyncHost(hosts['A'])._await_ack('B', seq_num)), hosts['A']._ack_receiver_queue)\n"
+                        "finally:\n"
+                        "    stop_direct_hosts(hosts)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[True] []'
+
+
+def test_timed_out_and_torn_down_requests_are_withdrawn():
+    result = run_script("from async_hosts import AsyncHost, run_roles\n"
+                        "from direct_link import direct_hosts, stop_direct_hosts\n"
+                        "hosts = direct_hosts(('A', 'B'))\n"
+                        "try:\n"
+                        "    receiver = AsyncHost(hosts['B'])\n"
+                        "    print(run_roles(receiver.get_qubit('A', wait=0.05), receiver.get_classical('A', wait=0.05)))\n"
+                        "    print(hosts['B']._qubit_storage._pending_request_dict,\n"
+                        "          hosts['B']._classical_messages._pending_request_dict)\n"
+                        "    hosts['A'].send_classical('B', 'hello', no_ack=True)\n"
+                        "    print(hosts['B'].get_next_classical('A', wait=0).content)\n"
+                        "finally:\n"
+                        "    stop_direct_hosts(hosts)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ['[None, None]', '{} {}', 'hello']
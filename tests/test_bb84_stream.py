@@ -0,0 +1,24 @@
+import bb84_stream
+from direct_link import direct_hosts
+from stabilizer import StabilizerBackend
+
+
+def test_lost_qubits_are_dropped_before_sifting(monkeypatch):
+    monkeypatch.setattr(bb84_stream, 'DEFAULT_WAIT', 0.01)
+    hosts = direct_hosts(('Alice', 'Bob'), StabilizerBackend(rng=1))
+    alice, bob = hosts['Alice'], hosts['Bob']
+
+    # Every other qubit of a chunk is lost on the way to Bob
+    def lose_half(chunks):
+        for offset, alice_bits, alice_bases, q_ids in chunks:
+            for q_id in q_ids[::2]:
+                bob.get_qubit('Alice', q_id, wait=0)
+            yield offset, alice_bits, alice_bases, q_ids
+
+    chunks = bb84_stream.transmit_chunks(alice, 'Bob', bb84_stream.prepare_chunks(alice, 40, 20, 1))
+    sifted = list(bb84_stream.sift_chunks(bb84_stream.measure_chunks(bob, 'Alice', lose_half(chunks), 2)))
+    assert [offset for offset, _, _, _ in sifted] == [0, 20]
+    for _, sent, key_alice, key_bob in sifted:
+        assert sent == 20
+        assert len(key_alice) <= 10
+        assert key_alice == key_bob
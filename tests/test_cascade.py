@@ -0,0 +1,17 @@
+import numpy as np
+from cascade import cascade, initial_block_size
+
+
+def test_zero_estimate_still_splits_the_key():
+    assert initial_block_size(0.0, 1000) < 1000
+
+
+def test_zero_estimate_corrects_real_errors():
+    rng = np.random.default_rng(14)
+    for true_qber in (0.01, 0.02):
+        for _ in range(50):
+            alice = rng.integers(0, 2, 1000, dtype=np.uint8)
+            bob = alice ^ (rng.random(1000) < true_qber).astype(np.uint8)
+            corrected, leaked = cascade(alice, bob, 0.0, rng=rng)
+            assert corrected == alice.tolist()
+            assert leaked < len(alice)
@@ -0,0 +1,17 @@
+from conftest import run_script
+
+
+def test_direct_bb84_run_exits():
+    result = run_script("import bb84; bb84.bb84_protocol(seed=1)")
+    assert result.returncode == 0, result.stderr
+    lines = dict(line.split(':', 1) for line in result.stdout.splitlines() if ':' in line)
+    assert lines["Alice's key"].strip() == lines["Bob's key"].strip()
+
+
+def test_direct_context_exits():
+    result = run_script("from network_context import NetworkContext\n"
+                        "with NetworkContext(('A', 'B'), link='direct') as context:\n"
+                        "    context['A'].send_classical('B', 'hello', no_ack=True)\n"
+                        "    print(context['B'].get_next_classical('A', wait=1).content)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'hello'
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+from gate_engine import EVE_EXPERIMENTS, error_probability_table, error_rate_vs_qubits
+from conftest import run_script
+
+
+def test_error_rate_vs_qubits_rejects_unknown_sweep_mode():
+    table = error_probability_table(EVE_EXPERIMENTS['hadamard'])
+    with pytest.raises(ValueError):
+        error_rate_vs_qubits(table, 10, 0.2, 0.1, np.random.default_rng(1), sweep_mode='incremntal')
+
+
+def test_script_rejects_unknown_sweep_mode_before_starting_hosts():
+    result = run_script("import z_eve\n"
+                        "try:\n"
+                        "    z_eve.pauli_z_error_experiment_with_eve(sweep_mode='incremntal', show_plot=False)\n"
+                        "except ValueError as error:\n"
+                        "    print(error)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'Unknown sweep mode: incremntal'
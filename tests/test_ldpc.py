@@ -0,0 +1,39 @@
+import numpy as np
+from cascade import cascade
+from ldpc import DEFAULT_FRAME_SIZE, FER_TARGET, ldpc_reconcile
+
+FRAMES = 20
+
+
+# Function to draw Alice's key and Bob's copy with errors at rate true_qber
+def noisy_keys(rng, length, true_qber):
+    alice = rng.integers(0, 2, length, dtype=np.uint8)
+    return alice, alice ^ (rng.random(length) < true_qber).astype(np.uint8)
+
+
+def test_frame_error_rate_meets_target():
+    rng = np.random.default_rng(15)
+    for qber in (0.02, 0.05):
+        alice, bob = noisy_keys(rng, FRAMES * DEFAULT_FRAME_SIZE, qber)
+        kept_alice, kept_bob, _, failed = ldpc_reconcile(alice, bob, qber, seed=15)
+        assert kept_alice == kept_bob
+        assert len(failed) <= FER_TARGET * FRAMES
+
+
+def test_zero_estimate_never_returns_unequal_keys():
+    rng = np.random.default_rng(16)
+    alice, bob = noisy_keys(rng, 8 * DEFAULT_FRAME_SIZE, 0.01)
+    kept_alice, kept_bob, leaked, failed = ldpc_reconcile(alice, bob, 0.0, seed=16)
+    assert kept_alice == kept_bob
+    assert len(kept_alice) == (8 - len(failed)) * DEFAULT_FRAME_SIZE
+    assert leaked > 8
+
+
+def test_leakage_is_close_to_cascade():
+    rng = np.random.default_rng(17)
+    for qber in (0.02, 0.05):
+        alice, bob = noisy_keys(rng, 4 * DEFAULT_FRAME_SIZE, qber)
+        _, _, leaked, failed = ldpc_reconcile(alice, bob, qber, seed=17)
+        _, cascade_leaked = cascade(alice, bob, qber, rng=np.random.default_rng(17))
+        assert failed == []
+        assert leaked <= 1.15 * cascade_leaked
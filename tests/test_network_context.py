@@ -0,0 +1,22 @@
+from conftest import run_script
+
+
+def test_networked_hosts_use_the_context_backend():
+    result = run_script("from qunetsim.backends import EQSNBackend\n"
+                        "from network_context import NetworkContext\n"
+                        "backend = EQSNBackend()\n"
+                        "with NetworkContext(('Alice', 'Bob'), backend=backend) as context:\n"
+                        "    print(context['Alice'].backend is backend, context['Bob'].backend is backend)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['True', 'True']
+
+
+def test_drain_waits_for_delivery():
+    result = run_script("from network_context import NetworkContext\n"
+                        "from transport import is_acked\n"
+                        "with NetworkContext(('Alice', 'Bob')) as context:\n"
+                        "    context['Alice'].send_classical('Bob', 'hello')\n"
+                        "    print(context.drain(), is_acked(context['Alice'], 'Bob', 0))\n"
+                        "    print(context['Bob'].get_next_classical('Alice', wait=0).content)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['True', 'True', 'hello']
@@ -0,0 +1,14 @@
+from parameter_estimation import EAVESDROPPING, INCONCLUSIVE, SECURE, QBEREstimator
+
+
+def test_small_error_free_sample_is_inconclusive():
+    for samples in (8, 50):
+        estimator = QBEREstimator().update(samples, 0)
+        assert estimator.verdict() == INCONCLUSIVE
+        assert not estimator.eavesdropping_detected()
+
+
+def test_verdict_follows_the_sample_size():
+    estimator = QBEREstimator()
+    assert estimator.update(estimator.min_samples(), 0).verdict() == SECURE
+    assert QBEREstimator().update(10, 5).verdict() == EAVESDROPPING
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from results_sink import load_results, save_results
+
+# A one-cell sweep, a length-1 column and a scalar must all come back as saved
+SWEEPS = [
+    {'num_bits_sent': [1], 'error_counts': [12.5]},
+    {'num_bits_sent': [1, 2, 3], 'key_lengths': [0.0], 'qber': 0.25},
+]
+
+
+def check_round_trip(path, arrays):
+    loaded = load_results(save_results(path, **arrays))
+    assert sorted(loaded) == sorted(arrays)
+    for name, value in arrays.items():
+        assert loaded[name].shape == np.shape(value)
+        assert np.allclose(loaded[name], value)
+
+
+@pytest.mark.parametrize('arrays', SWEEPS)
+def test_npz_round_trip_keeps_shapes(tmp_path, arrays):
+    check_round_trip(str(tmp_path / 'results.npz'), arrays)
+
+
+@pytest.mark.parametrize('arrays', SWEEPS)
+def test_parquet_round_trip_keeps_shapes(tmp_path, arrays):
+    pytest.importorskip('pyarrow')
+    check_round_trip(str(tmp_path / 'results.parquet'), arrays)
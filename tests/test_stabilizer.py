@@ -0,0 +1,23 @@
+from conftest import run_script
+import bb84
+from stabilizer import StabilizerBackend
+
+
+def test_bb84_runs_on_the_stabilizer_backend(capsys):
+    backend = StabilizerBackend(rng=3)
+    bb84.bb84_protocol(seed=1, backend=backend)
+    lines = dict(line.split(':', 1) for line in capsys.readouterr().out.splitlines() if ':' in line)
+    assert lines["Alice's key"].strip() == lines["Bob's key"].strip()
+    # Every qubit was simulated on the tableau, and all of them were measured and released
+    assert backend.tableau._next > 0
+    assert len(backend.tableau._free) == backend.tableau._next
+
+
+def test_b92_runs_on_the_stabilizer_backend():
+    result = run_script("import b92\n"
+                        "from stabilizer import StabilizerBackend\n"
+                        "backend = StabilizerBackend(rng=3)\n"
+                        "b92.b92_protocol(length=8, test_cases=2, seed=1, backend=backend)\n"
+                        "print(backend.tableau._next > 0)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-1] == 'True'
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+import topology
+from conftest import ROOT
+
+
+def test_routes_follow_links():
+    for kind in topology.TOPOLOGIES:
+        graph = topology.build_topology(kind, 12, seed=3)
+        for src in graph.nodes:
+            for dst in graph.nodes:
+                path = topology.route(graph, src, dst)
+                assert path[0] == src and path[-1] == dst
+                assert all(b in graph.neighbours[a] for a, b in zip(path, path[1:]))
+
+
+def test_relay_run_exits():
+    result = subprocess.run([sys.executable, '-c', "import topology; print(topology.measure_relay('line', 3, 2)['failures'])"],
+                            cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '0'
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+from conftest import run_script
+from transport import wait_ack
+
+
+def test_wait_ack_timeout_removes_waiter():
+    sender = SimpleNamespace(_seq_number_sender_ack={}, _ack_receiver_queue=[])
+    assert wait_ack(sender, 'B', 0, timeout=0.05) is False
+    assert sender._ack_receiver_queue == []
+
+
+def test_cumulative_transmit_leaves_only_protocol_messages():
+    result = run_script("from qunetsim.objects import Qubit\n"
+                        "from direct_link import direct_hosts, stop_direct_hosts\n"
+                        "from transport import transmit\n"
+                        "hosts = direct_hosts(('A', 'B'))\n"
+                        "try:\n"
+                        "    hosts['B'].send_classical('A', 'hello', no_ack=True)\n"
+                        "    for _ in range(2):\n"
+                        "        received = transmit(hosts['A'], hosts['B'], [Qubit(hosts['A']) for _ in range(6)],\n"
+                        "                            window=2, ack='cumulative')\n"
+                        "        print(sum(q is not None for q in received))\n"
+                        "    hosts['B'].send_classical('A', 'bases', no_ack=True)\n"
+                        "    print(hosts['A'].get_next_classical('B', wait=0).content)\n"
+                        "    print(hosts['A'].get_next_classical('B', wait=0).content)\n"
+                        "finally:\n"
+                        "    stop_direct_hosts(hosts)\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['6', '6', 'hello', 'bases']
@@ -1,11 +1,16 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
+from gate_fusion import apply_sequence
+from results_sink import save_results
+from random_streams import protocol_streams
 import math
+from gate_engine import check_sweep_mode
 
-def t_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5]):
+def t_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5], sweep_mode='incremental', results_path=None, show_plot=True, seed=None):
+    check_sweep_mode(sweep_mode)
+    # The channel noise draws from its own reproducible stream
+    noise_stream = protocol_streams(seed)['noise']
     network = Network.get_instance()
     network.start()
 
@@ -22,29 +27,34 @@ def t_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 1
 
     noise_probability_fixed = 0.1
     print("\n--- Error Tracking for Each Qubit Sent (Fixed Noise Probability) ---")
+    errors = 0
     for n in range(1, num_qubits + 1):
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(host)
-            q.Z(); q.H(); q.H()  # Approximate T-gate
+            apply_sequence(q, ('Z', 'H', 'H'))  # Approximate T-gate
 
-            if random.random() < noise_probability_fixed:
-                noise_type = random.choice(['X', 'Z', 'Y'])
+            if noise_stream.random() < noise_probability_fixed:
+                noise_type = noise_stream.choice(['X', 'Z', 'Y'])
                 if noise_type == 'X': q.X()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'Y': q.Y()
 
-            q.H(); q.H(); q.Z()  # Reverse the operation
+            apply_sequence(q, ('H', 'H', 'Z'))  # Reverse the operation
 
             measurement = q.measure()
             if measurement == 1:
                 errors += 1
+                total_errors += 1
 
         error_rate = (errors / n) * 100
         error_counts_per_qubits.append(error_rate)
         num_bits_sent.append(n)
-        total_errors += errors
-        total_measurements += n  # Accumulate total measurements
+        total_measurements += trials  # Accumulate total measurements
         print(f"Bits Sent: {n}, Error Rate: {error_rate:.2f}%")
 
     print("\n--- Error Tracking for Different Noise Probabilities ---")
@@ -52,15 +62,15 @@ def t_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 1
         errors = 0
         for _ in range(num_qubits):
             q = Qubit(host)
-            q.Z(); q.H(); q.H()
+            apply_sequence(q, ('Z', 'H', 'H'))
 
-            if random.random() < noise_probability:
-                noise_type = random.choice(['X', 'Z', 'Y'])
+            if noise_stream.random() < noise_probability:
+                noise_type = noise_stream.choice(['X', 'Z', 'Y'])
                 if noise_type == 'X': q.X()
                 elif noise_type == 'Z': q.Z()
                 elif noise_type == 'Y': q.Y()
 
-            q.H(); q.H(); q.Z()
+            apply_sequence(q, ('H', 'H', 'Z'))
 
             measurement = q.measure()
             if measurement == 1:
@@ -79,28 +89,38 @@ def t_gate_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 1
     # Compute Quantum Error Rate
     quantum_error_rate = total_errors / total_measurements if total_measurements > 0 else 0
 
-    fig, ax = plt.subplots(1, 3, figsize=(18, 5))
-
-    ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
-    ax[0].set_xlabel('Number of Qubits Sent')
-    ax[0].set_ylabel('Error Rate (%)')
-    ax[0].set_title(f'Error Rate vs. Number of Qubits (Noise={noise_probability_fixed})')
-    ax[0].grid()
-
-    ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
-    ax[1].set_xlabel('Noise Probability')
-    ax[1].set_ylabel('Error Rate (%)')
-    ax[1].set_title('Error Rate vs. Noise Probability')
-    ax[1].grid()
-
-    ax[2].plot(key_length_qubits, key_lengths, linestyle='-', color='g')
-    ax[2].set_xlabel('Number of Qubits Sent')
-    ax[2].set_ylabel('Key Length (log₂ N)')
-    ax[2].set_title('Number of Qubits vs. Key Length')
-    ax[2].grid()
-
-    plt.tight_layout()
-    plt.show()
+    if results_path is not None:
+        save_results(results_path, num_bits_sent=num_bits_sent, error_counts_per_qubits=error_counts_per_qubits,
+                     noise_probabilities=noise_probabilities, avg_error_rates=avg_error_rates,
+                     key_length_qubits=key_length_qubits, key_lengths=key_lengths,
+                     total_errors=total_errors, total_measurements=total_measurements,
+                     quantum_error_rate=quantum_error_rate)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(1, 3, figsize=(18, 5))
+
+        ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
+        ax[0].set_xlabel('Number of Qubits Sent')
+        ax[0].set_ylabel('Error Rate (%)')
+        ax[0].set_title(f'Error Rate vs. Number of Qubits (Noise={noise_probability_fixed})')
+        ax[0].grid()
+
+        ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
+        ax[1].set_xlabel('Noise Probability')
+        ax[1].set_ylabel('Error Rate (%)')
+        ax[1].set_title('Error Rate vs. Noise Probability')
+        ax[1].grid()
+
+        ax[2].plot(key_length_qubits, key_lengths, linestyle='-', color='g')
+        ax[2].set_xlabel('Number of Qubits Sent')
+        ax[2].set_ylabel('Key Length (log₂ N)')
+        ax[2].set_title('Number of Qubits vs. Key Length')
+        ax[2].grid()
+
+        plt.tight_layout()
+        plt.show()
 
     # Print Quantum Error Rate
     print("\n=== Quantum Error Rate ===")
@@ -0,0 +1,295 @@
+import math
+import statistics
+import sys
+import time
+from collections import Counter, deque, namedtuple
+import numpy as np
+from bitvector import BitVector
+from interception import measure_states, prepare_states
+from network_context import NetworkContext
+from random_streams import as_stream, spawn_seeds
+from sifting import sift
+from transport import DEFAULT_WAIT, get_qubits
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import shortest_path
+except ImportError:  # routing tables fall back to one breadth-first search per destination
+    shortest_path = None
+
+TOPOLOGIES = ('line', 'ring', 'star', 'grid', 'random')
+
+# Average node degree of the random metro mesh
+DEFAULT_MESH_DEGREE = 4
+
+# Bits of every relayed key
+DEFAULT_KEY_LENGTH = 256
+
+# Node counts of the relay sweep
+RELAY_SIZES = (2, 10, 100, 1000)
+
+# Hosts N0 .. N(n-1), their links as index pairs, host id -> neighbour ids (for NetworkContext)
+# and the routing table: next_hop[i, j] is the neighbour of node i on a shortest path to node j
+Topology = namedtuple('Topology', ['kind', 'nodes', 'edges', 'neighbours', 'next_hop'])
+
+
+# Function to name the hosts of an n-node topology
+def node_ids(n):
+    return [f'N{i}' for i in range(n)]
+
+
+def line_edges(n):
+    return [(i, i + 1) for i in range(n - 1)]
+
+
+def ring_edges(n):
+    return line_edges(n) + ([(n - 1, 0)] if n > 2 else [])
+
+
+# Function to link every node to the hub N0
+def star_edges(n):
+    return [(0, i) for i in range(1, n)]
+
+
+def grid_edges(n, cols=None):
+    """Nodes filled row by row into a grid of `cols` columns (about sqrt(n)), the last row possibly short."""
+    cols = cols or math.ceil(math.sqrt(n))
+    edges = [(i, i + 1) for i in range(n - 1) if (i + 1) % cols]
+    return edges + [(i, i + cols) for i in range(n - cols)]
+
+
+def random_edges(n, degree=DEFAULT_MESH_DEGREE, rng=None):
+    """Connected random mesh: a random tree plus uniformly drawn extra links up to n*degree/2 links."""
+    rng = as_stream(rng).rng
+    edges = {(int(rng.integers(i)), i) for i in range(1, n)}
+    target = min(n * (n - 1) // 2, n * degree // 2)
+    while len(edges) < target:
+        i, j = sorted(rng.choice(n, 2, replace=False).tolist())
+        edges.add((i, j))
+    return sorted(edges)
+
+
+def routing_table(n, edges):
+    """Next hop from every node to every other along shortest (fewest-hop) paths, -1 if unreachable.
+
+    The paths come from an all-pairs breadth-first search (scipy.sparse.csgraph when
+    SciPy is installed): the predecessor of node i on the path from j is i's next hop
+    towards j. The table is an n x n int32 array, 4 MB at 1,000 nodes.
+    """
+    if shortest_path is not None and edges:
+        rows, cols = np.array(edges).T
+        graph = csr_matrix((np.ones(len(edges)), (rows, cols)), shape=(n, n))
+        _, predecessors = shortest_path(graph, directed=False, unweighted=True, return_predecessors=True)
+        next_hop = predecessors.T.astype(np.int32)
+        next_hop[next_hop < 0] = -1
+        np.fill_diagonal(next_hop, np.arange(n))
+        return next_hop
+
+    adjacency = [[] for _ in range(n)]
+    for i, j in edges:
+        adjacency[i].append(j)
+        adjacency[j].append(i)
+    next_hop = np.empty((n, n), dtype=np.int32)
+    for dst in range(n):
+        hops = [-1] * n
+        hops[dst] = dst
+        queue = deque([dst])
+        while queue:
+            node = queue.popleft()
+            for neighbour in adjacency[node]:
+                if hops[neighbour] < 0:
+                    hops[neighbour] = node
+                    queue.append(neighbour)
+        next_hop[:, dst] = hops
+    return next_hop
+
+
+def build_topology(kind, n, seed=None, degree=DEFAULT_MESH_DEGREE):
+    """An n-node line, ring, star, grid or random mesh with its routing table precomputed."""
+    if n < 2:
+        raise ValueError("A topology needs at least 2 nodes")
+    if kind == 'line':
+        edges = line_edges(n)
+    elif kind == 'ring':
+        edges = ring_edges(n)
+    elif kind == 'star':
+        edges = star_edges(n)
+    elif kind == 'grid':
+        edges = grid_edges(n)
+    elif kind == 'random':
+        edges = random_edges(n, degree, seed)
+    else:
+        raise ValueError(f"Unknown topology: {kind}")
+    nodes = node_ids(n)
+    neighbours = {node: [] for node in nodes}
+    for i, j in edges:
+        neighbours[nodes[i]].append(nodes[j])
+        neighbours[nodes[j]].append(nodes[i])
+    return Topology(kind, nodes, edges, neighbours, routing_table(n, edges))
+
+
+# Function to follow the routing table from src to dst; returns the host ids on the path, both ends included
+def route(topology, src, dst):
+    node, target = int(src[1:]), int(dst[1:])
+    path = [node]
+    while node != target:
+        node = int(topology.next_hop[node, target])
+        if node < 0:
+            raise ValueError(f"No route from {src} to {dst}")
+        path.append(node)
+    return [topology.nodes[i] for i in path]
+
+
+# Function to join two BitVectors end to end
+def _concat(first, second):
+    return BitVector.from_bits(np.concatenate([first.unpack(), second.unpack()]))
+
+
+class LinkKeys(object):
+    """
+    Sifted BB84 key of every link, held separately by its two ends.
+
+    Each end keeps its own copy (they differ wherever the link had errors) and the
+    relay consumes both from the front, so a pad is never used twice. A read offset
+    marks the used part, so taking a pad only unpacks the bytes it covers.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._used = {}
+
+    def available(self, host_id, peer_id):
+        key = self._keys.get((host_id, peer_id))
+        return 0 if key is None else len(key) - self._used[host_id, peer_id]
+
+    def add(self, host_id, peer_id, host_key, peer_key):
+        for end, key in (((host_id, peer_id), host_key), ((peer_id, host_id), peer_key)):
+            if end in self._keys:
+                key = _concat(self._keys[end][self._used[end]:], key)
+            self._keys[end] = key
+            self._used[end] = 0
+
+    # Function to take the next `length` bits at both ends; returns (host's pad, peer's pad)
+    def take(self, host_id, peer_id, length):
+        if self.available(host_id, peer_id) < length:
+            raise ValueError(f"Link {host_id}-{peer_id} holds fewer than {length} key bits")
+        pads = []
+        for end in ((host_id, peer_id), (peer_id, host_id)):
+            used = self._used[end]
+            pads.append(self._keys[end][used:used + length])
+            self._used[end] = used + length
+        return tuple(pads)
+
+
+def link_key(sender, receiver, length, rng=None, quantum=False):
+    """BB84 over one link until both ends hold `length` sifted bits.
+
+    quantum=True sends real qubits from sender to receiver (qunetsim hosts, direct or
+    networked); otherwise the ideal channel is sampled with numpy, which is what
+    large topologies need. Bases are compared in process.
+    Returns (sender's key, receiver's key, qubits sent).
+    """
+    stream = as_stream(rng)
+    key_a = key_b = BitVector.zeros(0)
+    sent = 0
+    while len(key_a) < length:
+        n = 2 * (length - len(key_a)) + 16  # Half the bases match on average
+        bits, bases, bob_bases = stream.bits(n), stream.bits(n), stream.bits(n)
+        if quantum:
+            q_ids = [sender.send_qubit(receiver.host_id, q, no_ack=True)
+                     for q in prepare_states(sender, bits.tolist(), bases.tolist())]
+            received = get_qubits(receiver, sender.host_id, n, q_ids, wait=DEFAULT_WAIT)
+            bob_bits = measure_states(received, bob_bases.tolist())
+        else:
+            bob_bits = np.where(bases == bob_bases, bits, stream.bits(n))
+        _, sifted_a, sifted_b = sift(bases, bob_bases, bits, bob_bits)
+        key_a, key_b = _concat(key_a, sifted_a), _concat(key_b, sifted_b)
+        sent += n
+    return key_a[:length], key_b[:length], sent
+
+
+def relay_key(hosts, topology, keys, src, dst, length=DEFAULT_KEY_LENGTH, rng=None):
+    """Deliver a fresh key from src to dst hop by hop through trusted nodes.
+
+    On every link the key is sent one-time-padded with that link's key (XOR) as a
+    classical message; the next node removes the pad and pads it again for the
+    following link. Every intermediate node therefore sees the key and must be trusted.
+    Returns (src's key, dst's key, hops).
+    """
+    path = route(topology, src, dst)
+    key = BitVector.random(length, rng)
+    received = key
+    for host_id, peer_id in zip(path, path[1:]):
+        pad, peer_pad = keys.take(host_id, peer_id, length)
+        hosts[host_id].send_classical(peer_id, received ^ pad, no_ack=True)
+        received = hosts[peer_id].get_next_classical(host_id, wait=DEFAULT_WAIT).content ^ peer_pad
+    return key, received, len(path) - 1
+
+
+def measure_relay(kind, n, num_keys=100, key_length=DEFAULT_KEY_LENGTH, seed=None, quantum=False, link='direct'):
+    """Relay num_keys keys between random node pairs of an n-node topology and time every stage.
+
+    Routing is precomputed once, then every link establishes exactly the key its
+    share of the paths will consume, then the keys are relayed one after another.
+    Latency is per relayed key, throughput is relayed key bits per second.
+    """
+    topology_seed, pair_seed, key_seed = spawn_seeds(seed, 3)
+    start = time.perf_counter()
+    topology = build_topology(kind, n, topology_seed)
+    routing_seconds = time.perf_counter() - start
+
+    pair_rng = as_stream(pair_seed).rng
+    pairs = [[topology.nodes[i] for i in pair_rng.choice(n, 2, replace=False)] for _ in range(num_keys)]
+    demand = Counter()
+    for src, dst in pairs:
+        path = route(topology, src, dst)
+        demand.update(zip(path, path[1:]))
+
+    stream = as_stream(key_seed)
+    with NetworkContext(topology.nodes, link=link, neighbours=topology.neighbours) as context:
+        keys = LinkKeys()
+        start = time.perf_counter()
+        for (host_id, peer_id), uses in demand.items():
+            key_a, key_b, _ = link_key(context[host_id], context[peer_id], uses * key_length, stream, quantum)
+            keys.add(host_id, peer_id, key_a, key_b)
+        link_key_seconds = time.perf_counter() - start
+
+        latencies = []
+        hops = []
+        failures = 0
+        for src, dst in pairs:
+            start = time.perf_counter()
+            key, received, path_hops = relay_key(context.hosts, topology, keys, src, dst, key_length, stream)
+            latencies.append(time.perf_counter() - start)
+            hops.append(path_hops)
+            failures += key != received
+
+    latencies_ms = np.array(latencies) * 1000
+    relay_seconds = sum(latencies)
+    return {'topology': kind, 'nodes': n, 'links': len(topology.edges), 'keys': num_keys,
+            'mean_hops': statistics.mean(hops), 'max_hops': max(hops), 'failures': failures,
+            'routing_ms': routing_seconds * 1000,
+            'link_key_bits_per_second': sum(demand.values()) * key_length / link_key_seconds,
+            'relay_median_ms': float(np.median(latencies_ms)), 'relay_p95_ms': float(np.percentile(latencies_ms, 95)),
+            'relay_bits_per_second': num_keys * key_length / relay_seconds if relay_seconds else float('inf')}
+
+
+# Function to run measure_relay for every topology kind and node count
+def relay_sweep(kinds=TOPOLOGIES, sizes=RELAY_SIZES, num_keys=100, key_length=DEFAULT_KEY_LENGTH, seed=None):
+    return [measure_relay(kind, n, num_keys, key_length, seed) for kind in kinds for n in sizes]
+
+
+def print_sweep(results):
+    print(f"{'topology':>8} {'nodes':>6} {'links':>6} {'hops':>6} {'routing ms':>11} {'latency ms':>11} "
+          f"{'p95 ms':>8} {'relay bit/s':>12} {'failures':>8}")
+    for r in results:
+        print(f"{r['topology']:>8} {r['nodes']:>6} {r['links']:>6} {r['mean_hops']:>6.1f} {r['routing_ms']:>11.1f} "
+              f"{r['relay_median_ms']:>11.3f} {r['relay_p95_ms']:>8.3f} {r['relay_bits_per_second']:>12.0f} "
+              f"{r['failures']:>8}")
+
+
+if __name__ == "__main__":
+    # python topology.py [keys per run [seed]]
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 2024
+    print_sweep(relay_sweep(num_keys=num_keys, seed=seed))
@@ -0,0 +1,188 @@
+import time
+from collections import deque
+from queue import Empty, Queue
+
+# Qubits that may be in flight (sent, not yet acknowledged) at once
+DEFAULT_WINDOW = 32
+
+# Seconds get_qubits waits for each qubit to arrive
+DEFAULT_WAIT = 10
+
+# Seconds between re-checks of the ACK record while waiting for an ACK
+ACK_POLL_INTERVAL = 0.01
+
+# Classical message of a cumulative ACK: "QACK <qubits received so far>"
+CUMULATIVE_ACK = 'QACK'
+
+
+# Function to check the sender's ACK record: seq_num is acknowledged if it is below the
+# cumulative next-expected number or in the list of selectively acknowledged ones
+def is_acked(sender, receiver_id, seq_num):
+    record = sender._seq_number_sender_ack.get(receiver_id)
+    return record is not None and (seq_num < record[1] or seq_num in record[0])
+
+
+def wait_ack(sender, receiver_id, seq_num, timeout=None):
+    """Block until the ACK for seq_num from receiver_id has arrived; False on timeout.
+
+    The waiter is registered with the host's ACK processing, which wakes it when the
+    ACK arrives. The host removes waiters from its list while iterating over it and
+    can skip one, so the ACK record is also re-checked every ACK_POLL_INTERVAL.
+    """
+    answer = Queue()
+    start = time.time()
+    waiter = (answer, receiver_id, seq_num, timeout, start)
+    sender._ack_receiver_queue.append(waiter)
+    while not is_acked(sender, receiver_id, seq_num):
+        if timeout is not None and time.time() - start > timeout:
+            # Unanswered waiters are only dropped when another ACK arrives, so remove ours
+            if answer.empty():
+                try:
+                    sender._ack_receiver_queue.remove(waiter)
+                except ValueError:
+                    pass
+            return False
+        try:
+            return answer.get(timeout=ACK_POLL_INTERVAL)
+        except Empty:
+            pass
+    return True
+
+
+# Function to list the classical messages received from sender_id, in arrival order
+def received_messages(host, sender_id):
+    return host._classical_messages.get_all_from_sender(sender_id)
+
+
+# Function to check whether a classical message is a cumulative ACK
+def is_cumulative_ack(message):
+    return isinstance(message.content, str) and message.content.startswith(CUMULATIVE_ACK + ' ')
+
+
+def discard_cumulative_acks(host, sender_id, since=0):
+    """Remove the cumulative ACKs received from sender_id after the first `since` messages.
+
+    They are read in place by wait_cumulative_ack, so once a transfer is over they are
+    dropped from the inbox and get_next_classical goes on with the protocol's messages.
+    """
+    storage = host._classical_messages
+    storage._lock.acquire_write()
+    try:
+        messages = storage._host_to_msg_dict.get(sender_id)
+        if messages is None:
+            return
+        read_index = storage._host_to_read_index[sender_id]
+        kept = messages[:since]
+        for i in range(since, len(messages)):
+            if not is_cumulative_ack(messages[i]):
+                kept.append(messages[i])
+            elif i < read_index:
+                read_index -= 1
+        messages[:] = kept
+        storage._host_to_read_index[sender_id] = read_index
+    finally:
+        storage._lock.release_write()
+
+
+def wait_cumulative_ack(sender, receiver_id, acked=0, since=0, timeout=None):
+    """Wait until receiver_id has acknowledged more than `acked` qubits; None on timeout.
+
+    Only the messages received after the first `since` are looked at, so cumulative
+    ACKs of an earlier transfer do not count. They are read in place rather than
+    with get_next_classical, so other classical messages from receiver_id stay
+    unread for the protocol, and timeout bounds the whole wait.
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    while True:
+        for message in reversed(received_messages(sender, receiver_id)[since:]):
+            if is_cumulative_ack(message):
+                count = int(message.content.split()[1])
+                if count > acked:
+                    return count
+                break
+        if deadline is not None and time.time() >= deadline:
+            return None
+        time.sleep(ACK_POLL_INTERVAL)
+
+
+def send_qubits(sender, receiver_id, qubits, window=DEFAULT_WINDOW, ack='selective'):
+    """Send qubits in order with up to `window` of them unacknowledged at a time.
+
+    ack='selective' keeps qunetsim's per-qubit ACKs and only waits for the oldest
+    outstanding one when the window is full; window=1 is the old
+    send_qubit(..., await_ack=True) loop. ack='cumulative' sends the qubits without
+    sequence numbers and waits for the "QACK n" messages that get_qubits sends with
+    ack_every set, so the receiver must be collecting at the same time (see transmit);
+    they are removed from the sender's inbox when the transfer is over.
+    Returns (qubit ids in sending order, ids that were never acknowledged).
+    """
+    window = max(1, window)
+    timeout = sender.max_ack_wait
+    q_ids = []
+    lost = []
+    if ack == 'selective':
+        in_flight = deque()
+        for q in qubits:
+            if len(in_flight) >= window:
+                q_id, seq_num = in_flight.popleft()
+                if not wait_ack(sender, receiver_id, seq_num, timeout):
+                    lost.append(q_id)
+            q_ids.append(sender.send_qubit(receiver_id, q))
+            in_flight.append((q_ids[-1], sender.get_sequence_number(receiver_id)))
+        for q_id, seq_num in in_flight:
+            if not wait_ack(sender, receiver_id, seq_num, timeout):
+                lost.append(q_id)
+        return q_ids, lost
+
+    if ack == 'cumulative':
+        acked = 0
+        since = len(received_messages(sender, receiver_id))
+        for q in qubits:
+            while acked is not None and len(q_ids) - acked >= window:
+                acked = wait_cumulative_ack(sender, receiver_id, acked, since, timeout)
+            if acked is None:
+                break
+            q_ids.append(sender.send_qubit(receiver_id, q, no_ack=True))
+        while acked is not None and acked < len(q_ids):
+            acked = wait_cumulative_ack(sender, receiver_id, acked, since, timeout)
+        discard_cumulative_acks(sender, receiver_id, since)
+        return q_ids, q_ids[acked or 0:]
+
+    raise ValueError(f"Unknown acknowledgement mode: {ack}")
+
+
+def get_qubits(receiver, sender_id, n, q_ids=None, wait=DEFAULT_WAIT, ack_every=None):
+    """Collect n qubits received from sender_id, None for any that did not arrive in time.
+
+    The receiving host handles every packet on its own thread, so qubits can be
+    stored out of order; passing the sender's qubit ids gives them back in sending
+    order. With ack_every set, a cumulative "QACK n" message goes back to the sender
+    after every ack_every qubits and after the last one.
+    """
+    qubits = []
+    for i in range(n):
+        q_id = q_ids[i] if q_ids is not None else None
+        qubits.append(receiver.get_qubit(sender_id, q_id, wait=wait))
+        if ack_every and ((i + 1) % ack_every == 0 or i + 1 == n):
+            receiver.send_classical(sender_id, f"{CUMULATIVE_ACK} {i + 1}", no_ack=True)
+    return qubits
+
+
+def transmit(sender, receiver, qubits, window=DEFAULT_WINDOW, ack='selective'):
+    """Send qubits from sender to receiver and return them as received, in sending order.
+
+    With cumulative ACKs the receiver collects on its own protocol thread and
+    acknowledges every half window, so the sender never stalls on a full window.
+    """
+    q_ids = [q.id for q in qubits]
+    if ack != 'cumulative':
+        send_qubits(sender, receiver.host_id, qubits, window, ack)
+        return get_qubits(receiver, sender.host_id, len(q_ids), q_ids)
+
+    received = []
+    collect = lambda host: received.extend(get_qubits(host, sender.host_id, len(q_ids), q_ids,
+                                                      ack_every=max(1, window // 2)))
+    thread = receiver.run_protocol(collect)
+    send_qubits(sender, receiver.host_id, qubits, window, ack)
+    thread.join()
+    return received
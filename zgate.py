@@ -1,11 +1,15 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from qunetsim.components import Host, Network
 from qunetsim.objects import Qubit
-import random
+from results_sink import save_results
+from random_streams import protocol_streams
 import math
+from gate_engine import check_sweep_mode
 
-def pauli_z_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5]):
+def pauli_z_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100, 100), noise_probabilities=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5], sweep_mode='incremental', results_path=None, show_plot=True, seed=None):
+    check_sweep_mode(sweep_mode)
+    # The channel noise draws from its own reproducible stream
+    noise_stream = protocol_streams(seed)['noise']
     network = Network.get_instance()
     network.start()
 
@@ -23,14 +27,19 @@ def pauli_z_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
     # First Experiment: Error Rate vs. Number of Qubits (Fixed Noise Probability)
     noise_probability_fixed = 0.1
     print("\n--- Error Tracking for Each Qubit Sent (Fixed Noise Probability) ---")
+    errors = 0
     for n in range(1, num_qubits + 1):
-        errors = 0
-        for _ in range(n):
+        if sweep_mode == 'independent':
+            errors = 0
+            trials = n
+        else:
+            trials = 1
+        for _ in range(trials):
             q = Qubit(host)  # Assigning a host
             q.Z()  # Apply Pauli-Z gate
 
-            if random.random() < noise_probability_fixed:
-                noise_type = random.choice(['H', 'X', 'Y'])  # Random noise type
+            if noise_stream.random() < noise_probability_fixed:
+                noise_type = noise_stream.choice(['H', 'X', 'Y'])  # Random noise type
                 if noise_type == 'H':
                     q.H()
                 elif noise_type == 'X':
@@ -43,13 +52,13 @@ def pauli_z_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
 
             if measurement == 1:  # Check for actual errors
                 errors += 1
+                total_errors += 1
 
         error_rate = (errors / n) * 100  # Convert to percentage
         error_counts_per_qubits.append(error_rate)
         num_bits_sent.append(n)
         key_lengths.append(math.log2(n) if n > 0 else 0)  # Assuming key length = log₂(n)
-        total_errors += errors
-        total_measurements += n  # Accumulate total measurements
+        total_measurements += trials  # Accumulate total measurements
         print(f"Bits Sent: {n}, Error Rate: {error_rate:.2f}%, Key Length: {key_lengths[-1]:.2f}")
 
     # Second Experiment: Error Rate vs. Noise Probability (Fixed Number of Qubits)
@@ -60,8 +69,8 @@ def pauli_z_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
             q = Qubit(host)  # Assigning a host
             q.Z()  # Apply Pauli-Z gate
 
-            if random.random() < noise_probability:
-                noise_type = random.choice(['H', 'X', 'Y'])  # Random noise type
+            if noise_stream.random() < noise_probability:
+                noise_type = noise_stream.choice(['H', 'X', 'Y'])  # Random noise type
                 if noise_type == 'H':
                     q.H()
                 elif noise_type == 'X':
@@ -85,32 +94,42 @@ def pauli_z_error_experiment(num_qubits=100, key_length_qubits=range(100, 1100,
     # Compute Quantum Error Rate
     quantum_error_rate = total_errors / total_measurements if total_measurements > 0 else 0
 
-    # Create a single figure with 3 subplots side by side
-    fig, ax = plt.subplots(1, 3, figsize=(18, 5))
-
-    # First Graph: Error Rate vs. Number of Qubits
-    ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
-    ax[0].set_xlabel('Number of Qubits Sent')
-    ax[0].set_ylabel('Error Rate (%)')
-    ax[0].set_title(f'Error Rate vs. Number of Qubits (Noise={noise_probability_fixed})')
-    ax[0].grid()
-
-    # Second Graph: Error Rate vs. Noise Probability
-    ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
-    ax[1].set_xlabel('Noise Probability')
-    ax[1].set_ylabel('Error Rate (%)')
-    ax[1].set_title('Error Rate vs. Noise Probability')
-    ax[1].grid()
-
-    # Third Graph: Number of Qubits vs. Key Length
-    ax[2].plot(num_bits_sent, key_lengths, linestyle='-', color='g')
-    ax[2].set_xlabel('Number of Qubits Sent')
-    ax[2].set_ylabel('Key Length (log₂ N)')
-    ax[2].set_title('Number of Qubits vs. Key Length')
-    ax[2].grid()
-
-    plt.tight_layout()
-    plt.show()
+    if results_path is not None:
+        save_results(results_path, num_bits_sent=num_bits_sent, error_counts_per_qubits=error_counts_per_qubits,
+                     noise_probabilities=noise_probabilities, avg_error_rates=avg_error_rates,
+                     key_length_qubits=key_length_qubits, key_lengths=key_lengths,
+                     total_errors=total_errors, total_measurements=total_measurements,
+                     quantum_error_rate=quantum_error_rate)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+
+        # Create a single figure with 3 subplots side by side
+        fig, ax = plt.subplots(1, 3, figsize=(18, 5))
+
+        # First Graph: Error Rate vs. Number of Qubits
+        ax[0].plot(num_bits_sent, error_counts_per_qubits, linestyle='-', color='b')
+        ax[0].set_xlabel('Number of Qubits Sent')
+        ax[0].set_ylabel('Error Rate (%)')
+        ax[0].set_title(f'Error Rate vs. Number of Qubits (Noise={noise_probability_fixed})')
+        ax[0].grid()
+
+        # Second Graph: Error Rate vs. Noise Probability
+        ax[1].plot(noise_probabilities, avg_error_rates, linestyle='-', color='r')
+        ax[1].set_xlabel('Noise Probability')
+        ax[1].set_ylabel('Error Rate (%)')
+        ax[1].set_title('Error Rate vs. Noise Probability')
+        ax[1].grid()
+
+        # Third Graph: Number of Qubits vs. Key Length
+        ax[2].plot(num_bits_sent, key_lengths, linestyle='-', color='g')
+        ax[2].set_xlabel('Number of Qubits Sent')
+        ax[2].set_ylabel('Key Length (log₂ N)')
+        ax[2].set_title('Number of Qubits vs. Key Length')
+        ax[2].grid()
+
+        plt.tight_layout()
+        plt.show()
 
     # Print Quantum Error Rate
     print("\n=== Quantum Error Rate ===")